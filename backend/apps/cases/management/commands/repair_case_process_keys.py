@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.cases.models import Case, normalize_numero_processo
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula numero_processo_unformatted (chave indexada, só dígitos) dos processos "
+        "em que ela está vazia ou inconsistente com numero_processo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantidade de processos atualizados por lote (padrão: 500).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Não grava; apenas mostra quantos processos seriam corrigidos.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size: int = options["batch_size"]
+        dry_run: bool = bool(options["dry_run"])
+
+        if batch_size <= 0:
+            self.stderr.write(self.style.ERROR("--batch-size deve ser > 0"))
+            return
+
+        checked = 0
+        repaired = 0
+        pending: list[Case] = []
+
+        queryset = Case.objects.only("id", "numero_processo", "numero_processo_unformatted").order_by("id")
+        with transaction.atomic():
+            for case in queryset.iterator(chunk_size=batch_size):
+                checked += 1
+                key = normalize_numero_processo(case.numero_processo)
+                if case.numero_processo_unformatted == key:
+                    continue
+
+                repaired += 1
+                if dry_run:
+                    continue
+
+                case.numero_processo_unformatted = key
+                pending.append(case)
+                if len(pending) >= batch_size:
+                    Case.objects.bulk_update(pending, ["numero_processo_unformatted"])
+                    pending = []
+
+            if pending:
+                Case.objects.bulk_update(pending, ["numero_processo_unformatted"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"repair_case_process_keys: checked={checked} repaired={repaired} dry_run={dry_run}"
+            )
+        )
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+REPAIR_BATCH_SIZE = 500
+
+
+def repair_numero_processo_keys(apps, schema_editor):
+    """Recalcula numero_processo_unformatted (só dígitos) em linhas legadas vazias/inconsistentes."""
+    Case = apps.get_model('cases', 'Case')
+    pending = []
+    queryset = Case.objects.only('id', 'numero_processo', 'numero_processo_unformatted').order_by('id')
+    for case in queryset.iterator(chunk_size=REPAIR_BATCH_SIZE):
+        key = ''.join(filter(str.isdigit, case.numero_processo or ''))
+        if case.numero_processo_unformatted == key:
+            continue
+        case.numero_processo_unformatted = key
+        pending.append(case)
+        if len(pending) >= REPAIR_BATCH_SIZE:
+            Case.objects.bulk_update(pending, ['numero_processo_unformatted'])
+            pending = []
+    if pending:
+        Case.objects.bulk_update(pending, ['numero_processo_unformatted'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0028_case_classificacao_delete_casedocument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='case',
+            name='numero_processo_unformatted',
+            field=models.CharField(db_index=True, help_text='Número limpo (apenas dígitos) para busca; sempre derivado de numero_processo', max_length=25),
+        ),
+        migrations.RunPython(repair_numero_processo_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+"""
+Índice trigram (PostgreSQL) em numero_processo_unformatted para busca parcial
+por número (`LIKE '%...%'`). Nos demais bancos só fica o índice B-tree.
+"""
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS cases_case_numero_unformatted_trgm
+    ON cases_case USING GIN (numero_processo_unformatted gin_trgm_ops)
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS cases_case_numero_unformatted_trgm",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0029_case_numero_processo_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(POSTGRES_FORWARD), _run(POSTGRES_REVERSE)),
+    ]
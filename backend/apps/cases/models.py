@@ -1,3 +1,4 @@
+import re
 import unicodedata
 
 from django.db import models
@@ -10,6 +11,29 @@ from django.conf import settings
 from apps.cases.defaults import CASE_PARTY_ROLE_CHOICES, CASE_TIPO_ACAO_CHOICES
 
 
+def normalize_numero_processo(numero_processo):
+    """Chave de busca do processo: apenas os dígitos do número CNJ."""
+    if not numero_processo:
+        return ''
+    return ''.join(filter(str.isdigit, str(numero_processo)))
+
+
+# Termo de busca que é só um número de processo (com ou sem formatação CNJ)
+PROCESS_NUMBER_QUERY_RE = re.compile(r'[\d.\-\s/]+')
+
+
+def process_number_query_digits(query, min_digits=1):
+    """
+    Dígitos do termo de busca, se ele for só um número de processo
+    ("0000623-69.2026" ou "00006236920268260320"); '' se for texto ou tiver
+    menos de `min_digits` dígitos.
+    """
+    digits = normalize_numero_processo(query)
+    if len(digits) < min_digits or not PROCESS_NUMBER_QUERY_RE.fullmatch(query):
+        return ''
+    return digits
+
+
 class Case(models.Model):
     """
     Processo judicial - núcleo central do sistema.
@@ -29,9 +53,9 @@ class Case(models.Model):
     )
 
     numero_processo_unformatted = models.CharField(
-        max_length=20,
+        max_length=25,
         db_index=True,
-        help_text='Número limpo (apenas dígitos) para busca'
+        help_text='Número limpo (apenas dígitos) para busca; sempre derivado de numero_processo'
     )
 
     # ========== DADOS BÁSICOS ==========
@@ -471,9 +495,11 @@ class Case(models.Model):
             cursor = cursor.case_principal
 
     def save(self, *args, **kwargs):
-        # Auto-preencher numero_processo_unformatted
-        if self.numero_processo:
-            self.numero_processo_unformatted = ''.join(filter(str.isdigit, self.numero_processo))
+        # numero_processo_unformatted é a chave indexada de busca: sempre derivada de numero_processo
+        self.numero_processo_unformatted = normalize_numero_processo(self.numero_processo)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'numero_processo' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'numero_processo_unformatted'}
 
         # Normalização do vínculo: se não houver principal, zera vinculo_tipo.
         if not self.case_principal_id and self.vinculo_tipo:
@@ -26,6 +26,41 @@ def normalize_text(text):
     return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
 
 
+# Timeline compacta: tamanho máximo da descrição enviada em cada card
+TIMELINE_DESCRICAO_MAX_LENGTH = 280
+
+MOVEMENT_PUBLICATION_FIELDS = (
+    'id', 'id_api', 'numero_processo', 'tribunal', 'data_disponibilizacao',
+    'orgao', 'meio', 'link_oficial',
+)
+
+
+def load_movement_publications(movements, include_text=True):
+    """
+    {id_api: Publication} das publicações de origem das movimentações, em uma
+    única consulta (contexto `publications_by_id_api` do CaseMovementSerializer).
+
+    include_text=False não carrega `texto_completo` (timeline compacta).
+    id_api ambíguo (mais de uma publicação) fica de fora, como no
+    `Publication.objects.get` por linha.
+    """
+    from apps.publications.models import Publication
+
+    id_apis = {movement.publicacao_id for movement in movements if movement.publicacao_id}
+    if not id_apis:
+        return {}
+    fields = MOVEMENT_PUBLICATION_FIELDS + (('texto_completo',) if include_text else ())
+    publications = {}
+    ambiguous = set()
+    for publication in Publication.objects.filter(id_api__in=id_apis).only(*fields):
+        if publication.id_api in publications:
+            ambiguous.add(publication.id_api)
+        publications[publication.id_api] = publication
+    for id_api in ambiguous:
+        del publications[id_api]
+    return publications
+
+
 class CasePrazoSerializer(serializers.ModelSerializer):
     """Serializer for CasePrazo (prazos processuais)"""
     dias_restantes = serializers.IntegerField(read_only=True)
@@ -92,21 +127,31 @@ class CaseMovementSerializer(serializers.ModelSerializer):
 
     def get_tasks_count(self, obj):
         """Retorna a quantidade de tarefas vinculadas a esta movimentação"""
+        # Listagem: anotado em CaseMovementViewSet.get_queryset (sem consulta por linha)
+        annotated = getattr(obj, 'tasks_total', None)
+        if annotated is not None:
+            return annotated
         return obj.tasks.count()
+
+    def _get_publication(self, obj):
+        """Publicação de origem (publicacao_id armazena id_api, não pk), ou None."""
+        if not obj.publicacao_id:
+            return None
+        publications = self.context.get('publications_by_id_api')
+        if publications is not None:
+            return publications.get(obj.publicacao_id)
+        from apps.publications.models import Publication
+        try:
+            return Publication.objects.get(id_api=obj.publicacao_id)
+        except Exception:
+            return None
     
     def get_orgao(self, obj):
         """Retorna o órgão da publicação associada, normalizado (sem acentos)"""
-        if obj.publicacao_id:
-            try:
-                from apps.publications.models import Publication
-                # publicacao_id armazena id_api, não pk
-                publication = Publication.objects.get(id_api=obj.publicacao_id)
-                if publication.orgao:
-                    # Normalizar: remover acentos e diacríticos
-                    return normalize_text(publication.orgao)
-                return None
-            except:
-                return None
+        publication = self._get_publication(obj)
+        if publication is not None and publication.orgao:
+            # Normalizar: remover acentos e diacríticos
+            return normalize_text(publication.orgao)
         return None
 
     def get_publication_data(self, obj):
@@ -114,31 +159,35 @@ class CaseMovementSerializer(serializers.ModelSerializer):
         if not obj.publicacao_id:
             return None
 
-        try:
-            from apps.publications.models import Publication
-            publication = Publication.objects.get(id_api=obj.publicacao_id)
-            meio_map = {
-                'D': 'Digital',
-                'F': 'Físico',
-            }
-
-            return {
-                'exists': True,
-                'id_api': publication.id_api,
-                'numero_processo': publication.numero_processo,
-                'tribunal': publication.tribunal,
-                'data_disponibilizacao': publication.data_disponibilizacao,
-                'orgao': publication.orgao,
-                'meio': publication.meio,
-                'meio_display': meio_map.get((publication.meio or '').upper(), publication.meio or '-'),
-                'link_oficial': publication.link_oficial,
-                'texto_completo': publication.texto_completo,
-            }
-        except Exception:
+        publication = self._get_publication(obj)
+        if publication is None:
             return {
                 'exists': False,
                 'id_api': obj.publicacao_id,
             }
+
+        data = self._publication_summary(publication)
+        data['texto_completo'] = publication.texto_completo
+        return data
+
+    @staticmethod
+    def _publication_summary(publication):
+        meio_map = {
+            'D': 'Digital',
+            'F': 'Físico',
+        }
+
+        return {
+            'exists': True,
+            'id_api': publication.id_api,
+            'numero_processo': publication.numero_processo,
+            'tribunal': publication.tribunal,
+            'data_disponibilizacao': publication.data_disponibilizacao,
+            'orgao': publication.orgao,
+            'meio': publication.meio,
+            'meio_display': meio_map.get((publication.meio or '').upper(), publication.meio or '-'),
+            'link_oficial': publication.link_oficial,
+        }
     
     def validate_data(self, value):
         """Validate that data is not in the future"""
@@ -154,6 +203,45 @@ class CaseMovementSerializer(serializers.ModelSerializer):
         return value
 
 
+class CaseMovementTimelineSerializer(CaseMovementSerializer):
+    """
+    Modo compacto da timeline (somente leitura): `publication_data` sem
+    `texto_completo` e descrição resumida. O texto integral é carregado sob
+    demanda em /api/case-movements/{id}/publication-text/.
+    """
+    descricao = serializers.SerializerMethodField()
+    descricao_truncada = serializers.SerializerMethodField()
+
+    class Meta(CaseMovementSerializer.Meta):
+        fields = CaseMovementSerializer.Meta.fields + ['descricao_truncada']
+        read_only_fields = fields
+
+    @staticmethod
+    def _descricao(obj):
+        # Listagem: só o prefixo vem do banco (anotação descricao_resumo)
+        descricao = getattr(obj, 'descricao_resumo', None)
+        if descricao is None:
+            descricao = obj.descricao
+        return descricao or ''
+
+    def get_descricao(self, obj):
+        return self._descricao(obj)[:TIMELINE_DESCRICAO_MAX_LENGTH]
+
+    def get_descricao_truncada(self, obj):
+        return len(self._descricao(obj)) > TIMELINE_DESCRICAO_MAX_LENGTH
+
+    def get_publication_data(self, obj):
+        if not obj.publicacao_id:
+            return None
+        publication = self._get_publication(obj)
+        if publication is None:
+            return {
+                'exists': False,
+                'id_api': obj.publicacao_id,
+            }
+        return self._publication_summary(publication)
+
+
 class CaseTaskSerializer(serializers.ModelSerializer):
     """Serializer for CaseTask (tarefas vinculadas ao processo)"""
 
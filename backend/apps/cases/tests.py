@@ -23,6 +23,7 @@ from apps.cases.models import (
     CaseTituloOption,
     CaseRepresentationTypeOption,
     CaseVinculoTipoOption,
+    process_number_query_digits,
 )
 
 
@@ -806,7 +807,32 @@ class CaseAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertIn('0000001', response.data[0]['numero_processo'])
-    
+
+    def test_search_by_partial_numero_processo_ignores_formatting(self):
+        """Partial process number matches by digits, whatever the formatting"""
+        response = self.client.get('/api/cases/', {'search': '0000002-23.2024 8.26'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([case['id'] for case in response.data], [self.case2.id])
+
+    def test_search_by_party_name_ignores_accents(self):
+        """Party name search matches the accent-folded, indexed contact name"""
+        CaseParty.objects.create(case=self.case1, contact=self.contact, role='AUTOR')
+        self.assertEqual(self.contact.name_normalized, 'joao silva')
+
+        response = self.client.get('/api/cases/', {'search': 'JOAO SILVA'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([case['id'] for case in response.data], [self.case1.id])
+
+        self.contact.name = 'Márcia Souza'
+        self.contact.save(update_fields=['name'])
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.name_normalized, 'marcia souza')
+
+        response = self.client.get('/api/cases/', {'search': 'joão'})
+        self.assertEqual(response.data, [])
+        response = self.client.get('/api/cases/', {'search': 'marcia'})
+        self.assertEqual([case['id'] for case in response.data], [self.case1.id])
+
     def test_search_by_titulo(self):
         """Test searching cases by title"""
         response = self.client.get('/api/cases/?search=Caso 1')
@@ -1328,6 +1354,121 @@ class CaseMovementAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(CaseMovement.objects.count(), 0)
 
+    def _create_timeline(self, size, first_id_api):
+        from apps.publications.models import Publication
+
+        for index in range(size):
+            id_api = first_id_api + index
+            Publication.objects.create(
+                id_api=id_api,
+                numero_processo=self.case.numero_processo,
+                tribunal='TJSP',
+                tipo_comunicacao='Intimação',
+                data_disponibilizacao=timezone.now().date(),
+                orgao='1ª Vara Cível',
+                meio='D',
+                texto_resumo='Resumo',
+                texto_completo='Texto completo',
+            )
+            movement = CaseMovement.objects.create(
+                case=self.case,
+                data=timezone.now().date() - timedelta(days=index),
+                tipo='INTIMACAO',
+                titulo=f'Publicação {index}',
+                origem='DJE',
+                publicacao_id=id_api,
+            )
+            CasePrazo.objects.create(movimentacao=movement, prazo_dias=5)
+            CaseTask.objects.create(case=self.case, movimentacao=movement, titulo=f'Tarefa {index}')
+            CaseTask.objects.create(case=self.case, movimentacao=movement, titulo=f'Tarefa extra {index}')
+
+    def test_list_movements_query_count_is_constant(self):
+        """Publications, prazos and task counts are batch-loaded for the timeline"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = f'/api/case-movements/?case_id={self.case.id}'
+        self._create_timeline(2, 997000001)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_timeline(8, 997000101)
+        CaseMovement.objects.create(
+            case=self.case,
+            data=timezone.now().date(),
+            tipo='DESPACHO',
+            titulo='Publicação removida',
+            origem='DJE',
+            publicacao_id=997999999,
+        )
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 11)
+        self.assertEqual(len(large), len(small))
+
+        by_titulo = {item['titulo']: item for item in response.data}
+        item = by_titulo['Publicação 0']
+        self.assertEqual(item['tasks_count'], 2)
+        self.assertEqual(len(item['prazos']), 1)
+        self.assertEqual(item['orgao'], '1ª Vara Civel')
+        self.assertTrue(item['publication_data']['exists'])
+        self.assertEqual(item['publication_data']['meio_display'], 'Digital')
+        self.assertEqual(item['publication_data']['texto_completo'], 'Texto completo')
+        self.assertEqual(
+            by_titulo['Publicação removida']['publication_data'],
+            {'exists': False, 'id_api': 997999999},
+        )
+        self.assertIsNone(by_titulo['Publicação removida']['orgao'])
+
+    def test_timeline_is_compact_and_keyset_paginated(self):
+        """Compact timeline pages by (-data, -created_at) and loads full text on demand"""
+        self._create_timeline(5, 997000201)
+        long_movement = CaseMovement.objects.create(
+            case=self.case,
+            data=timezone.now().date(),
+            tipo='DESPACHO',
+            titulo='Despacho longo',
+            descricao='x' * 1000,
+            origem='MANUAL',
+        )
+
+        url = f'/api/case-movements/timeline/?case_id={self.case.id}&limit=4'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first.data['has_more'])
+        self.assertEqual(len(first.data['results']), 4)
+
+        second = self.client.get(url, {'cursor': first.data['next_cursor']})
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertFalse(second.data['has_more'])
+        self.assertIsNone(second.data['next_cursor'])
+
+        items = first.data['results'] + second.data['results']
+        expected = list(
+            CaseMovement.objects.filter(case=self.case)
+            .order_by('-data', '-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual([item['id'] for item in items], expected)
+
+        by_id = {item['id']: item for item in items}
+        self.assertEqual(len(by_id[long_movement.id]['descricao']), 280)
+        self.assertTrue(by_id[long_movement.id]['descricao_truncada'])
+        dje_item = next(item for item in items if item['publicacao_id'])
+        self.assertTrue(dje_item['publication_data']['exists'])
+        self.assertNotIn('texto_completo', dje_item['publication_data'])
+        self.assertEqual(dje_item['tasks_count'], 2)
+
+        text = self.client.get(f"/api/case-movements/{dje_item['id']}/publication-text/")
+        self.assertEqual(text.status_code, status.HTTP_200_OK)
+        self.assertTrue(text.data['exists'])
+        self.assertEqual(text.data['texto_completo'], 'Texto completo')
+
+        invalid = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class DeadlineNotificationTest(APITestCase):
     """Test deadline notification creation"""
@@ -1435,9 +1576,9 @@ class DeadlineNotificationTest(APITestCase):
         self.assertEqual(response.data['created'], 3)
         
         # Verify priorities
-        notif_urgentissimo = Notification.objects.get(metadata__movement_id=mov_urgentissimo.id)
-        notif_urgente = Notification.objects.get(metadata__movement_id=mov_urgente.id)
-        notif_normal = Notification.objects.get(metadata__movement_id=mov_normal.id)
+        notif_urgentissimo = Notification.objects.get(source_kind=Notification.SOURCE_MOVEMENT, source_id=str(mov_urgentissimo.id))
+        notif_urgente = Notification.objects.get(source_kind=Notification.SOURCE_MOVEMENT, source_id=str(mov_urgente.id))
+        notif_normal = Notification.objects.get(source_kind=Notification.SOURCE_MOVEMENT, source_id=str(mov_normal.id))
         
         self.assertEqual(notif_urgentissimo.priority, 'urgent')
         self.assertEqual(notif_urgente.priority, 'high')
@@ -1855,3 +1996,43 @@ class CasePrazoScopeTests(APITestCase):
 # - Removed soft-delete tests (feature removed from system)
 # - Added comprehensive financial module tests
 # - Fixed participation_type nullable test (bug fix validation)
+
+
+class CaseProcessKeyTest(TestCase):
+    """numero_processo_unformatted is the indexed digits-only lookup key"""
+
+    def test_save_keeps_key_in_sync_with_update_fields(self):
+        case = Case.objects.create(numero_processo='0000001-23.2024.8.26.0100', tribunal='TJSP')
+        self.assertEqual(case.numero_processo_unformatted, '00000012320248260100')
+
+        case.numero_processo = '0000002-23.2024.8.26.0100'
+        case.save(update_fields=['numero_processo'])
+        case.refresh_from_db()
+        self.assertEqual(case.numero_processo_unformatted, '00000022320248260100')
+
+    def test_repair_command_fixes_legacy_rows(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        ok = Case.objects.create(numero_processo='0000003-23.2024.8.26.0100', tribunal='TJSP')
+        empty = Case.objects.create(numero_processo='0000004-23.2024.8.26.0100', tribunal='TJSP')
+        wrong = Case.objects.create(numero_processo='0000005-23.2024.8.26.0100', tribunal='TJSP')
+        Case.objects.filter(id=empty.id).update(numero_processo_unformatted='')
+        Case.objects.filter(id=wrong.id).update(numero_processo_unformatted='0000005')
+
+        out = StringIO()
+        call_command('repair_case_process_keys', '--dry-run', stdout=out)
+        self.assertIn('repaired=2', out.getvalue())
+        self.assertEqual(Case.objects.get(id=empty.id).numero_processo_unformatted, '')
+
+        call_command('repair_case_process_keys', stdout=StringIO())
+        self.assertEqual(Case.objects.get(id=ok.id).numero_processo_unformatted, '00000032320248260100')
+        self.assertEqual(Case.objects.get(id=empty.id).numero_processo_unformatted, '00000042320248260100')
+        self.assertEqual(Case.objects.get(id=wrong.id).numero_processo_unformatted, '00000052320248260100')
+
+    def test_process_number_query_digits(self):
+        self.assertEqual(process_number_query_digits('0000623-69.2026'), '0000623692026')
+        self.assertEqual(process_number_query_digits(' 00006236920268260320 '), '00006236920268260320')
+        self.assertEqual(process_number_query_digits('João 123'), '')
+        self.assertEqual(process_number_query_digits('12345', min_digits=6), '')
+        self.assertEqual(process_number_query_digits(''), '')
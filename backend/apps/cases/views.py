@@ -1,7 +1,10 @@
 """
 Views for Cases app
 """
+import base64
+import binascii
 import unicodedata
+from datetime import date, datetime
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -9,6 +12,7 @@ from rest_framework.exceptions import ValidationError, PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db.models import Q, Count, Prefetch, Sum, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Substr
 from django.db import IntegrityError, transaction
 from django.contrib.auth import get_user_model
 from apps.accounts.permissions import is_master_user
@@ -42,6 +46,20 @@ def _capitalize_words(text: str) -> str:
     return ' '.join(word[:1].upper() + word[1:].lower() for word in raw.split(' ') if word)
 
 
+def _encode_timeline_cursor(movement) -> str:
+    """Cursor opaco da timeline: posição (data, created_at, id) do último item da página."""
+    raw = f'{movement.data.isoformat()}|{movement.created_at.isoformat()}|{movement.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_timeline_cursor(cursor: str):
+    try:
+        data, created_at, movement_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return date.fromisoformat(data), datetime.fromisoformat(created_at), int(movement_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({'cursor': 'Cursor inválido.'})
+
+
 def _get_default_titulo_labels() -> list[str]:
     """Retorna uma lista fixa de sugestões para o campo `titulo`.
 
@@ -80,6 +98,7 @@ from .models import (
     CaseTituloOption,
     CasePartyRoleOption,
     CaseVinculoTipoOption,
+    process_number_query_digits,
 )
 
 from apps.cases.defaults import DEFAULT_CASE_PARTY_ROLE_OPTIONS, DEFAULT_CASE_REPRESENTATION_TYPES
@@ -91,10 +110,13 @@ from .serializers import (
     CaseRepresentationSerializer,
     CaseLinkSerializer,
     CaseMovementSerializer,
+    CaseMovementTimelineSerializer,
     CasePrazoSerializer,
     CaseTaskSerializer,
     PaymentSerializer,
     ExpenseSerializer,
+    load_movement_publications,
+    TIMELINE_DESCRICAO_MAX_LENGTH,
 )
 
 UserModel = get_user_model()
@@ -181,7 +203,7 @@ class CaseViewSet(viewsets.ModelViewSet):
         'observacoes',
         'vara',
         'tipo_acao',
-        # parties__contact__name é tratado via _normalize em filter_queryset
+        # parties__contact__name é tratado via Contact.name_normalized em filter_queryset
         # para suportar busca sem acento no SQLite
     ]
     ordering_fields = [
@@ -868,26 +890,26 @@ class CaseViewSet(viewsets.ModelViewSet):
         # Busca nos campos do próprio processo (icontains padrão)
         q = (
             Q(numero_processo__icontains=search)
-            | Q(numero_processo_unformatted__icontains=search)
             | Q(titulo__icontains=search)
             | Q(observacoes__icontains=search)
             | Q(vara__icontains=search)
             | Q(tipo_acao__icontains=search)
         )
 
-        # Busca normalizada (sem acento) nos nomes das partes
-        from apps.contacts.models import Contact
-        contact_queryset = Contact.objects.all()
-        if self.request.user.is_authenticated and not is_master_user(self.request.user):
-            contact_queryset = apply_user_owned_or_shared(contact_queryset, self.request.user)
-
-        matching_ids = [
-            cid
-            for cid, name in contact_queryset.values_list('id', 'name')
-            if name and normalized in _normalize(name)
-        ]
-        if matching_ids:
-            q |= Q(parties__contact__id__in=matching_ids)
+        # Número com ou sem formatação: compara só os dígitos com a chave indexada
+        # (no PostgreSQL, o índice trigram atende o LIKE '%...%')
+        search_digits = process_number_query_digits(search)
+        if search_digits:
+            q |= Q(numero_processo_unformatted__contains=search_digits)
+
+        # Busca normalizada (sem acento) nos nomes das partes, pela coluna indexada
+        # name_normalized (no PostgreSQL, o índice trigram atende o LIKE '%...%')
+        if normalized:
+            from apps.contacts.models import Contact
+            contact_queryset = Contact.objects.filter(name_normalized__contains=normalized)
+            if self.request.user.is_authenticated and not is_master_user(self.request.user):
+                contact_queryset = apply_user_owned_or_shared(contact_queryset, self.request.user)
+            q |= Q(parties__contact__in=contact_queryset.values('id'))
 
         return queryset.filter(q).distinct()
 
@@ -952,6 +974,7 @@ class CaseViewSet(viewsets.ModelViewSet):
         # Capturar publicações relacionadas ANTES de deletar o case
         from apps.publications.models import Publication
         from apps.notifications.models import Notification
+        from apps.notifications.stats import invalidate_notification_stats
 
         related_pubs = list(Publication.objects.filter(case_id=instance.id).only('id', 'id_api'))
 
@@ -972,15 +995,16 @@ class CaseViewSet(viewsets.ModelViewSet):
         instance.delete()
 
         # Agora hard-delete das publicações capturadas + notificações não lidas
-        for pub in related_pubs:
-            if pub.id_api:
-                Notification.objects.filter(
-                    type='publication',
-                    metadata__id_api=pub.id_api,
-                    read=False,
-                ).delete()
-            # Publicação pode já ter sido removida por outra ação; delete silencioso
-            Publication.objects.filter(id=pub.id).delete()
+        related_source_ids = [str(pub.id_api) for pub in related_pubs if pub.id_api]
+        if related_source_ids:
+            Notification.objects.filter(
+                source_kind=Notification.SOURCE_PUBLICATION,
+                source_id__in=related_source_ids,
+                read=False,
+            ).delete()
+            invalidate_notification_stats()
+        # Publicação pode já ter sido removida por outra ação; delete silencioso
+        Publication.objects.filter(id__in=[pub.id for pub in related_pubs]).delete()
     
     @action(detail=True, methods=['post'])
     def restore(self, request, pk=None):
@@ -1234,7 +1258,80 @@ class CaseMovementViewSet(viewsets.ModelViewSet):
         case_id = self.request.query_params.get('case_id')
         if case_id:
             queryset = queryset.filter(case_id=case_id)
-        return queryset
+        # tasks_count e prazos sem consulta por movimentação
+        return queryset.annotate(tasks_total=Count('tasks', distinct=True)).prefetch_related('prazos')
+
+    def list(self, request, *args, **kwargs):
+        """Timeline: publicações de origem carregadas em lote (uma consulta para a página inteira)."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        movements = list(page if page is not None else queryset)
+
+        context = self.get_serializer_context()
+        context['publications_by_id_api'] = load_movement_publications(movements)
+        serializer = self.get_serializer_class()(movements, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    TIMELINE_DEFAULT_LIMIT = 30
+    TIMELINE_MAX_LIMIT = 100
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """
+        Timeline compacta com paginação por keyset em (-data, -created_at, -id).
+
+        Query params: case_id (e demais filtros do list), limit (padrão 30, máx. 100)
+        e cursor (next_cursor da página anterior). Sem texto integral das
+        publicações: ver publication_text.
+        """
+        try:
+            limit = int(request.query_params.get('limit', self.TIMELINE_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': 'Valor inválido.'})
+        limit = max(1, min(limit, self.TIMELINE_MAX_LIMIT))
+
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .defer('descricao')
+            .annotate(descricao_resumo=Substr('descricao', 1, TIMELINE_DESCRICAO_MAX_LENGTH + 1))
+            .order_by('-data', '-created_at', '-id')
+        )
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            data, created_at, movement_id = _decode_timeline_cursor(cursor)
+            queryset = queryset.filter(
+                Q(data__lt=data)
+                | Q(data=data, created_at__lt=created_at)
+                | Q(data=data, created_at=created_at, id__lt=movement_id)
+            )
+
+        movements = list(queryset[:limit + 1])
+        has_more = len(movements) > limit
+        movements = movements[:limit]
+
+        context = self.get_serializer_context()
+        context['publications_by_id_api'] = load_movement_publications(movements, include_text=False)
+        serializer = CaseMovementTimelineSerializer(movements, many=True, context=context)
+        return Response({
+            'results': serializer.data,
+            'has_more': has_more,
+            'next_cursor': _encode_timeline_cursor(movements[-1]) if has_more else None,
+        })
+
+    @action(detail=True, methods=['get'], url_path='publication-text')
+    def publication_text(self, request, pk=None):
+        """Texto integral sob demanda (card expandido da timeline compacta)."""
+        movement = self.get_object()
+        publication = load_movement_publications([movement]).get(movement.publicacao_id)
+        return Response({
+            'id': movement.id,
+            'publicacao_id': movement.publicacao_id,
+            'descricao': movement.descricao,
+            'exists': publication is not None,
+            'texto_completo': publication.texto_completo if publication is not None else None,
+        })
 
     def create(self, request, *args, **kwargs):
         if is_master_user(request.user):
@@ -8,3 +8,6 @@ class ContactsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.contacts'
     verbose_name = 'Contatos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.contacts.models import Contact
+from apps.contacts.photos import generate_photo_variants, needs_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as miniaturas (WebP/JPEG) das fotos de contato que ainda não têm "
+        "variantes da foto atual: fotos antigas ou gerações perdidas num reinício."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regera também as variantes já existentes.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Máximo de fotos processadas por execução (0 = sem limite).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Não gera nada; apenas mostra quantas fotos seriam processadas.",
+        )
+
+    def handle(self, *args, **options):
+        force: bool = bool(options["force"])
+        limit: int = options["limit"]
+        dry_run: bool = bool(options["dry_run"])
+
+        if limit < 0:
+            self.stderr.write(self.style.ERROR("--limit deve ser >= 0"))
+            return
+
+        started = time.perf_counter()
+        qs = (
+            Contact.objects.exclude(photo="")
+            .exclude(photo__isnull=True)
+            .only("id", "photo", "photo_variants")
+            .order_by("id")
+        )
+
+        generated = 0
+        skipped = 0
+        failed = 0
+        for contact in qs.iterator(chunk_size=200):
+            if limit and generated + failed >= limit:
+                break
+            if not force and not needs_variants(contact):
+                skipped += 1
+                continue
+            if dry_run:
+                generated += 1
+                continue
+            try:
+                generate_photo_variants(contact)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(self.style.WARNING(f"contato {contact.id}: {exc}"))
+                continue
+            generated += 1
+
+        total_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"generate_contact_photo_variants: generated={generated} skipped={skipped} failed={failed} "
+                f"(force={force}, limit={limit}, dry_run={dry_run})"
+            )
+        )
+        self.stdout.write(f"timings_ms: total={total_ms:.2f}")
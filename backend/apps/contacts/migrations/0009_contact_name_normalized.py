@@ -0,0 +1,73 @@
+"""
+Nome normalizado (minúsculas, sem acentos) do contato para a busca de partes
+na listagem de processos.
+
+No PostgreSQL também cria um índice trigram (`LIKE '%...%'`); nos demais
+bancos fica só o índice B-tree.
+"""
+import unicodedata
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 500
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS contacts_contact_name_normalized_trgm
+    ON contacts_contact USING GIN (name_normalized gin_trgm_ops)
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS contacts_contact_name_normalized_trgm",
+]
+
+
+def _fold(name):
+    nfd = unicodedata.normalize('NFD', name or '')
+    return ''.join(c for c in nfd if unicodedata.category(c) != 'Mn').lower()
+
+
+def backfill_name_normalized(apps, schema_editor):
+    Contact = apps.get_model('contacts', 'Contact')
+    pending = []
+    queryset = Contact.objects.only('id', 'name', 'name_normalized').order_by('id')
+    for contact in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        key = _fold(contact.name)
+        if contact.name_normalized == key:
+            continue
+        contact.name_normalized = key
+        pending.append(contact)
+        if len(pending) >= BACKFILL_BATCH_SIZE:
+            Contact.objects.bulk_update(pending, ['name_normalized'])
+            pending = []
+    if pending:
+        Contact.objects.bulk_update(pending, ['name_normalized'])
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_contacttask_hora_vencimento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Nome sem acentos e em minúsculas para busca; sempre derivado de name', max_length=200),
+        ),
+        migrations.RunPython(backfill_name_normalized, migrations.RunPython.noop),
+        migrations.RunPython(_run(POSTGRES_FORWARD), _run(POSTGRES_REVERSE)),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0009_contact_name_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Miniaturas geradas da foto (apps.contacts.photos): foto de origem, nomes e ETags'),
+        ),
+    ]
@@ -1,12 +1,22 @@
 """
 Models para gestão de contatos (clientes e partes envolvidas).
 """
+import unicodedata
+
 from django.db import models
 from django.core.validators import RegexValidator
 from django.conf import settings
 from django.utils import timezone
 
 
+def normalize_contact_name(name):
+    """Chave de busca do nome: minúsculas e sem acentos ('José' -> 'jose')."""
+    if not name:
+        return ''
+    nfd = unicodedata.normalize('NFD', str(name))
+    return ''.join(c for c in nfd if unicodedata.category(c) != 'Mn').lower()
+
+
 class Contact(models.Model):
     """
     Representa um contato (pessoa física ou jurídica).
@@ -30,6 +40,14 @@ class Contact(models.Model):
     
     # Dados básicos (sempre visível no mini-card)
     name = models.CharField('Nome/Razão Social', max_length=200)
+    name_normalized = models.CharField(
+        max_length=200,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text='Nome sem acentos e em minúsculas para busca; sempre derivado de name'
+    )
 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -67,6 +85,12 @@ class Contact(models.Model):
         null=True,
         help_text='Foto do contato - 40x40px no card, 200x200px no modal'
     )
+    photo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Miniaturas geradas da foto (apps.contacts.photos): foto de origem, nomes e ETags'
+    )
     
     # === Contatos (exibir no card se preenchido) ===
     email = models.EmailField('E-mail', blank=True, null=True)
@@ -106,6 +130,14 @@ class Contact(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.get_person_type_display()})"
+
+    def save(self, *args, **kwargs):
+        # name_normalized é a chave indexada de busca: sempre derivada de name
+        self.name_normalized = normalize_contact_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'name_normalized'}
+        super().save(*args, **kwargs)
     
     # === Properties para lógica de exibição no mini-card ===
     
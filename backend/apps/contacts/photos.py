@@ -0,0 +1,175 @@
+"""
+Variantes redimensionadas das fotos de contato.
+
+Para cada foto são gerados recortes quadrados em WebP e JPEG, gravados ao lado
+do original (`<foto>__thumb.webp`, `<foto>__medium.jpg`, ...):
+- thumb: 80x80 (card de 40x40 em telas 2x);
+- medium: 400x400 (modal de 200x200 em telas 2x).
+
+A geração roda fora da requisição: `enqueue_photo_variants` agenda o trabalho
+em uma thread de background após o commit (ver signals). O resultado fica em
+`Contact.photo_variants` (`source` = foto de origem, `files` = nome e ETag de
+cada variante); variantes de outra foto são ignoradas pelos serializers. O
+comando `generate_contact_photo_variants` gera as pendentes (fotos antigas ou
+trabalhos perdidos num reinício do processo).
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Contact
+
+
+logger = logging.getLogger(__name__)
+
+# nome -> lado (px) do recorte quadrado
+VARIANT_SIZES = {
+    'thumb': 80,
+    'medium': 400,
+}
+
+# extensão -> (formato Pillow, opções de gravação)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 82, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+
+
+def variant_key(variant, ext):
+    return f'{variant}.{ext}'
+
+
+def ready_variants(contact):
+    """Variantes da foto atual ({'thumb.webp': {'name', 'etag'}, ...}); vazio se pendentes."""
+    variants = contact.photo_variants or {}
+    if not contact.photo or variants.get('source') != contact.photo.name:
+        return {}
+    return variants.get('files') or {}
+
+
+def needs_variants(contact):
+    return bool(contact.photo) and (contact.photo_variants or {}).get('source') != contact.photo.name
+
+
+def _square(image, size):
+    return ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+
+
+def _encode(image, ext):
+    image_format, options = VARIANT_FORMATS[ext]
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG não tem transparência: compõe sobre fundo branco
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def delete_photo_variants(contact):
+    """Apaga os arquivos de variantes gravados (de qualquer foto anterior)."""
+    files = (contact.photo_variants or {}).get('files') or {}
+    storage = contact.photo.storage
+    for item in files.values():
+        name = item.get('name')
+        if name and storage.exists(name):
+            storage.delete(name)
+
+
+def generate_photo_variants(contact):
+    """
+    Gera as variantes da foto atual e grava `photo_variants`.
+
+    Returns:
+        dict com as variantes geradas (vazio se o contato não tiver foto).
+    """
+    if not contact.photo:
+        return {}
+    source = contact.photo.name
+    storage = contact.photo.storage
+
+    with contact.photo.open('rb') as original:
+        image = Image.open(original)
+        image.load()
+    # Fotos de celular: aplica a rotação do EXIF antes de recortar
+    image = ImageOps.exif_transpose(image)
+
+    root, _ext = os.path.splitext(source)
+    files = {}
+    for variant, size in VARIANT_SIZES.items():
+        resized = _square(image, size)
+        for ext in VARIANT_FORMATS:
+            content = _encode(resized, ext)
+            name = f'{root}__{variant}.{ext}'
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(content))
+            files[variant_key(variant, ext)] = {
+                'name': name,
+                'etag': hashlib.md5(content).hexdigest(),
+            }
+
+    # Variantes de uma foto anterior que não foram sobrescritas
+    stale = {
+        item.get('name')
+        for item in ((contact.photo_variants or {}).get('files') or {}).values()
+    } - {item['name'] for item in files.values()}
+    for name in filter(None, stale):
+        if storage.exists(name):
+            storage.delete(name)
+
+    photo_variants = {'source': source, 'files': files}
+    # Só grava se a foto não mudou enquanto gerava (update() não dispara signals)
+    Contact.objects.filter(pk=contact.pk, photo=source).update(photo_variants=photo_variants)
+    contact.photo_variants = photo_variants
+    return files
+
+
+def _generate_for_contact_id(contact_id):
+    try:
+        contact = Contact.objects.filter(pk=contact_id).first()
+        if contact is not None and needs_variants(contact):
+            generate_photo_variants(contact)
+    except Exception:
+        logger.exception('falha ao gerar variantes da foto do contato %s', contact_id)
+
+
+def _run_in_background(contact_id):
+    # Thread do executor: conexão própria, fechada ao terminar
+    close_old_connections()
+    try:
+        _generate_for_contact_id(contact_id)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='contact-photo-variants')
+    return _executor
+
+
+def enqueue_photo_variants(contact_id):
+    """
+    Agenda a geração das variantes após o commit.
+
+    Com `CONTACT_PHOTO_VARIANTS_ASYNC = False` gera na hora (testes/depuração).
+    """
+    if not getattr(settings, 'CONTACT_PHOTO_VARIANTS_ASYNC', True):
+        _generate_for_contact_id(contact_id)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_background, contact_id))
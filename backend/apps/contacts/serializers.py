@@ -3,9 +3,13 @@ Serializers para API REST do app de contatos.
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Min, Prefetch
+from django.urls import reverse
 from apps.accounts.permissions import is_master_user
 from apps.accounts.scope import get_master_scope_user, has_master_team_scope
+from apps.cases.models import Case, CaseParty, CaseRepresentation
 from .models import Contact, ContactTask
+from .photos import ready_variants, variant_key
 
 UserModel = get_user_model()
 
@@ -31,6 +35,112 @@ def _get_scope_user(request):
     return user
 
 
+# Atributos preenchidos por `contact_case_link_prefetches` (to_attr)
+SCOPED_CASE_ROLES_ATTR = 'scoped_case_roles'
+SCOPED_REPRESENTATIONS_ATTR = 'scoped_representative_links'
+
+
+def _scope_case_links(queryset, request):
+    """Restringe vínculos (CaseParty/CaseRepresentation) aos processos no escopo da requisição."""
+    user = getattr(request, 'user', None)
+    scope_user = _get_scope_user(request)
+    if scope_user is not None:
+        return queryset.filter(case__owner=scope_user)
+    if user and user.is_authenticated and not _has_full_team_scope(request):
+        return queryset.filter(case__owner=user)
+    return queryset
+
+
+def scoped_case_parties(request):
+    """CaseParty de processos ativos no escopo da requisição."""
+    return _scope_case_links(CaseParty.objects.filter(case__deleted=False), request)
+
+
+def contact_case_link_prefetches(request):
+    """
+    Prefetch dos vínculos do contato com processos (já no escopo da requisição).
+
+    Uma consulta por relação para a página inteira; os serializers leem apenas
+    os atributos `SCOPED_*` em vez de consultar por contato.
+    """
+    return [
+        Prefetch(
+            'case_roles',
+            queryset=scoped_case_parties(request).select_related('case'),
+            to_attr=SCOPED_CASE_ROLES_ATTR,
+        ),
+        Prefetch(
+            'case_representations_as_representative',
+            queryset=_scope_case_links(
+                CaseRepresentation.objects.select_related('case').filter(case__deleted=False),
+                request,
+            ),
+            to_attr=SCOPED_REPRESENTATIONS_ATTR,
+        ),
+    ]
+
+
+def load_unique_client_cases(contact_ids, request):
+    """
+    {contact_id: Case} dos contatos que são cliente em exatamente um processo
+    no escopo, em uma única consulta agrupada (contexto `unique_client_cases`
+    do ContactTaskSerializer). Contatos sem processo único ficam com None.
+    """
+    contact_ids = set(contact_ids)
+    cases = dict.fromkeys(contact_ids)
+    if not contact_ids:
+        return cases
+    rows = (
+        scoped_case_parties(request)
+        .filter(is_client=True, contact_id__in=contact_ids)
+        .order_by()
+        .values('contact_id')
+        .annotate(
+            total=Count('id'),
+            case_id=Min('case_id'),
+            numero_processo=Min('case__numero_processo'),
+            numero_processo_unformatted=Min('case__numero_processo_unformatted'),
+        )
+        .filter(total=1)
+    )
+    for row in rows:
+        # Só os campos usados pelo serializer (id e número formatado)
+        cases[row['contact_id']] = Case(
+            id=row['case_id'],
+            numero_processo=row['numero_processo'],
+            numero_processo_unformatted=row['numero_processo_unformatted'],
+        )
+    return cases
+
+
+def _photo_url(obj, request, variant):
+    """URL da variante WebP da foto (versionada pelo ETag) ou, enquanto pendente, do original."""
+    if not obj.photo or not request:
+        return None
+    item = ready_variants(obj).get(variant_key(variant, 'webp'))
+    if item is None:
+        return request.build_absolute_uri(obj.photo.url)
+    url = reverse('contact-photo-variant', kwargs={'pk': obj.pk, 'variant': variant, 'ext': 'webp'})
+    return request.build_absolute_uri(f"{url}?v={item['etag']}")
+
+
+def _scoped_case_parties(obj, request):
+    prefetched = getattr(obj, SCOPED_CASE_ROLES_ATTR, None)
+    if prefetched is not None:
+        return prefetched
+    return list(_scope_case_links(obj.case_roles.select_related('case').filter(case__deleted=False), request))
+
+
+def _scoped_representative_links(obj, request):
+    prefetched = getattr(obj, SCOPED_REPRESENTATIONS_ATTR, None)
+    if prefetched is not None:
+        return prefetched
+    return list(_scope_case_links(
+        obj.case_representations_as_representative.select_related('case').filter(case__deleted=False),
+        request,
+    ))
+
+
 class ContactListSerializer(serializers.ModelSerializer):
     """
     Serializer para lista de contatos (sidebar).
@@ -71,14 +181,11 @@ class ContactListSerializer(serializers.ModelSerializer):
     
     def get_photo_thumbnail(self, obj):
         """
-        Retorna URL da foto para thumbnail (40x40px no card).
+        Retorna URL da miniatura (80x80px, para o card de 40x40px).
+        Enquanto a miniatura é gerada, devolve a foto original.
         Se não tiver foto, retorna None (frontend exibe ícone padrão).
         """
-        if obj.photo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.photo.url)
-        return None
+        return _photo_url(obj, self.context.get('request'), 'thumb')
     
     def get_is_client_anywhere(self, obj):
         """
@@ -86,39 +193,15 @@ class ContactListSerializer(serializers.ModelSerializer):
         Usado para determinar se pode editar/deletar em /contacts.
         """
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        scope_user = _get_scope_user(request)
-
-        queryset = obj.case_roles.filter(is_client=True, case__deleted=False)
-        if scope_user is not None:
-            queryset = queryset.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            queryset = queryset.filter(case__owner=user)
-
-        return queryset.exists()
+        return any(cp.is_client for cp in _scoped_case_parties(obj, request))
     
     def get_linked_cases(self, obj):
         """
         Retorna lista de processos vinculados a este contato (versão resumida para cards).
         """
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        scope_user = _get_scope_user(request)
-
-        case_parties = obj.case_roles.select_related('case').filter(case__deleted=False)
-        if scope_user is not None:
-            case_parties = case_parties.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            case_parties = case_parties.filter(case__owner=user)
-
-        representative_links = obj.case_representations_as_representative.select_related(
-            'case',
-            'represented_contact',
-        ).filter(case__deleted=False)
-        if scope_user is not None:
-            representative_links = representative_links.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            representative_links = representative_links.filter(case__owner=user)
+        case_parties = _scoped_case_parties(obj, request)
+        representative_links = _scoped_representative_links(obj, request)
 
         linked_as_party = [
             {
@@ -214,14 +297,10 @@ class ContactDetailSerializer(serializers.ModelSerializer):
     
     def get_photo_large(self, obj):
         """
-        Retorna URL da foto para modal (200x200px).
-        Mesma URL da foto original (redimensionamento via CSS no frontend).
+        Retorna URL da foto para modal (400x400px, para exibição em 200x200px).
+        Enquanto a variante é gerada, devolve a foto original.
         """
-        if obj.photo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.photo.url)
-        return None
+        return _photo_url(obj, self.context.get('request'), 'medium')
     
     def get_is_client_anywhere(self, obj):
         """
@@ -230,16 +309,7 @@ class ContactDetailSerializer(serializers.ModelSerializer):
         Se True = Cliente → Pode editar/deletar em /contacts
         """
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        scope_user = _get_scope_user(request)
-
-        queryset = obj.case_roles.filter(is_client=True, case__deleted=False)
-        if scope_user is not None:
-            queryset = queryset.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            queryset = queryset.filter(case__owner=user)
-
-        return queryset.exists()
+        return any(cp.is_client for cp in _scoped_case_parties(obj, request))
     
     def get_linked_cases(self, obj):
         """
@@ -247,23 +317,8 @@ class ContactDetailSerializer(serializers.ModelSerializer):
         Cada processo inclui: id, número, papel (role) e se é cliente.
         """
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        scope_user = _get_scope_user(request)
-
-        case_parties = obj.case_roles.select_related('case').filter(case__deleted=False)
-        if scope_user is not None:
-            case_parties = case_parties.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            case_parties = case_parties.filter(case__owner=user)
-
-        representative_links = obj.case_representations_as_representative.select_related(
-            'case',
-            'represented_contact',
-        ).filter(case__deleted=False)
-        if scope_user is not None:
-            representative_links = representative_links.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            representative_links = representative_links.filter(case__owner=user)
+        case_parties = _scoped_case_parties(obj, request)
+        representative_links = _scoped_representative_links(obj, request)
 
         linked_as_party = [
             {
@@ -308,23 +363,12 @@ class ContactTaskSerializer(serializers.ModelSerializer):
     case_numero = serializers.SerializerMethodField()
 
     def _get_unique_client_case(self, obj):
-        request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        scope_user = _get_scope_user(request)
-
-        case_parties = obj.contact.case_roles.select_related('case').filter(
-            is_client=True,
-            case__deleted=False,
-        )
-        if scope_user is not None:
-            case_parties = case_parties.filter(case__owner=scope_user)
-        elif user and user.is_authenticated and not _has_full_team_scope(request):
-            case_parties = case_parties.filter(case__owner=user)
-
-        case_parties = case_parties[:2]
-        if len(case_parties) != 1:
-            return None
-        return case_parties[0].case
+        # Memo por requisição: a listagem pré-carrega a página inteira e
+        # get_case/get_case_numero compartilham a mesma busca.
+        cases = self.context.setdefault('unique_client_cases', {})
+        if obj.contact_id not in cases:
+            cases.update(load_unique_client_cases([obj.contact_id], self.context.get('request')))
+        return cases[obj.contact_id]
 
     def get_case(self, obj):
         case = self._get_unique_client_case(obj)
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.cases.models import Case, CaseParty
+
+from .models import Contact
+from .photos import enqueue_photo_variants, needs_variants
+from .stats import invalidate_contact_stats
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def invalidate_stats_on_contact_write(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_contact_stats()
+
+
+@receiver(post_save, sender=Contact)
+def generate_photo_variants_on_save(sender, instance, raw=False, **kwargs):
+    # Foto nova (upload/edição): miniaturas geradas em background
+    if raw or not needs_variants(instance):
+        return
+    enqueue_photo_variants(instance.pk)
+
+
+# Campos que definem o detalhamento cliente x não cliente (escopo e vínculo)
+STATS_FIELDS = {
+    Case: ('deleted', 'owner_id'),
+    CaseParty: ('case_id', 'contact_id', 'is_client'),
+}
+
+
+def _stats_fields_changed(sender, instance, update_fields):
+    """Compara os campos de STATS_FIELDS com o banco (uma consulta por pk)."""
+    fields = STATS_FIELDS[sender]
+    if update_fields is not None and not {field.removesuffix('_id') for field in fields} & {
+        field.removesuffix('_id') for field in update_fields
+    }:
+        return False
+    previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    return previous is not None and previous != tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=Case)
+@receiver(pre_save, sender=CaseParty)
+def track_stats_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Salvar um processo (ex.: data da última movimentação a cada andamento, que
+    # também regrava o vínculo do cliente principal) não invalida as
+    # estatísticas; só vínculo novo/alterado, lixeira/restauração ou troca de dono
+    if raw:
+        instance._contact_stats_changed = False
+    elif instance._state.adding:
+        # Processo novo ainda não tem vínculos
+        instance._contact_stats_changed = sender is CaseParty
+    else:
+        instance._contact_stats_changed = _stats_fields_changed(sender, instance, update_fields)
+
+
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=CaseParty)
+def invalidate_stats_on_case_write(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_contact_stats_changed', False):
+        return
+    invalidate_contact_stats()
+
+
+@receiver(post_delete, sender=CaseParty)
+def invalidate_stats_on_case_link_delete(sender, instance, **kwargs):
+    invalidate_contact_stats()
@@ -0,0 +1,127 @@
+"""
+Estatísticas de contatos (GET /api/contacts/statistics/).
+
+Os contadores saem de uma única consulta agregada (expressões condicionais que
+espelham as properties do modelo, ex.: `has_complete_address`). Os detalhamentos
+opcionais (`?breakdown=state,city,client`) custam uma consulta agrupada cada.
+
+O resultado fica em cache por escopo (SQL do queryset + detalhamentos pedidos).
+O cache é versionado: gravações em contatos e nos vínculos com processos chamam
+`invalidate_contact_stats` (via signals), o que troca a chave sem apagar entradas.
+Com vários processos a invalidação só chega a todos com um cache compartilhado
+(CACHE_BACKEND=file ou redis); com o padrão por processo, o TTL curto limita a
+defasagem.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+
+from utils.cache import bump_cache_version, get_cache_version
+
+from .models import Contact
+
+
+STATS_CACHE_TTL_SECONDS = 30
+
+# Cidades com mais contatos devolvidas em `by_city`
+CITY_BREAKDOWN_LIMIT = 50
+
+BREAKDOWNS = ('state', 'city', 'client')
+
+_CACHE_PREFIX = 'contacts:stats'
+_VERSION_KEY = f'{_CACHE_PREFIX}:version'
+
+
+def _filled(field):
+    # Mesmo critério de truthiness das properties: nem NULL nem vazio
+    return Q(**{f'{field}__isnull': False}) & ~Q(**{field: ''})
+
+
+COMPLETE_ADDRESS_Q = (
+    _filled('zip_code') & _filled('street') & _filled('number') & _filled('city') & _filled('state')
+)
+
+
+def parse_breakdowns(value):
+    """'state,client' -> ('client', 'state'); ignora nomes desconhecidos."""
+    requested = {part.strip().lower() for part in (value or '').split(',')}
+    return tuple(sorted(requested & set(BREAKDOWNS)))
+
+
+def compute_contact_stats(queryset, breakdowns=(), client_parties=None):
+    """
+    Args:
+        queryset: contatos no escopo da requisição.
+        breakdowns: detalhamentos extras (ver BREAKDOWNS).
+        client_parties: CaseParty no escopo de processos da requisição; define
+            "cliente" no detalhamento `client` (igual a `is_client_anywhere`).
+    """
+    queryset = queryset.order_by()
+    counted = queryset
+    aggregates = {
+        'total': Count('id'),
+        'with_photo': Count('id', filter=_filled('photo')),
+        'with_email': Count('id', filter=_filled('email')),
+        'with_complete_address': Count('id', filter=COMPLETE_ADDRESS_Q),
+    }
+    for person_type, _label in Contact.PERSON_TYPE_CHOICES:
+        aggregates[f'person_type_{person_type}'] = Count('id', filter=Q(person_type=person_type))
+    if 'client' in breakdowns and client_parties is not None:
+        counted = queryset.annotate(
+            is_client=Exists(client_parties.filter(contact=OuterRef('pk'), is_client=True)),
+        )
+        aggregates['clients'] = Count('id', filter=Q(is_client=True))
+
+    row = counted.aggregate(**aggregates)
+    stats = {
+        'total': row['total'],
+        'by_person_type': {
+            person_type: row[f'person_type_{person_type}']
+            for person_type, _label in Contact.PERSON_TYPE_CHOICES
+            if row[f'person_type_{person_type}']
+        },
+        'with_photo': row['with_photo'],
+        'with_email': row['with_email'],
+        'with_complete_address': row['with_complete_address'],
+    }
+
+    if 'clients' in row:
+        stats['by_client'] = {'clients': row['clients'], 'non_clients': row['total'] - row['clients']}
+    if 'state' in breakdowns:
+        stats['by_state'] = {
+            item['state'] or '': item['count']
+            for item in queryset.values('state').annotate(count=Count('id')).order_by('-count', 'state')
+        }
+    if 'city' in breakdowns:
+        stats['by_city'] = list(
+            queryset.filter(_filled('city'))
+            .values('city', 'state')
+            .annotate(count=Count('id'))
+            .order_by('-count', 'city', 'state')[:CITY_BREAKDOWN_LIMIT]
+        )
+    return stats
+
+
+def _scope_fingerprint(*querysets):
+    parts = [str(qs.order_by().query) for qs in querysets if qs is not None]
+    return hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_contact_stats(queryset, breakdowns=(), client_parties=None):
+    """`compute_contact_stats` com cache por escopo."""
+    client_scope = client_parties if 'client' in breakdowns else None
+    key = (
+        f'{_CACHE_PREFIX}:{get_cache_version(_VERSION_KEY)}:'
+        f'{_scope_fingerprint(queryset, client_scope)}:{",".join(breakdowns)}'
+    )
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_contact_stats(queryset, breakdowns=breakdowns, client_parties=client_parties)
+        cache.set(key, stats, STATS_CACHE_TTL_SECONDS)
+    return stats
+
+
+def invalidate_contact_stats():
+    """Descarta o cache de estatísticas (todos os escopos)."""
+    bump_cache_version(_VERSION_KEY)
@@ -6,13 +6,23 @@ Tests cover:
 - Contact serializers (list, detail)
 - CaseParty integration (link/unlink)
 """
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from apps.contacts.models import Contact
-from apps.cases.models import Case, CaseParty, CaseRepresentation
+from apps.contacts.models import Contact, ContactTask
+from apps.cases.models import Case, CaseMovement, CaseParty, CaseRepresentation
 from apps.contacts.serializers import ContactListSerializer, ContactDetailSerializer
 
 
@@ -299,6 +309,67 @@ class ContactAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def _create_linked_contacts(self, size, start):
+        for index in range(start, start + size):
+            contact = Contact.objects.create(name=f'Parte {index}', person_type='PF', owner=self.user)
+            case = Case.objects.create(
+                numero_processo=f'{index:07d}-23.2025.8.26.0100',
+                titulo=f'Ação {index}',
+                tribunal='TJSP',
+                status='ATIVO',
+                data_distribuicao=timezone.now().date(),
+                owner=self.user,
+            )
+            CaseParty.objects.create(case=case, contact=contact, role='AUTOR', is_client=True)
+            CaseRepresentation.objects.create(
+                case=case,
+                represented_contact=self.contact2,
+                representative_contact=contact,
+                representation_type='Procurador',
+                created_by=self.user,
+            )
+
+    def test_list_query_count_is_constant(self):
+        """Linked cases and client flags come from the scoped prefetch, not per-contact queries"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._create_linked_contacts(2, 100)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get('/api/contacts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_linked_contacts(8, 200)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/contacts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 13)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+        by_name = {contact['name']: contact for contact in response.data}
+        linked = by_name['Parte 200']['linked_cases']
+        self.assertTrue(by_name['Parte 200']['is_client_anywhere'])
+        self.assertEqual([link['link_type'] for link in linked], ['party', 'representation'])
+        self.assertFalse(by_name['Maria Costa']['is_client_anywhere'])
+
+    def test_list_excludes_cases_outside_scope(self):
+        """The prefetch keeps the case owner scope of the serializers"""
+        other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        other_case = Case.objects.create(
+            numero_processo='0000009-23.2025.8.26.0100',
+            titulo='Outro',
+            tribunal='TJSP',
+            status='ATIVO',
+            data_distribuicao=timezone.now().date(),
+            owner=other_user,
+        )
+        CaseParty.objects.create(case=other_case, contact=self.contact2, role='REU', is_client=True)
+
+        response = self.client.get('/api/contacts/')
+        by_name = {contact['name']: contact for contact in response.data}
+        self.assertEqual(by_name['Maria Costa']['linked_cases'], [])
+        self.assertFalse(by_name['Maria Costa']['is_client_anywhere'])
+
     def test_non_master_only_sees_own_contacts(self):
         other_user = User.objects.create_user(
             username='otheruser',
@@ -594,6 +665,269 @@ class ContactCasePartyIntegrationTest(APITestCase):
         self.assertEqual(len(response.data['linked_cases']), 0)
 
 
+class ContactStatisticsTest(APITestCase):
+    """Statistics are aggregated in the database and cached per scope"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='statsuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+        self.complete = Contact.objects.create(
+            name='Endereço Completo',
+            person_type='PF',
+            email='completo@example.com',
+            zip_code='01001-000',
+            street='Praça da Sé',
+            number='1',
+            city='São Paulo',
+            state='SP',
+            owner=self.user,
+        )
+        # Falta o número: endereço incompleto
+        Contact.objects.create(
+            name='Sem Número',
+            person_type='PF',
+            email='',
+            zip_code='13010-000',
+            street='Rua A',
+            number='',
+            city='Campinas',
+            state='SP',
+            owner=self.user,
+        )
+        Contact.objects.create(name='Empresa', person_type='PJ', city='Curitiba', state='PR', owner=self.user)
+        other_user = User.objects.create_user(username='statsother', password='testpass123')
+        Contact.objects.create(name='Fora do escopo', person_type='PF', owner=other_user)
+
+        case = Case.objects.create(
+            numero_processo='0000010-23.2025.8.26.0100',
+            titulo='Ação Estatística',
+            tribunal='TJSP',
+            status='ATIVO',
+            data_distribuicao=timezone.now().date(),
+            owner=self.user,
+        )
+        CaseParty.objects.create(case=case, contact=self.complete, role='AUTOR', is_client=True)
+
+    def test_statistics_single_query_cached_and_invalidated(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/contacts/statistics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data, {
+            'total': 3,
+            'by_person_type': {'PF': 2, 'PJ': 1},
+            'with_photo': 0,
+            'with_email': 1,
+            'with_complete_address': 1,
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/contacts/statistics/')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['total'], 3)
+
+        Contact.objects.create(name='Novo', person_type='PJ', owner=self.user)
+        response = self.client.get('/api/contacts/statistics/')
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['by_person_type'], {'PF': 2, 'PJ': 2})
+
+    def test_statistics_breakdowns(self):
+        response = self.client.get('/api/contacts/statistics/', {'breakdown': 'state,city,client,unknown'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['by_state'], {'SP': 2, 'PR': 1})
+        self.assertEqual(
+            [(item['city'], item['state'], item['count']) for item in response.data['by_city']],
+            [('Campinas', 'SP', 1), ('Curitiba', 'PR', 1), ('São Paulo', 'SP', 1)],
+        )
+        self.assertEqual(response.data['by_client'], {'clients': 1, 'non_clients': 2})
+
+        # Remover o vínculo de cliente invalida o detalhamento
+        CaseParty.objects.filter(contact=self.complete).delete()
+        response = self.client.get('/api/contacts/statistics/', {'breakdown': 'client'})
+        self.assertEqual(response.data['by_client'], {'clients': 0, 'non_clients': 3})
+
+    def test_statistics_invalidated_only_by_case_changes_that_affect_them(self):
+        case = Case.objects.get(numero_processo='0000010-23.2025.8.26.0100')
+        response = self.client.get('/api/contacts/statistics/', {'breakdown': 'client'})
+        self.assertEqual(response.data['by_client'], {'clients': 1, 'non_clients': 2})
+
+        # Andamento (data da última movimentação) e edição comum mantêm o cache
+        CaseMovement.objects.create(case=case, data=timezone.now().date(), tipo='DESPACHO', titulo='Despacho')
+        case.refresh_from_db()
+        case.titulo = 'Ação Estatística (editada)'
+        case.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/contacts/statistics/', {'breakdown': 'client'})
+        self.assertEqual(len(queries), 0)
+
+        # Processo na lixeira sai do escopo do detalhamento
+        case.deleted = True
+        case.save()
+        response = self.client.get('/api/contacts/statistics/', {'breakdown': 'client'})
+        self.assertEqual(response.data['by_client'], {'clients': 0, 'non_clients': 3})
+
+
+class ContactTaskAPITest(APITestCase):
+    """Contact task list resolves each contact's unique client case in batch"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='taskuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.case_number = 1
+
+    def _create_case(self):
+        case = Case.objects.create(
+            numero_processo=f'{self.case_number:07d}2320258260100',
+            titulo=f'Ação {self.case_number}',
+            tribunal='TJSP',
+            status='ATIVO',
+            data_distribuicao=timezone.now().date(),
+            owner=self.user,
+        )
+        self.case_number += 1
+        return case
+
+    def _create_tasks(self, size, cases_per_contact=1):
+        for index in range(size):
+            contact = Contact.objects.create(name=f'Cliente {self.case_number}', person_type='PF', owner=self.user)
+            for _ in range(cases_per_contact):
+                CaseParty.objects.create(case=self._create_case(), contact=contact, role='AUTOR', is_client=True)
+            ContactTask.objects.create(contact=contact, titulo=f'Tarefa {index}')
+            ContactTask.objects.create(contact=contact, titulo=f'Tarefa extra {index}')
+
+    def test_list_query_count_is_constant(self):
+        self._create_tasks(2)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get('/api/contact-tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_tasks(6)
+        self._create_tasks(2, cases_per_contact=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/contact-tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+        with_case = [task for task in response.data if task['case'] is not None]
+        self.assertEqual(len(with_case), 16)
+        case = Case.objects.get(id=with_case[0]['case'])
+        self.assertEqual(with_case[0]['case_numero'], case.numero_processo_formatted)
+        self.assertRegex(with_case[0]['case_numero'], r'^\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}$')
+
+    def test_unique_case_ignores_cases_outside_scope(self):
+        contact = Contact.objects.create(name='Cliente', person_type='PF', owner=self.user)
+        case = self._create_case()
+        CaseParty.objects.create(case=case, contact=contact, role='AUTOR', is_client=True)
+        other_case = self._create_case()
+        other_case.owner = User.objects.create_user(username='taskother', password='testpass123')
+        other_case.save()
+        CaseParty.objects.create(case=other_case, contact=contact, role='AUTOR', is_client=True)
+        task = ContactTask.objects.create(contact=contact, titulo='Tarefa')
+
+        response = self.client.get('/api/contact-tasks/')
+        self.assertEqual([(item['id'], item['case']) for item in response.data], [(task.id, case.id)])
+
+        response = self.client.get(f'/api/contact-tasks/{task.id}/')
+        self.assertEqual(response.data['case'], case.id)
+
+
+class ContactPhotoVariantsTest(APITestCase):
+    """Uploaded photos get cached thumbnail variants"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=self.media_root, CONTACT_PHOTO_VARIANTS_ASYNC=False)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='photouser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.contact = Contact.objects.create(name='Com Foto', person_type='PF', owner=self.user)
+
+    def _photo(self, size=(640, 480), mode='RGBA'):
+        buffer = BytesIO()
+        Image.new(mode, size, (200, 30, 30, 255) if mode == 'RGBA' else (200, 30, 30)).save(buffer, format='PNG')
+        return SimpleUploadedFile('foto.png', buffer.getvalue(), content_type='image/png')
+
+    def _upload(self):
+        response = self.client.post(
+            f'/api/contacts/{self.contact.id}/upload-photo/',
+            {'photo': self._photo()},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.contact.refresh_from_db()
+
+    def test_upload_generates_variants_served_with_cache_headers(self):
+        self._upload()
+        self.assertEqual(self.contact.photo_variants['source'], self.contact.photo.name)
+        self.assertEqual(
+            sorted(self.contact.photo_variants['files']),
+            ['medium.jpg', 'medium.webp', 'thumb.jpg', 'thumb.webp'],
+        )
+
+        response = self.client.get('/api/contacts/')
+        thumbnail = response.data[0]['photo_thumbnail']
+        self.assertIn(f'/api/contacts/{self.contact.id}/photo-variants/thumb/webp/?v=', thumbnail)
+
+        response = self.client.get(f'/api/contacts/{self.contact.id}/photo-variants/thumb/webp/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        image = Image.open(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((image.format, image.size), ('WEBP', (80, 80)))
+
+        response = self.client.get(
+            f'/api/contacts/{self.contact.id}/photo-variants/thumb/webp/',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(f'/api/contacts/{self.contact.id}/photo-variants/medium/jpg/')
+        image = Image.open(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((image.format, image.size), ('JPEG', (400, 400)))
+
+    def test_upload_defers_generation_until_commit(self):
+        with override_settings(CONTACT_PHOTO_VARIANTS_ASYNC=True):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self._upload()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.contact.photo_variants, {})
+
+        # Pendente: cai para a foto original e a variante responde 404
+        response = self.client.get(f'/api/contacts/{self.contact.id}/')
+        self.assertTrue(response.data['photo_large'].endswith(self.contact.photo.url))
+        response = self.client.get(f'/api/contacts/{self.contact.id}/photo-variants/medium/webp/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_backfill_command_and_remove_photo(self):
+        self._upload()
+        Contact.objects.filter(pk=self.contact.pk).update(photo_variants={})
+
+        out = StringIO()
+        call_command('generate_contact_photo_variants', stdout=out)
+        self.assertIn('generated=1 skipped=0 failed=0', out.getvalue())
+        self.contact.refresh_from_db()
+        names = [item['name'] for item in self.contact.photo_variants['files'].values()]
+        self.assertTrue(all(self.contact.photo.storage.exists(name) for name in names))
+
+        out = StringIO()
+        call_command('generate_contact_photo_variants', stdout=out)
+        self.assertIn('generated=0 skipped=1', out.getvalue())
+
+        response = self.client.delete(f'/api/contacts/{self.contact.id}/remove-photo/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(self.contact.photo.storage.exists(name) for name in names))
+
+
 # Test Summary for Contacts App:
 # 
 # Model Tests (12 tests):
@@ -6,6 +6,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 from apps.accounts.permissions import is_master_user
@@ -17,12 +20,17 @@ from apps.accounts.scope import (
     is_truthy,
 )
 from .models import Contact, ContactTask
+from .photos import delete_photo_variants, ready_variants, variant_key
 from .serializers import (
     ContactListSerializer,
     ContactDetailSerializer,
     ContactCreateUpdateSerializer,
     ContactTaskSerializer,
+    contact_case_link_prefetches,
+    load_unique_client_cases,
+    scoped_case_parties,
 )
+from .stats import get_contact_stats, parse_breakdowns
 
 
 class ContactViewSet(viewsets.ModelViewSet):
@@ -39,9 +47,7 @@ class ContactViewSet(viewsets.ModelViewSet):
     - POST   /api/contacts/{id}/upload_photo/ → Upload de foto
     """
     
-    queryset = Contact.objects.prefetch_related(
-        'case_roles__case'
-    ).distinct().order_by('name')
+    queryset = Contact.objects.distinct().order_by('name')
     UserModel = get_user_model()
 
     def _should_exclude_master_own(self):
@@ -97,6 +103,10 @@ class ContactViewSet(viewsets.ModelViewSet):
         if data_fim:
             queryset = queryset.filter(updated_at__date__lte=data_fim)
 
+        # Vínculos com processos já no escopo: os serializers não consultam por contato
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(*contact_case_link_prefetches(self.request))
+
         return queryset
     
     # Filtros e busca
@@ -259,14 +269,125 @@ class ContactViewSet(viewsets.ModelViewSet):
                 {'error': 'Foto deve ter no máximo 5MB'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Valida extensão
+        allowed_extensions = ['jpg', 'jpeg', 'png', 'webp']
+        ext = photo.name.split('.')[-1].lower()
+        if ext not in allowed_extensions:
+            return Response(
+                {'error': f'Formato não permitido. Use: {", ".join(allowed_extensions)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Salva a foto
+        contact.photo = photo
+        contact.save()
+        
+        # Retorna dados atualizados
+        serializer = ContactDetailSerializer(contact, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['delete'], url_path='remove-photo')
+    def remove_photo(self, request, pk=None):
+        """
+        Endpoint customizado para remover foto de perfil.
+        
+        DELETE /api/contacts/{id}/remove-photo/
+        """
+        if is_master_user(request.user):
+            return Response(
+                {'detail': 'Usuário MASTER possui acesso somente leitura a contatos.'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        contact = self.get_object()
+        
+        if contact.photo:
+            # Deleta o arquivo físico (e as miniaturas geradas)
+            delete_photo_variants(contact)
+            contact.photo.delete(save=False)
+            contact.photo = None
+            contact.photo_variants = {}
+            contact.save()
+            
+            return Response(
+                {'message': 'Foto removida com sucesso'},
+                status=status.HTTP_200_OK
+            )
+        else:
+            return Response(
+                {'message': 'Contato não possui foto'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    # URLs das variantes levam ?v=<etag>: o conteúdo de uma URL nunca muda
+    PHOTO_VARIANT_MAX_AGE = 365 * 24 * 60 * 60
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path=r'photo-variants/(?P<variant>thumb|medium)/(?P<ext>webp|jpg)',
+        url_name='photo-variant',
+    )
+    def photo_variant(self, request, pk=None, variant=None, ext=None):
+        """
+        Miniatura gerada da foto (ver apps.contacts.photos).
+        
+        GET /api/contacts/{id}/photo-variants/{thumb|medium}/{webp|jpg}/
+        
+        Responde com ETag e cache longo; If-None-Match igual devolve 304.
+        404 enquanto a variante não foi gerada (use a foto original).
+        """
+        contact = self.get_object()
+        item = ready_variants(contact).get(variant_key(variant, ext))
+        if item is None:
+            raise Http404('Variante da foto indisponível')
+
+        etag = quote_etag(item['etag'])
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                contact.photo.storage.open(item['name'], 'rb'),
+                content_type='image/webp' if ext == 'webp' else 'image/jpeg',
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=self.PHOTO_VARIANT_MAX_AGE, immutable=True)
+        return response
+
+    @action(detail=False, methods=['get'], url_path='statistics')
+    def statistics(self, request):
+        """
+        Endpoint customizado para estatísticas (dashboard).
+        
+        GET /api/contacts/statistics/
+        GET /api/contacts/statistics/?breakdown=state,city,client
+        
+        Retorna:
+        {
+            "total": 156,
+            "by_person_type": {"PF": 140, "PJ": 16},
+            "with_photo": 45,
+            "with_email": 130,
+            "with_complete_address": 98
+        }
+        
+        Detalhamentos opcionais: "by_state" ({"SP": 120, ...}), "by_city"
+        ([{"city", "state", "count"}, ...]) e "by_client" ({"clients", "non_clients"}).
+        Calculado no banco e em cache por escopo (ver apps.contacts.stats).
+        """
+        stats = get_contact_stats(
+            self.get_queryset(),
+            breakdowns=parse_breakdowns(request.query_params.get('breakdown')),
+            client_parties=scoped_case_parties(request),
+        )
+        return Response(stats)
 
 
 class ContactTaskViewSet(viewsets.ModelViewSet):
     """ViewSet para tarefas administrativas vinculadas a um contato (pessoa/cliente)."""
 
-    queryset = ContactTask.objects.select_related('contact').prefetch_related(
-        'contact__case_roles__case',
-    ).all().order_by('data_vencimento', '-created_at')
+    queryset = ContactTask.objects.select_related('contact').all().order_by('data_vencimento', '-created_at')
     serializer_class = ContactTaskSerializer
     UserModel = get_user_model()
 
@@ -310,6 +431,22 @@ class ContactTaskViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """Processo único do cliente resolvido em lote (uma consulta para a página inteira)."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        tasks = list(page if page is not None else queryset)
+
+        context = self.get_serializer_context()
+        context['unique_client_cases'] = load_unique_client_cases(
+            {task.contact_id for task in tasks},
+            request,
+        )
+        serializer = self.get_serializer_class()(tasks, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         if is_master_user(request.user):
             raise PermissionDenied('Usuário MASTER possui acesso somente leitura a tarefas de pessoas.')
@@ -335,85 +472,3 @@ class ContactTaskViewSet(viewsets.ModelViewSet):
         """Retorna apenas a contagem de tarefas para o mesmo escopo/filtros do list()."""
         queryset = self.filter_queryset(self.get_queryset())
         return Response({'count': queryset.count()})
-        
-        # Valida extensão
-        allowed_extensions = ['jpg', 'jpeg', 'png', 'webp']
-        ext = photo.name.split('.')[-1].lower()
-        if ext not in allowed_extensions:
-            return Response(
-                {'error': f'Formato não permitido. Use: {", ".join(allowed_extensions)}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Salva a foto
-        contact.photo = photo
-        contact.save()
-        
-        # Retorna dados atualizados
-        serializer = ContactDetailSerializer(contact, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
-    @action(detail=True, methods=['delete'], url_path='remove-photo')
-    def remove_photo(self, request, pk=None):
-        """
-        Endpoint customizado para remover foto de perfil.
-        
-        DELETE /api/contacts/{id}/remove-photo/
-        """
-        if is_master_user(request.user):
-            return Response(
-                {'detail': 'Usuário MASTER possui acesso somente leitura a contatos.'},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-
-        contact = self.get_object()
-        
-        if contact.photo:
-            # Deleta o arquivo físico
-            contact.photo.delete(save=False)
-            contact.photo = None
-            contact.save()
-            
-            return Response(
-                {'message': 'Foto removida com sucesso'},
-                status=status.HTTP_200_OK
-            )
-        else:
-            return Response(
-                {'message': 'Contato não possui foto'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-    
-    @action(detail=False, methods=['get'], url_path='statistics')
-    def statistics(self, request):
-        """
-        Endpoint customizado para estatísticas (futuro dashboard).
-        
-        GET /api/contacts/statistics/
-        
-        Retorna:
-        {
-            "total": 156,
-            "by_person_type": {"PF": 140, "PJ": 16},
-            "with_photo": 45,
-            "with_email": 130
-        }
-        """
-        from django.db.models import Count, Q
-        
-        queryset = self.get_queryset()
-        
-        stats = {
-            'total': queryset.count(),
-            'by_person_type': dict(
-                queryset.values_list('person_type')
-                .annotate(count=Count('id'))
-            ),
-            'with_photo': queryset.exclude(photo='').exclude(photo=None).count(),
-            'with_email': queryset.exclude(email='').exclude(email=None).count(),
-            'with_complete_address': sum(
-                1 for c in queryset if c.has_complete_address
-            ),
-        }
-        
-        return Response(stats)
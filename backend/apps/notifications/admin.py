@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, ScheduledJobRun
 
 
 @admin.register(Notification)
@@ -17,6 +17,9 @@ class NotificationAdmin(admin.ModelAdmin):
         ('Ação', {
             'fields': ('link', 'metadata')
         }),
+        ('Correlação', {
+            'fields': ('source_kind', 'source_id', 'alert_type')
+        }),
         ('Status', {
             'fields': ('read', 'read_at')
         }),
@@ -43,3 +46,11 @@ class NotificationAdmin(admin.ModelAdmin):
             count += 1
         self.message_user(request, f'{count} notificação(ões) marcada(s) como não lida(s).')
     mark_as_unread.short_description = 'Marcar como não lida(s)'
+
+
+@admin.register(ScheduledJobRun)
+class ScheduledJobRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job', 'status', 'started_at', 'duration_ms']
+    list_filter = ['job', 'status']
+    readonly_fields = ['job', 'started_at', 'finished_at', 'duration_ms', 'status', 'summary']
+    ordering = ['-started_at']
@@ -0,0 +1,128 @@
+"""
+Varredura de prazos: cria notificações 'deadline' para movimentações cujo
+prazo vence na janela de verificação (padrão jurídico 15/7/3).
+
+Movimentações já notificadas (notificação não lida com a mesma chave de
+origem) são excluídas por anti-join no banco; só as faltantes são carregadas e
+criadas com bulk_create. Usada por NotificationViewSet.check_deadlines e pelo
+comando `check_deadlines`.
+"""
+from datetime import timedelta
+
+from django.db.models import CharField, Exists, OuterRef
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Notification
+from .stats import invalidate_notification_stats
+
+
+DEADLINE_WINDOW_DAYS = 15
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def deadline_priority(days_until):
+    """(priority, texto) segundo o padrão 15/7/3."""
+    if days_until <= 3:
+        if days_until == 0:
+            return 'urgent', 'HOJE'
+        if days_until == 1:
+            return 'urgent', 'AMANHÃ'
+        return 'urgent', f'em {days_until} dias (URGENTÍSSIMO)'
+    if days_until <= 7:
+        return 'high', f'em {days_until} dias (URGENTE)'
+    return 'medium', f'em {days_until} dias'
+
+
+def movements_in_window(today=None, window_days=DEADLINE_WINDOW_DAYS):
+    from apps.cases.models import CaseMovement
+
+    today = today or timezone.now().date()
+    return CaseMovement.objects.filter(
+        prazo__isnull=False,
+        data_limite_prazo__isnull=False,
+        data_limite_prazo__gte=today,
+        data_limite_prazo__lte=today + timedelta(days=window_days),
+    )
+
+
+def _already_notified():
+    return Notification.objects.filter(
+        type='deadline',
+        source_kind=Notification.SOURCE_MOVEMENT,
+        source_id=Cast(OuterRef('pk'), output_field=CharField()),
+        read=False,
+    )
+
+
+def _build_deadline_notification(movement, today):
+    days_until = (movement.data_limite_prazo - today).days
+    priority, priority_text = deadline_priority(days_until)
+    case = movement.case
+    return Notification(
+        owner_id=case.owner_id,
+        type='deadline',
+        priority=priority,
+        title=f'⏰ Prazo vence {priority_text}',
+        message=f'Processo {case.numero_processo}: {movement.titulo}',
+        link=f'/cases/{case.id}',
+        source_kind=Notification.SOURCE_MOVEMENT,
+        source_id=str(movement.id),
+        metadata={
+            'movement_id': movement.id,
+            'case_id': case.id,
+            'case_number': case.numero_processo,
+            'deadline_date': movement.data_limite_prazo.isoformat(),
+            'days_until': days_until,
+            'movement_type': movement.tipo,
+            'movement_title': movement.titulo,
+        },
+    )
+
+
+def scan_deadlines(movements=None, today=None, dry_run=False):
+    """
+    Cria as notificações de prazo que faltam.
+
+    Args:
+        movements: queryset de CaseMovement já restrito ao escopo desejado
+            (None = todos os donos, janela padrão)
+        dry_run: não grava; `created` indica quantas seriam criadas
+
+    Returns:
+        {'checked', 'created', 'skipped', 'notifications': [...]}
+    """
+    today = today or timezone.now().date()
+    if movements is None:
+        movements = movements_in_window(today=today)
+
+    checked = movements.count()
+    pending = list(
+        movements.filter(~Exists(_already_notified()))
+        .select_related('case')
+        .only(
+            'id', 'titulo', 'tipo', 'data_limite_prazo',
+            'case__id', 'case__owner_id', 'case__numero_processo',
+        )
+        .order_by('data_limite_prazo', 'id')
+    )
+    notifications = [_build_deadline_notification(movement, today) for movement in pending]
+    if notifications and not dry_run:
+        Notification.objects.bulk_create(notifications, batch_size=BULK_CREATE_BATCH_SIZE)
+        invalidate_notification_stats({notification.owner_id for notification in notifications})
+
+    return {
+        'checked': checked,
+        'created': len(notifications),
+        'skipped': checked - len(notifications),
+        'notifications': [
+            {
+                'id': notification.id,
+                'case_number': notification.metadata['case_number'],
+                'deadline': notification.metadata['deadline_date'],
+                'days_until': notification.metadata['days_until'],
+                'priority': notification.priority,
+            }
+            for notification in notifications
+        ],
+    }
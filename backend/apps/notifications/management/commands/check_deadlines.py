@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notifications.deadlines import DEADLINE_WINDOW_DAYS, movements_in_window, scan_deadlines
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria notificações de prazo (padrão 15/7/3) para movimentações de todos os donos "
+        "cujo prazo vence nos próximos N dias. Prazos já notificados são ignorados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=DEADLINE_WINDOW_DAYS,
+            help=f"Janela de verificação em dias (padrão: {DEADLINE_WINDOW_DAYS}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Não cria notificações; apenas mostra quantas seriam criadas.",
+        )
+
+    def handle(self, *args, **options):
+        window_days: int = options["window_days"]
+        dry_run: bool = bool(options["dry_run"])
+
+        if window_days < 0:
+            self.stderr.write(self.style.ERROR("--window-days deve ser >= 0"))
+            return
+
+        today = timezone.now().date()
+        result = scan_deadlines(
+            movements_in_window(today=today, window_days=window_days),
+            today=today,
+            dry_run=dry_run,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"check_deadlines: checked={result['checked']} created={result['created']} "
+                f"skipped={result['skipped']} (window_days={window_days}, dry_run={dry_run})"
+            )
+        )
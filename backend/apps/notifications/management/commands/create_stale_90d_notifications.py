@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
@@ -7,6 +8,7 @@ from django.utils import timezone
 
 from apps.cases.models import Case
 from apps.notifications.models import Notification
+from apps.notifications.stats import invalidate_notification_stats
 
 
 class Command(BaseCommand):
@@ -33,11 +35,18 @@ class Command(BaseCommand):
             action="store_true",
             help="Não cria notificações; apenas mostra quantas seriam criadas.",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Notificações inseridas por bulk_create (padrão: 500).",
+        )
 
     def handle(self, *args, **options):
         days: int = options["days"]
         limit: int = options["limit"]
         dry_run: bool = bool(options["dry_run"])
+        batch_size: int = options["batch_size"]
 
         if days <= 0:
             self.stderr.write(self.style.ERROR("--days deve ser > 0"))
@@ -45,10 +54,28 @@ class Command(BaseCommand):
         if limit < 0:
             self.stderr.write(self.style.ERROR("--limit deve ser >= 0"))
             return
+        if batch_size <= 0:
+            self.stderr.write(self.style.ERROR("--batch-size deve ser > 0"))
+            return
+
+        timings = {"alerted": 0.0, "scan": 0.0, "insert": 0.0}
+        started = time.perf_counter()
 
-        today = timezone.now().date()
+        today = timezone.localdate()
         threshold_date = today - timedelta(days=days)
 
+        # Fase 1: processos já alertados hoje, em uma única consulta
+        phase_started = time.perf_counter()
+        already_alerted = set(
+            Notification.objects.filter(
+                type="process",
+                alert_type=Notification.ALERT_STALE_90_DAYS,
+                source_kind=Notification.SOURCE_CASE,
+                created_at__date=today,
+            ).values_list("owner_id", "source_id")
+        )
+        timings["alerted"] = (time.perf_counter() - phase_started) * 1000
+
         qs = (
             Case.objects.filter(
                 deleted=False,
@@ -56,57 +83,73 @@ class Command(BaseCommand):
                 data_ultima_movimentacao__lte=threshold_date,
             )
             .exclude(status__in=["INATIVO", "ARQUIVADO", "ENCERRADO"])
-            .select_related("owner")
             .order_by("data_ultima_movimentacao")
+            .values_list("id", "owner_id", "numero_processo", "data_ultima_movimentacao")
         )
 
         created = 0
         skipped = 0
         candidates = 0
-
-        for case in qs.iterator():
+        pending: list[Notification] = []
+        owner_ids: set = set()
+
+        def flush():
+            insert_started = time.perf_counter()
+            Notification.objects.bulk_create(pending)
+            timings["insert"] += (time.perf_counter() - insert_started) * 1000
+            pending.clear()
+
+        # Fase 2: varre os processos parados montando as notificações em memória
+        phase_started = time.perf_counter()
+        for case_id, owner_id, numero_processo, last_movement in qs.iterator(chunk_size=batch_size):
             if limit and created >= limit:
                 break
 
             candidates += 1
-            days_without_activity = (today - case.data_ultima_movimentacao).days
-
             # Evita criar spam: no máximo 1 notificação por processo por dia.
-            already_exists = Notification.objects.filter(
-                owner=case.owner,
-                type="process",
-                metadata__alert_type="stale_90_days",
-                metadata__case_id=case.id,
-                created_at__date=today,
-            ).exists()
-
-            if already_exists:
+            if (owner_id, str(case_id)) in already_alerted:
                 skipped += 1
                 continue
 
+            created += 1
             if dry_run:
-                created += 1
                 continue
 
-            Notification.objects.create(
-                owner=case.owner,
-                type="process",
-                priority="high",
-                title=f"⚠ Processo sem movimentação há {days_without_activity} dias",
-                message=(
-                    f"Processo {case.numero_processo} está sem publicação/movimentação "
-                    f"há {days_without_activity} dias (última em {case.data_ultima_movimentacao.strftime('%d/%m/%Y')})."
-                ),
-                link=f"/cases/{case.id}",
-                metadata={
-                    "alert_type": "stale_90_days",
-                    "case_id": case.id,
-                    "case_number": case.numero_processo,
-                    "days_without_activity": days_without_activity,
-                    "last_movement_date": case.data_ultima_movimentacao.isoformat(),
-                },
+            days_without_activity = (today - last_movement).days
+            pending.append(
+                Notification(
+                    owner_id=owner_id,
+                    type="process",
+                    priority="high",
+                    title=f"⚠ Processo sem movimentação há {days_without_activity} dias",
+                    message=(
+                        f"Processo {numero_processo} está sem publicação/movimentação "
+                        f"há {days_without_activity} dias (última em {last_movement.strftime('%d/%m/%Y')})."
+                    ),
+                    link=f"/cases/{case_id}",
+                    alert_type=Notification.ALERT_STALE_90_DAYS,
+                    source_kind=Notification.SOURCE_CASE,
+                    source_id=str(case_id),
+                    metadata={
+                        "alert_type": "stale_90_days",
+                        "case_id": case_id,
+                        "case_number": numero_processo,
+                        "days_without_activity": days_without_activity,
+                        "last_movement_date": last_movement.isoformat(),
+                    },
+                )
             )
-            created += 1
+            owner_ids.add(owner_id)
+            if len(pending) >= batch_size:
+                flush()
+
+        if pending:
+            flush()
+        if owner_ids:
+            invalidate_notification_stats(owner_ids)
+        # Inserções acontecem durante a varredura; o tempo delas fica só em "insert"
+        timings["scan"] = (time.perf_counter() - phase_started) * 1000 - timings["insert"]
+        timings["total"] = (time.perf_counter() - started) * 1000
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -114,3 +157,6 @@ class Command(BaseCommand):
                 f"(days>={days}, limit={limit}, dry_run={dry_run})"
             )
         )
+        self.stdout.write(
+            "timings_ms: " + " ".join(f"{phase}={value:.2f}" for phase, value in timings.items())
+        )
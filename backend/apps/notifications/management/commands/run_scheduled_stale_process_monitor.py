@@ -17,7 +17,8 @@ def _get_setting(key: str, default):
 class Command(BaseCommand):
     help = (
         "Executa o monitoramento de processos sem movimentação (90+ dias) na hora configurada. "
-        "Ideal para ser agendado em loop (ex.: a cada 5 minutos) via Task Scheduler/cron."
+        "Ideal para ser agendado em loop (ex.: a cada 5 minutos) via Task Scheduler/cron. "
+        "Preferir o agendador residente `run_scheduler`, que dispensa o polling."
     )
 
     def add_arguments(self, parser):
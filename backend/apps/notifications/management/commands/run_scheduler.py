@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notifications.models import ScheduledJobRun
+from apps.notifications.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Agendador residente: um único processo que executa os jobs do backend "
+        "(monitor de processos parados, verificação de prazos, sincronização de publicações) "
+        "nos horários configurados em LEGAL_SYSTEM_SETTINGS/SystemSetting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Executa os jobs devidos uma vez e encerra (sem loop).",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Mostra os jobs, o próximo horário devido e encerra.",
+        )
+        parser.add_argument(
+            "--history",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Mostra as N execuções mais recentes (com duração) e encerra.",
+        )
+
+    def handle(self, *args, **options):
+        if options["history"]:
+            self._print_history(options["history"])
+            return
+
+        scheduler = Scheduler()
+
+        if options["status"]:
+            scheduler.refresh_settings()
+            now = timezone.localtime(timezone.now())
+            due = scheduler.due_times(now)
+            for name in scheduler.jobs:
+                next_due = due.get(name)
+                last_run = scheduler.last_runs.get(name)
+                self.stdout.write(
+                    f"{name}: next={next_due.isoformat() if next_due else 'desativado'} "
+                    f"last={last_run.isoformat() if last_run else '-'}"
+                )
+            return
+
+        if options["once"]:
+            runs = scheduler.run_pending()
+            for run in runs:
+                self._print_run(run)
+            self.stdout.write(self.style.SUCCESS(f"run_scheduler: {len(runs)} job(s) executado(s)"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"run_scheduler: jobs={', '.join(scheduler.jobs)}"))
+        try:
+            scheduler.run_forever(on_run=self._print_run)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("run_scheduler: encerrado"))
+
+    def _print_run(self, run):
+        style = self.style.SUCCESS if run.status == ScheduledJobRun.STATUS_SUCCESS else self.style.ERROR
+        self.stdout.write(
+            style(f"[{run.started_at:%Y-%m-%d %H:%M:%S}] {run.job} {run.status} duration_ms={run.duration_ms:.2f}")
+        )
+        if run.summary:
+            self.stdout.write(f"  {run.summary}")
+
+    def _print_history(self, limit):
+        for run in ScheduledJobRun.objects.all()[:limit]:
+            self.stdout.write(
+                f"{run.started_at:%Y-%m-%d %H:%M:%S} {run.job} {run.status} duration_ms={run.duration_ms:.2f}"
+            )
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_publication_source_key(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    pending = []
+    queryset = Notification.objects.filter(type='publication', source_kind='').only('id', 'metadata')
+    for notification in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        id_api = (notification.metadata or {}).get('id_api')
+        if id_api in (None, ''):
+            continue
+        notification.source_kind = 'publication'
+        notification.source_id = str(id_api)[:64]
+        pending.append(notification)
+        if len(pending) >= BACKFILL_BATCH_SIZE:
+            Notification.objects.bulk_update(pending, ['source_kind', 'source_id'])
+            pending = []
+    if pending:
+        Notification.objects.bulk_update(pending, ['source_kind', 'source_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_systemsetting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='source_id',
+            field=models.CharField(blank=True, default='', help_text='Identificador do objeto de origem (ex.: id_api da publicação)', max_length=64, verbose_name='ID de origem'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='source_kind',
+            field=models.CharField(blank=True, default='', help_text='Tipo do objeto de origem (ex.: publication)', max_length=20, verbose_name='Origem'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['owner', 'source_kind', 'source_id'], name='notificatio_owner_i_f489e2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['source_kind', 'source_id'], name='notificatio_source__aa67a3_idx'),
+        ),
+        migrations.RunPython(backfill_publication_source_key, migrations.RunPython.noop),
+    ]
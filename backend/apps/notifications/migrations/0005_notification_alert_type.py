@@ -0,0 +1,63 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:31
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _source_key(notification):
+    metadata = notification.metadata if isinstance(notification.metadata, dict) else {}
+    if notification.type == 'publication' and metadata.get('id_api') not in (None, ''):
+        return 'publication', metadata['id_api']
+    if metadata.get('movement_id') not in (None, ''):
+        return 'movement', metadata['movement_id']
+    if metadata.get('case_id') not in (None, ''):
+        return 'case', metadata['case_id']
+    return '', ''
+
+
+def backfill_correlation_keys(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    pending = []
+    queryset = Notification.objects.filter(metadata__isnull=False).only('id', 'type', 'metadata', 'source_kind', 'source_id')
+    for notification in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        metadata = notification.metadata if isinstance(notification.metadata, dict) else {}
+        alert_type = str(metadata.get('alert_type') or '')[:40]
+        source_kind, source_id = _source_key(notification)
+        changed = False
+        if alert_type:
+            notification.alert_type = alert_type
+            changed = True
+        if source_kind and not notification.source_kind:
+            notification.source_kind = source_kind
+            notification.source_id = str(source_id)[:64]
+            changed = True
+        if not changed:
+            continue
+        pending.append(notification)
+        if len(pending) >= BACKFILL_BATCH_SIZE:
+            Notification.objects.bulk_update(pending, ['alert_type', 'source_kind', 'source_id'])
+            pending = []
+    if pending:
+        Notification.objects.bulk_update(pending, ['alert_type', 'source_kind', 'source_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_source_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='alert_type',
+            field=models.CharField(blank=True, default='', help_text='Subtipo do alerta (ex.: stale_90_days)', max_length=40, verbose_name='Tipo de alerta'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['alert_type', 'source_kind', 'source_id'], name='notificatio_alert_t_ca31aa_idx'),
+        ),
+        migrations.RunPython(backfill_correlation_keys, migrations.RunPython.noop),
+    ]
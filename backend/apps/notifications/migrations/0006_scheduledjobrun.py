@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-17 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_alert_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=60, verbose_name='Job')),
+                ('started_at', models.DateTimeField(verbose_name='Início')),
+                ('finished_at', models.DateTimeField(verbose_name='Fim')),
+                ('duration_ms', models.FloatField(default=0, verbose_name='Duração (ms)')),
+                ('status', models.CharField(choices=[('success', 'Sucesso'), ('error', 'Erro')], max_length=10, verbose_name='Status')),
+                ('summary', models.TextField(blank=True, default='', verbose_name='Resumo')),
+            ],
+            options={
+                'verbose_name': 'Execução de Job',
+                'verbose_name_plural': 'Execuções de Jobs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['job', '-started_at'], name='notificatio_job_8f885c_idx')],
+            },
+        ),
+    ]
@@ -21,6 +21,13 @@ class Notification(models.Model):
         ('system', 'Sistema'),
     ]
     
+    # Origens (source_kind) e tipos de alerta (alert_type) usados nas chaves indexadas
+    SOURCE_PUBLICATION = 'publication'
+    SOURCE_MOVEMENT = 'movement'
+    SOURCE_CASE = 'case'
+
+    ALERT_STALE_90_DAYS = 'stale_90_days'
+
     PRIORITY_LEVELS = [
         ('low', 'Baixa'),
         ('medium', 'Média'),
@@ -77,6 +84,31 @@ class Notification(models.Model):
         verbose_name='Metadados',
         help_text='Dados adicionais (JSON)'
     )
+
+    # Chave de correlação indexada (evita consultas em metadata JSON)
+    source_kind = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        verbose_name='Origem',
+        help_text='Tipo do objeto de origem (ex.: publication)'
+    )
+
+    source_id = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='ID de origem',
+        help_text='Identificador do objeto de origem (ex.: id_api da publicação)'
+    )
+
+    alert_type = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        verbose_name='Tipo de alerta',
+        help_text='Subtipo do alerta (ex.: stale_90_days)'
+    )
     
     # Status
     read = models.BooleanField(
@@ -110,6 +142,9 @@ class Notification(models.Model):
             models.Index(fields=['read']),
             models.Index(fields=['type']),
             models.Index(fields=['owner', 'read']),
+            models.Index(fields=['owner', 'source_kind', 'source_id']),
+            models.Index(fields=['source_kind', 'source_id']),
+            models.Index(fields=['alert_type', 'source_kind', 'source_id']),
         ]
     
     def __str__(self):
@@ -146,3 +181,33 @@ class SystemSetting(models.Model):
 
     def __str__(self):
         return self.key
+
+
+class ScheduledJobRun(models.Model):
+    """Histórico de execuções dos jobs do agendador residente (`run_scheduler`)."""
+
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+
+    STATUS_CHOICES = [
+        (STATUS_SUCCESS, 'Sucesso'),
+        (STATUS_ERROR, 'Erro'),
+    ]
+
+    job = models.CharField(max_length=60, verbose_name='Job')
+    started_at = models.DateTimeField(verbose_name='Início')
+    finished_at = models.DateTimeField(verbose_name='Fim')
+    duration_ms = models.FloatField(default=0, verbose_name='Duração (ms)')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, verbose_name='Status')
+    summary = models.TextField(blank=True, default='', verbose_name='Resumo')
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Execução de Job'
+        verbose_name_plural = 'Execuções de Jobs'
+        indexes = [
+            models.Index(fields=['job', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.job} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})'
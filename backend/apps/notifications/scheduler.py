@@ -0,0 +1,318 @@
+"""
+Agendador residente (`manage.py run_scheduler`).
+
+Um único processo de longa duração substitui o cron que relançava
+`run_scheduled_stale_process_monitor` a cada 5 minutos: os jobs ficam
+registrados em memória, o processo dorme até o próximo horário devido e relê
+as configurações (`LEGAL_SYSTEM_SETTINGS` + overrides em `SystemSetting`, uma
+consulta) a cada despertar — no máximo a cada `SETTINGS_REFRESH_SECONDS`, para
+que mudanças feitas pela API valham sem reiniciar o processo.
+
+Cada execução é gravada em `ScheduledJobRun` (status, duração e resumo).
+Falhas fora dos jobs (ex.: queda do banco ao reler as configurações) não
+derrubam o processo: o loop registra o erro, espera e tenta de novo. As
+conexões velhas ou quebradas são descartadas a cada despertar, como faz o
+ciclo de requisição do Django.
+"""
+from __future__ import annotations
+
+import logging
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from io import StringIO
+from typing import Callable
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ScheduledJobRun, SystemSetting
+
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_REFRESH_SECONDS = 60
+
+# Espera após uma falha do próprio loop (ex.: banco fora do ar): dobra a cada
+# falha seguida, até o máximo
+ERROR_BACKOFF_SECONDS = 5
+ERROR_BACKOFF_MAX_SECONDS = 300
+
+# Job que falhou volta a rodar após esta espera (dobra a cada falha seguida,
+# até o máximo), sem esperar o próximo intervalo/dia
+JOB_RETRY_SECONDS = 300
+JOB_RETRY_MAX_SECONDS = 3600
+
+# Tamanho máximo de cada erro no resumo gravado (o traceback completo vai para o log)
+SUMMARY_ERROR_MAX_CHARS = 300
+
+STALE_MONITOR_LAST_RUN_KEY = 'STALE_PROCESS_MONITOR_LAST_RUN'
+
+
+def load_settings() -> dict:
+    """Configurações vigentes: padrões do settings.py + overrides persistidos."""
+    merged = dict(getattr(settings, 'LEGAL_SYSTEM_SETTINGS', {}) or {})
+    merged.update(dict(SystemSetting.objects.values_list('key', 'value')))
+    return merged
+
+
+def _parse_hhmm(value, default=(9, 0)):
+    try:
+        text = str(value)
+        return int(text[0:2]), int(text[3:5])
+    except (TypeError, ValueError):
+        return default
+
+
+def _positive_int(value, default):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    return number if number > 0 else default
+
+
+def _error_summary(exc):
+    """Última linha do traceback ('Tipo: mensagem'), truncada."""
+    message = traceback.format_exception_only(type(exc), exc)[-1].strip()
+    if len(message) > SUMMARY_ERROR_MAX_CHARS:
+        message = message[:SUMMARY_ERROR_MAX_CHARS - 3] + '...'
+    return message
+
+
+@dataclass
+class Job:
+    """
+    Job registrado no agendador.
+
+    `next_due(now, config, last_run)` devolve o próximo datetime devido (ou None
+    se o job estiver desativado); `run(now, config)` executa e devolve um resumo.
+    """
+    name: str
+    next_due: Callable[[datetime, dict, datetime | None], datetime | None]
+    run: Callable[[datetime, dict], str]
+
+
+def daily_at(enabled_key: str, time_key: str, default_time: str = '09:00', last_run_key: str | None = None):
+    """Uma vez por dia, a partir do horário HH:MM configurado."""
+    def next_due(now, config, last_run):
+        if not config.get(enabled_key):
+            return None
+        hour, minute = _parse_hhmm(config.get(time_key) or default_time)
+        due_today = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        last_run_date = timezone.localtime(last_run).date() if last_run else None
+        # Compatível com o comando legado (cron), que grava a data da última execução
+        if last_run_key and isinstance(config.get(last_run_key), str):
+            try:
+                legacy = date.fromisoformat(config[last_run_key])
+                last_run_date = max(filter(None, [last_run_date, legacy]))
+            except ValueError:
+                pass
+        if last_run_date == now.date():
+            return due_today + timedelta(days=1)
+        return due_today
+    return next_due
+
+
+def every(enabled_key: str, interval_key: str, default_minutes: int):
+    """A cada N minutos (contados da última execução)."""
+    def next_due(now, config, last_run):
+        if not config.get(enabled_key):
+            return None
+        if last_run is None:
+            return now
+        return last_run + timedelta(minutes=_positive_int(config.get(interval_key), default_minutes))
+    return next_due
+
+
+def run_stale_monitor(now, config):
+    out = StringIO()
+    call_command(
+        'create_stale_90d_notifications',
+        days=_positive_int(config.get('STALE_PROCESS_DAYS_THRESHOLD'), 90),
+        limit=0,
+        stdout=out,
+    )
+    SystemSetting.objects.update_or_create(
+        key=STALE_MONITOR_LAST_RUN_KEY,
+        defaults={'value': timezone.localtime(now).date().isoformat()},
+    )
+    return out.getvalue().strip()
+
+
+def run_deadline_check(now, config):
+    from .deadlines import scan_deadlines
+
+    result = scan_deadlines(today=timezone.localtime(now).date())
+    return f"checked={result['checked']} created={result['created']} skipped={result['skipped']}"
+
+
+def run_publication_sync(now, config):
+    """Publicações do dia para cada advogado ativo com nome/OAB configurados."""
+    from django.contrib.auth import get_user_model
+    from apps.publications.views import sync_today_publications
+
+    users = (
+        get_user_model().objects.filter(
+            is_active=True,
+            profile__is_active=True,
+        )
+        .exclude(profile__role='MASTER')
+        .exclude(profile__oab_number__isnull=True)
+        .exclude(profile__oab_number='')
+        .exclude(profile__full_name_oab__isnull=True)
+        .exclude(profile__full_name_oab='')
+        .select_related('profile')
+    )
+    synced = 0
+    novas = 0
+    failures = []
+    for user in users:
+        try:
+            result = sync_today_publications(user, enrich=False, record_history=False)
+        except Exception as exc:
+            logger.exception('publication sync failed for user %s', user.username)
+            failures.append(f'user_id={user.pk}: {_error_summary(exc)}')
+            continue
+        synced += 1
+        novas += result.get('total_novas_salvas', 0)
+        if not result.get('success'):
+            error = result.get('error', 'falha na busca')
+            logger.warning('publication sync failed for user %s: %s', user.username, error)
+            failures.append(f'user_id={user.pk}: {str(error)[:SUMMARY_ERROR_MAX_CHARS]}')
+    summary = f'users={synced} novas={novas}'
+    if failures:
+        summary += ' erros=' + '; '.join(failures)
+    return summary
+
+
+DEFAULT_JOBS = (
+    Job(
+        name='stale_process_monitor',
+        next_due=daily_at(
+            'STALE_PROCESS_MONITOR_ENABLED',
+            'STALE_PROCESS_MONITOR_TIME',
+            last_run_key=STALE_MONITOR_LAST_RUN_KEY,
+        ),
+        run=run_stale_monitor,
+    ),
+    Job(
+        name='deadline_check',
+        next_due=every('DEADLINE_AUTO_CHECK_ENABLED', 'DEADLINE_CHECK_INTERVAL_MINUTES', 60),
+        run=run_deadline_check,
+    ),
+    Job(
+        name='publication_sync',
+        next_due=every('PUBLICATION_AUTO_SYNC_ENABLED', 'PUBLICATION_AUTO_SYNC_INTERVAL_MINUTES', 120),
+        run=run_publication_sync,
+    ),
+)
+
+
+class Scheduler:
+    """Loop do agendador; `clock`/`sleep` injetáveis para testes."""
+
+    def __init__(self, jobs=DEFAULT_JOBS, clock=None, sleep=time.sleep, refresh_seconds=SETTINGS_REFRESH_SECONDS):
+        self.jobs = {job.name: job for job in jobs}
+        self.clock = clock or (lambda: timezone.localtime(timezone.now()))
+        self.sleep = sleep
+        self.refresh_seconds = refresh_seconds
+        self.config = {}
+        # Última execução bem-sucedida de cada job: histórico no banco, depois
+        # mantida em memória
+        self.last_runs = dict(
+            ScheduledJobRun.objects.filter(job__in=self.jobs, status=ScheduledJobRun.STATUS_SUCCESS)
+            .values('job')
+            .annotate(last=Max('started_at'))
+            .values_list('job', 'last')
+        )
+        # job -> (falhas seguidas, início da última falha)
+        self.failures = {}
+
+    def refresh_settings(self):
+        self.config = load_settings()
+
+    def due_times(self, now):
+        due = {}
+        for name, job in self.jobs.items():
+            next_due = job.next_due(now, self.config, self.last_runs.get(name))
+            if next_due is None:
+                continue
+            if name in self.failures:
+                failures, failed_at = self.failures[name]
+                retry = min(JOB_RETRY_SECONDS * 2 ** (failures - 1), JOB_RETRY_MAX_SECONDS)
+                next_due = max(next_due, failed_at + timedelta(seconds=retry))
+            due[name] = next_due
+        return due
+
+    def run_job(self, name, now=None):
+        job = self.jobs[name]
+        started_at = now or self.clock()
+        started = time.perf_counter()
+        try:
+            summary = job.run(started_at, self.config) or ''
+            run_status = ScheduledJobRun.STATUS_SUCCESS
+        except Exception as exc:
+            logger.exception('scheduler job %s failed', name)
+            summary = _error_summary(exc)
+            run_status = ScheduledJobRun.STATUS_ERROR
+        duration_ms = (time.perf_counter() - started) * 1000
+        # Só o sucesso conta como executado; a falha é repetida após JOB_RETRY_SECONDS
+        if run_status == ScheduledJobRun.STATUS_SUCCESS:
+            self.last_runs[name] = started_at
+            self.failures.pop(name, None)
+        else:
+            self.failures[name] = (self.failures.get(name, (0, None))[0] + 1, started_at)
+        return ScheduledJobRun.objects.create(
+            job=name,
+            started_at=started_at,
+            finished_at=started_at + timedelta(milliseconds=duration_ms),
+            duration_ms=round(duration_ms, 2),
+            status=run_status,
+            summary=summary,
+        )
+
+    def run_pending(self):
+        """Relê as configurações e executa os jobs devidos; devolve as execuções."""
+        self.refresh_settings()
+        now = self.clock()
+        runs = [self.run_job(name, now) for name, due in self.due_times(now).items() if due <= now]
+        return runs
+
+    def seconds_until_next(self):
+        now = self.clock()
+        due = self.due_times(now).values()
+        wait = min([(moment - now).total_seconds() for moment in due] + [self.refresh_seconds])
+        return max(0.0, wait)
+
+    def run_forever(self, max_iterations=None, on_run=None):
+        iterations = 0
+        failures = 0
+        while max_iterations is None or iterations < max_iterations:
+            close_old_connections()
+            try:
+                for run in self.run_pending():
+                    if on_run:
+                        on_run(run)
+                wait = None
+                failures = 0
+            except Exception:
+                failures += 1
+                wait = min(ERROR_BACKOFF_SECONDS * 2 ** (failures - 1), ERROR_BACKOFF_MAX_SECONDS)
+                logger.exception('scheduler loop failed (%s in a row); retrying in %ss', failures, wait)
+            finally:
+                close_old_connections()
+            iterations += 1
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if wait is None:
+                try:
+                    wait = self.seconds_until_next()
+                except Exception:
+                    logger.exception('scheduler could not compute next wake-up')
+                    wait = self.refresh_seconds
+            self.sleep(wait)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Notification, ScheduledJobRun
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -44,10 +44,44 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
 
 
 class NotificationMarkReadSerializer(serializers.Serializer):
-    """Serializer para marcar notificações como lidas."""
+    """Serializer para marcar notificações como lidas (por IDs e/ou filtros)."""
     
     notification_ids = serializers.ListField(
         child=serializers.IntegerField(),
         required=False,
         help_text='IDs das notificações a marcar (vazio = todas)'
     )
+    type = serializers.ChoiceField(
+        choices=Notification.NOTIFICATION_TYPES,
+        required=False,
+        help_text='Marca apenas notificações deste tipo'
+    )
+    priority = serializers.ChoiceField(
+        choices=Notification.PRIORITY_LEVELS,
+        required=False,
+        help_text='Marca apenas notificações desta prioridade'
+    )
+    created_from = serializers.DateField(
+        required=False,
+        help_text='Criadas a partir desta data (inclusive)'
+    )
+    created_to = serializers.DateField(
+        required=False,
+        help_text='Criadas até esta data (inclusive)'
+    )
+
+    def validate(self, attrs):
+        created_from = attrs.get('created_from')
+        created_to = attrs.get('created_to')
+        if created_from and created_to and created_from > created_to:
+            raise serializers.ValidationError({'created_to': 'Data final anterior à data inicial.'})
+        return attrs
+
+
+class ScheduledJobRunSerializer(serializers.ModelSerializer):
+    """Execução de job do agendador residente (run_scheduler)."""
+
+    class Meta:
+        model = ScheduledJobRun
+        fields = ['id', 'job', 'started_at', 'finished_at', 'duration_ms', 'status', 'summary']
+        read_only_fields = fields
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .stats import invalidate_notification_stats
+
+
+@receiver(post_save, sender=Notification)
+def invalidate_stats_on_save(sender, instance, raw=False, **kwargs):
+    # create()/save()/mark_as_read(); bulk_create/update/delete invalidam explicitamente
+    if raw:
+        return
+    invalidate_notification_stats([instance.owner_id])
@@ -0,0 +1,86 @@
+"""
+Estatísticas de notificações (badge do frontend, consultado por polling).
+
+Uma única consulta agregada por (type, priority) e cache curto por dono.
+O cache é versionado: gravações chamam `invalidate_notification_stats`
+(save() via signal; bulk_create/update/delete explicitamente), o que troca a
+chave sem precisar apagar entradas. Notificações sem dono aparecem no escopo
+de todos os usuários, por isso invalidam a versão global.
+
+Os comandos e o agendador também gravam notificações: para a invalidação
+valer em todos os processos, use um cache compartilhado (CACHE_BACKEND=file
+ou redis); com o padrão por processo, o TTL curto limita a defasagem.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from utils.cache import bump_cache_version, get_cache_versions
+
+
+STATS_CACHE_TTL_SECONDS = 30
+
+_CACHE_PREFIX = 'notifications:stats'
+_GLOBAL_VERSION_KEY = f'{_CACHE_PREFIX}:version:global'
+
+
+def compute_notification_stats(queryset):
+    """Mesmo payload de NotificationViewSet.stats, em uma consulta."""
+    rows = (
+        queryset.order_by()
+        .values('type', 'priority')
+        .annotate(total=Count('id'), unread=Count('id', filter=Q(read=False)))
+    )
+    total = 0
+    unread = 0
+    by_type = {}
+    by_priority = {}
+    for row in rows:
+        total += row['total']
+        if not row['unread']:
+            continue
+        unread += row['unread']
+        by_type[row['type']] = by_type.get(row['type'], 0) + row['unread']
+        by_priority[row['priority']] = by_priority.get(row['priority'], 0) + row['unread']
+    return {
+        'total': total,
+        'unread': unread,
+        'read': total - unread,
+        'by_type': by_type,
+        'by_priority': by_priority,
+    }
+
+
+def _owner_version_key(owner_id):
+    return f'{_CACHE_PREFIX}:version:owner:{owner_id}'
+
+
+def get_owner_notification_stats(owner, queryset):
+    """Estatísticas do escopo "do dono + sem dono", com cache por dono."""
+    versions = get_cache_versions([_GLOBAL_VERSION_KEY, _owner_version_key(owner.id)])
+    key = (
+        f'{_CACHE_PREFIX}:{owner.id}:'
+        f'{versions[_GLOBAL_VERSION_KEY]}:{versions[_owner_version_key(owner.id)]}'
+    )
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_notification_stats(queryset)
+        cache.set(key, stats, STATS_CACHE_TTL_SECONDS)
+    return stats
+
+
+def invalidate_notification_stats(owner_ids=None):
+    """
+    Descarta o cache de estatísticas.
+
+    Args:
+        owner_ids: donos afetados; None (ou um dono None entre eles) invalida todos.
+    """
+    if owner_ids is None:
+        bump_cache_version(_GLOBAL_VERSION_KEY)
+        return
+    owner_ids = set(owner_ids)
+    if None in owner_ids:
+        bump_cache_version(_GLOBAL_VERSION_KEY)
+        return
+    for owner_id in owner_ids:
+        bump_cache_version(_owner_version_key(owner_id))
@@ -1,8 +1,20 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from apps.notifications.models import Notification
+from apps.cases.models import Case, CaseMovement
+from apps.notifications.models import Notification, ScheduledJobRun, SystemSetting
+from apps.notifications.scheduler import ERROR_BACKOFF_SECONDS, JOB_RETRY_SECONDS, Job, Scheduler, every, run_publication_sync
+from apps.publications.models import SearchHistory
 
 
 User = get_user_model()
@@ -121,4 +133,368 @@ class NotificationMasterScopeAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         returned_ids = {item['id'] for item in response.data['notifications']}
         self.assertIn(self.user_a_unread.id, returned_ids)
-        self.assertNotIn(self.master_unread.id, returned_ids)
\ No newline at end of file
+        self.assertNotIn(self.master_unread.id, returned_ids)
+
+
+class NotificationCorrelationKeyTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='notif_corr_user', password='testpass123')
+        self.case = Case.objects.create(
+            owner=self.user,
+            numero_processo='1000000-00.2025.8.26.0100',
+            tribunal='TJSP',
+            status='ATIVO',
+            data_ultima_movimentacao=timezone.now().date() - timedelta(days=120),
+        )
+
+    def test_stale_command_dedupes_by_indexed_keys(self):
+        call_command('create_stale_90d_notifications', stdout=StringIO())
+        call_command('create_stale_90d_notifications', stdout=StringIO())
+
+        notifications = Notification.objects.filter(owner=self.user, type='process')
+        self.assertEqual(notifications.count(), 1)
+        notification = notifications.get()
+        self.assertEqual(notification.alert_type, Notification.ALERT_STALE_90_DAYS)
+        self.assertEqual(notification.source_kind, Notification.SOURCE_CASE)
+        self.assertEqual(notification.source_id, str(self.case.id))
+
+
+class NotificationStatsCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='notif_stats_user', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        for priority in ('high', 'high', 'urgent'):
+            Notification.objects.create(
+                owner=self.user,
+                type='deadline',
+                priority=priority,
+                title='Prazo',
+                message='Mensagem',
+            )
+        self.read_notification = Notification.objects.create(
+            owner=self.user,
+            type='publication',
+            title='Lida',
+            message='Mensagem',
+            read=True,
+        )
+
+    def test_stats_single_query_cached_and_invalidated(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data, {
+            'total': 4,
+            'unread': 3,
+            'read': 1,
+            'by_type': {'deadline': 3},
+            'by_priority': {'high': 2, 'urgent': 1},
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/stats/')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['unread'], 3)
+
+        # Criação (mesmo sem dono) e leitura invalidam o cache
+        Notification.objects.create(owner=None, type='system', title='Sistema', message='Mensagem')
+        self.assertEqual(self.client.get('/api/notifications/stats/').data['unread'], 4)
+
+        Notification.objects.filter(owner=self.user, priority='urgent').get().mark_as_read()
+        response = self.client.get('/api/notifications/stats/')
+        self.assertEqual(response.data['unread'], 3)
+        self.assertEqual(response.data['by_priority'], {'high': 2, 'medium': 1})
+
+
+class NotificationBulkMarkReadTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='notif_bulk_user', password='testpass123')
+        self.other_user = User.objects.create_user(username='notif_bulk_other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+        self.deadlines = [
+            Notification.objects.create(owner=self.user, type='deadline', priority='urgent', title=f'Prazo {i}', message='M')
+            for i in range(3)
+        ]
+        self.publication = Notification.objects.create(owner=self.user, type='publication', priority='medium', title='Pub', message='M')
+        self.old_deadline = Notification.objects.create(owner=self.user, type='deadline', priority='urgent', title='Antigo', message='M')
+        Notification.objects.filter(id=self.old_deadline.id).update(created_at=timezone.now() - timedelta(days=30))
+        self.other = Notification.objects.create(owner=self.other_user, type='deadline', priority='urgent', title='Outro', message='M')
+
+    def test_mark_read_by_filter_is_one_update(self):
+        today = timezone.now().date()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/notifications/mark_read/', {
+                'type': 'deadline',
+                'priority': 'urgent',
+                'created_from': (today - timedelta(days=7)).isoformat(),
+                'created_to': today.isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marked'], 3)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+        for notification in self.deadlines:
+            notification.refresh_from_db()
+            self.assertTrue(notification.read)
+            self.assertIsNotNone(notification.read_at)
+        self.assertFalse(Notification.objects.get(id=self.old_deadline.id).read)
+        self.assertFalse(Notification.objects.get(id=self.publication.id).read)
+        self.assertFalse(Notification.objects.get(id=self.other.id).read)
+
+    def test_mark_read_by_ids_and_mark_all_read(self):
+        response = self.client.post('/api/notifications/mark_read/', {
+            'notification_ids': [self.publication.id, self.other.id],
+        }, format='json')
+        self.assertEqual(response.data['marked'], 1)
+
+        response = self.client.post('/api/notifications/mark_all_read/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marked'], 4)
+        self.assertFalse(Notification.objects.filter(owner=self.user, read=False).exists())
+        self.assertFalse(Notification.objects.get(id=self.other.id).read)
+
+        response = self.client.post('/api/notifications/mark_read/', {
+            'created_from': '2026-03-10',
+            'created_to': '2026-03-01',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DeadlineScanTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='notif_deadline_user', password='testpass123')
+        self.other_user = User.objects.create_user(username='notif_deadline_other', password='testpass123')
+        today = timezone.now().date()
+        self.movements = []
+        for owner in (self.user, self.other_user):
+            case = Case.objects.create(
+                owner=owner,
+                numero_processo=f'100000{owner.id}-00.2025.8.26.0100',
+                tribunal='TJSP',
+                status='ATIVO',
+            )
+            for prazo in (1, 5, 10):
+                self.movements.append(CaseMovement.objects.create(
+                    case=case,
+                    data=today,
+                    tipo='INTIMACAO',
+                    titulo=f'Prazo de {prazo} dias',
+                    prazo=prazo,
+                    origem='MANUAL',
+                ))
+            # Fora da janela de 15 dias
+            CaseMovement.objects.create(case=case, data=today, tipo='DESPACHO', titulo='Longe', prazo=30, origem='MANUAL')
+
+    def test_command_scans_all_owners_and_dedupes(self):
+        out = StringIO()
+        call_command('check_deadlines', '--dry-run', stdout=out)
+        self.assertIn('checked=6 created=6 skipped=0', out.getvalue())
+        self.assertFalse(Notification.objects.filter(type='deadline').exists())
+
+        call_command('check_deadlines', stdout=StringIO())
+        self.assertEqual(Notification.objects.filter(type='deadline', owner=self.user).count(), 3)
+        self.assertEqual(Notification.objects.filter(type='deadline', owner=self.other_user).count(), 3)
+
+        out = StringIO()
+        call_command('check_deadlines', stdout=out)
+        self.assertIn('checked=6 created=0 skipped=6', out.getvalue())
+
+    def test_api_scan_is_scoped_and_query_count_is_constant(self):
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/notifications/check_deadlines/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['checked'], 3)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([item['priority'] for item in response.data['notifications']], ['urgent', 'high', 'medium'])
+        self.assertFalse(Notification.objects.filter(owner=self.other_user).exists())
+        # count + anti-join + INSERT, independente do número de prazos
+        self.assertLessEqual(len(queries), 4)
+
+        notification = Notification.objects.get(source_kind=Notification.SOURCE_MOVEMENT, source_id=str(self.movements[0].id))
+        self.assertEqual(notification.title, '⏰ Prazo vence AMANHÃ')
+        self.assertEqual(notification.metadata['movement_id'], self.movements[0].id)
+
+        response = self.client.post('/api/notifications/check_deadlines/')
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['skipped'], 3)
+
+
+class StaleProcessMonitorBatchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='notif_stale_user', password='testpass123')
+        today = timezone.localdate()
+        self.cases = [
+            Case.objects.create(
+                owner=self.user,
+                numero_processo=f'200000{index}-00.2025.8.26.0100',
+                tribunal='TJSP',
+                status='ATIVO',
+                data_ultima_movimentacao=today - timedelta(days=200 - index),
+            )
+            for index in range(5)
+        ]
+        Case.objects.create(
+            owner=self.user,
+            numero_processo='2999999-00.2025.8.26.0100',
+            tribunal='TJSP',
+            status='ATIVO',
+            data_ultima_movimentacao=today - timedelta(days=10),
+        )
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command('create_stale_90d_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_limit_dry_run_and_daily_dedup(self):
+        output = self._run('--dry-run')
+        self.assertIn('candidates=5 created=5 skipped=0', output)
+        self.assertIn('timings_ms: alerted=', output)
+        self.assertFalse(Notification.objects.exists())
+
+        output = self._run('--limit', '2')
+        self.assertIn('candidates=2 created=2 skipped=0', output)
+        alerted = set(Notification.objects.values_list('source_id', flat=True))
+        self.assertEqual(alerted, {str(self.cases[0].id), str(self.cases[1].id)})
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self._run('--batch-size', '2')
+        self.assertIn('candidates=5 created=3 skipped=2', output)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(Notification.objects.filter(alert_type=Notification.ALERT_STALE_90_DAYS).count(), 5)
+
+        notification = Notification.objects.get(source_id=str(self.cases[4].id))
+        self.assertEqual(notification.owner, self.user)
+        self.assertEqual(notification.metadata['days_without_activity'], 196)
+
+
+class ResidentSchedulerTest(APITestCase):
+    def setUp(self):
+        self.now = timezone.localtime(timezone.now()).replace(hour=8, minute=0, second=0, microsecond=0)
+        SystemSetting.objects.create(key='STALE_PROCESS_MONITOR_ENABLED', value=True)
+        SystemSetting.objects.create(key='STALE_PROCESS_MONITOR_TIME', value='09:00')
+        self.sleeps = []
+        self.scheduler = Scheduler(clock=lambda: self.now, sleep=self.sleeps.append)
+
+    def _run_pending(self, **clock):
+        self.now = self.now.replace(**clock)
+        return [run.job for run in self.scheduler.run_pending()]
+
+    def test_runs_due_jobs_and_applies_setting_changes(self):
+        # Verificação de prazos em background só com opt-in (AUTO_CHECK_DEADLINES é do frontend)
+        self.assertEqual(self._run_pending(), [])
+        SystemSetting.objects.create(key='DEADLINE_AUTO_CHECK_ENABLED', value=True)
+        self.assertEqual(self._run_pending(), ['deadline_check'])
+        # Próximo despertar: o refresh de configurações (60s) vem antes das 09:00
+        self.assertEqual(self.scheduler.seconds_until_next(), 60)
+
+        self.assertEqual(self._run_pending(hour=9, minute=5), ['stale_process_monitor', 'deadline_check'])
+        self.assertEqual(SystemSetting.objects.get(key='STALE_PROCESS_MONITOR_LAST_RUN').value, self.now.date().isoformat())
+        self.assertEqual(self._run_pending(minute=10), [])
+
+        # Mudança feita pela API vale no próximo despertar, sem reiniciar o processo
+        SystemSetting.objects.create(key='DEADLINE_CHECK_INTERVAL_MINUTES', value=1)
+        self.assertEqual(self._run_pending(minute=10), ['deadline_check'])
+
+        runs = ScheduledJobRun.objects.all()
+        self.assertEqual(runs.count(), 4)
+        self.assertTrue(all(run.status == ScheduledJobRun.STATUS_SUCCESS for run in runs))
+        self.assertIn('create_stale_90d_notifications', runs.filter(job='stale_process_monitor').get().summary)
+
+        # Histórico persiste entre reinícios do processo
+        restarted = Scheduler(clock=lambda: self.now, sleep=self.sleeps.append)
+        self.assertEqual(restarted.last_runs['deadline_check'], self.now)
+
+        # Histórico só para MASTER
+        response = self.client.get('/api/notifications/scheduler_runs/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        lawyer = User.objects.create_user(username='notif_scheduler_lawyer', password='testpass123')
+        self.client.force_authenticate(user=lawyer)
+        response = self.client.get('/api/notifications/scheduler_runs/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        master = User.objects.create_user(username='notif_scheduler_master', password='testpass123')
+        master.profile.role = 'MASTER'
+        master.profile.save()
+        self.client.force_authenticate(user=master)
+        response = self.client.get('/api/notifications/scheduler_runs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['jobs']['deadline_check']['runs'], 3)
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_failing_job_is_recorded_and_retried_after_backoff(self):
+        outcomes = [RuntimeError('boom'), RuntimeError('boom'), None]
+
+        def flaky(now, config):
+            outcome = outcomes.pop(0)
+            if outcome:
+                raise outcome
+            return 'ok'
+
+        SystemSetting.objects.create(key='DEADLINE_AUTO_CHECK_ENABLED', value=True)
+        jobs = [Job(name='flaky', next_due=every('DEADLINE_AUTO_CHECK_ENABLED', 'DEADLINE_CHECK_INTERVAL_MINUTES', 60), run=flaky)]
+        scheduler = Scheduler(jobs=jobs, clock=lambda: self.now, sleep=self.sleeps.append, refresh_seconds=3600)
+        with self.assertLogs('apps.notifications.scheduler', level='ERROR') as logs:
+            scheduler.run_forever(max_iterations=2)
+        self.assertIn('Traceback', logs.output[0])
+
+        run = ScheduledJobRun.objects.get(job='flaky')
+        self.assertEqual(run.status, ScheduledJobRun.STATUS_ERROR)
+        # Resumo guarda só 'Tipo: mensagem'; o traceback completo fica no log
+        self.assertEqual(run.summary, 'RuntimeError: boom')
+        # Falha não conta como execução: repete após o backoff, não no próximo intervalo
+        self.assertNotIn('flaky', scheduler.last_runs)
+        self.assertEqual(self.sleeps, [float(JOB_RETRY_SECONDS)])
+
+        self.now += timedelta(seconds=JOB_RETRY_SECONDS)
+        with self.assertLogs('apps.notifications.scheduler', level='ERROR'):
+            self.assertEqual([run.status for run in scheduler.run_pending()], [ScheduledJobRun.STATUS_ERROR])
+        self.assertEqual(scheduler.seconds_until_next(), 2 * JOB_RETRY_SECONDS)
+
+        self.now += timedelta(seconds=2 * JOB_RETRY_SECONDS)
+        self.assertEqual([run.summary for run in scheduler.run_pending()], ['ok'])
+        self.assertEqual(scheduler.last_runs['flaky'], self.now)
+        self.assertEqual(scheduler.seconds_until_next(), 3600)
+
+    def test_loop_survives_failure_outside_jobs(self):
+        SystemSetting.objects.create(key='DEADLINE_AUTO_CHECK_ENABLED', value=True)
+        scheduler = Scheduler(clock=lambda: self.now, sleep=self.sleeps.append)
+        refresh = scheduler.refresh_settings
+        calls = []
+
+        def flaky_refresh():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('server closed the connection unexpectedly')
+            refresh()
+
+        scheduler.refresh_settings = flaky_refresh
+        with self.assertLogs('apps.notifications.scheduler', level='ERROR'):
+            scheduler.run_forever(max_iterations=2)
+
+        # Primeira volta falhou e esperou o backoff; a segunda executou os jobs
+        self.assertEqual(self.sleeps, [ERROR_BACKOFF_SECONDS])
+        self.assertEqual(list(ScheduledJobRun.objects.values_list('job', flat=True)), ['deadline_check'])
+
+    @patch('apps.publications.views.PJeComunicaService.fetch_publications')
+    def test_publication_sync_does_not_record_search_history(self, mock_fetch):
+        mock_fetch.return_value = {'success': True, 'total_publicacoes': 0, 'publicacoes': [], 'erros': None}
+        lawyer = User.objects.create_user(username='notif_sync_lawyer', password='testpass123')
+        lawyer.profile.full_name_oab = 'Advogada Teste'
+        lawyer.profile.oab_number = '123456'
+        lawyer.profile.save()
+
+        summary = run_publication_sync(self.now, {})
+
+        self.assertEqual(summary, 'users=1 novas=0')
+        self.assertTrue(mock_fetch.called)
+        # A "última busca" do usuário continua sendo a última busca manual
+        self.assertFalse(SearchHistory.objects.exists())
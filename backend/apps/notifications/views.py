@@ -2,8 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Q
+from django.db.models import Avg, Count, Max, Q
 from apps.accounts.permissions import is_master_user
 from django.contrib.auth import get_user_model
 from apps.accounts.scope import (
@@ -12,11 +11,18 @@ from apps.accounts.scope import (
     build_owner_scope_q,
     get_master_scope_user,
 )
-from .models import Notification
+from .deadlines import movements_in_window, scan_deadlines
+from .models import Notification, ScheduledJobRun
+from .stats import (
+    compute_notification_stats,
+    get_owner_notification_stats,
+    invalidate_notification_stats,
+)
 from .serializers import (
     NotificationSerializer,
     NotificationCreateSerializer,
-    NotificationMarkReadSerializer
+    NotificationMarkReadSerializer,
+    ScheduledJobRunSerializer,
 )
 
 
@@ -34,9 +40,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     - POST /api/notifications/ - Criar notificação
     - PATCH /api/notifications/{id}/ - Atualizar notificação
     - DELETE /api/notifications/{id}/ - Deletar notificação
-    - POST /api/notifications/mark_read/ - Marcar como lidas
+    - POST /api/notifications/mark_read/ - Marcar como lidas (IDs e/ou filtros)
     - POST /api/notifications/mark_all_read/ - Marcar todas como lidas
     - POST /api/notifications/{id}/toggle_read/ - Toggle lida/não lida
+    - GET /api/notifications/scheduler_runs/ - Histórico do agendador (run_scheduler)
     """
     
     queryset = Notification.objects.all()
@@ -68,6 +75,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return NotificationCreateSerializer
         return NotificationSerializer
 
+    def perform_destroy(self, instance):
+        owner_id = instance.owner_id
+        instance.delete()
+        invalidate_notification_stats([owner_id])
+
     def perform_create(self, serializer):
         user = self.request.user
         if user.is_authenticated:
@@ -85,54 +97,66 @@ class NotificationViewSet(viewsets.ModelViewSet):
             'notifications': serializer.data
         })
     
+    def _stats_cache_owner(self):
+        """Dono cujo escopo é "próprias + sem dono" (cacheável), ou None (sem cache)."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return None
+        scope_user = get_master_scope_user(self.request, UserModel)
+        if scope_user is not None:
+            return scope_user
+        if is_master_user(user) and self.request.query_params.get('team_scope') == 'all':
+            return None
+        return user
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Retorna estatísticas de notificações."""
+        """Retorna estatísticas de notificações (uma consulta agregada, cache curto por dono)."""
         queryset = self._scoped_queryset()
-        total = queryset.count()
-        unread = queryset.filter(read=False).count()
-        
-        by_type = {}
-        for notification in queryset.filter(read=False):
-            type_key = notification.type
-            if type_key not in by_type:
-                by_type[type_key] = 0
-            by_type[type_key] += 1
-        
-        by_priority = {}
-        for notification in queryset.filter(read=False):
-            priority_key = notification.priority
-            if priority_key not in by_priority:
-                by_priority[priority_key] = 0
-            by_priority[priority_key] += 1
-        
-        return Response({
-            'total': total,
-            'unread': unread,
-            'read': total - unread,
-            'by_type': by_type,
-            'by_priority': by_priority,
-        })
+        owner = self._stats_cache_owner()
+        if owner is None:
+            return Response(compute_notification_stats(queryset))
+        return Response(get_owner_notification_stats(owner, queryset))
     
+    def _mark_queryset_read(self, queryset):
+        """Marca como lidas em um único UPDATE; retorna a quantidade afetada."""
+        queryset = queryset.filter(read=False)
+        owner_ids = set(queryset.order_by().values_list('owner_id', flat=True).distinct())
+        if not owner_ids:
+            return 0
+        count = queryset.update(read=True, read_at=timezone.now())
+        invalidate_notification_stats(owner_ids)
+        return count
+
+    @staticmethod
+    def _apply_mark_read_filters(queryset, filters):
+        if filters.get('type'):
+            queryset = queryset.filter(type=filters['type'])
+        if filters.get('priority'):
+            queryset = queryset.filter(priority=filters['priority'])
+        if filters.get('created_from'):
+            queryset = queryset.filter(created_at__date__gte=filters['created_from'])
+        if filters.get('created_to'):
+            queryset = queryset.filter(created_at__date__lte=filters['created_to'])
+        return queryset
+
     @action(detail=False, methods=['post'])
     def mark_read(self, request):
-        """Marca notificações específicas como lidas."""
+        """
+        Marca notificações como lidas.
+
+        Body: notification_ids e/ou filtros (type, priority, created_from,
+        created_to). Sem IDs nem filtros, marca todas do escopo.
+        """
         serializer = NotificationMarkReadSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         notification_ids = serializer.validated_data.get('notification_ids', [])
-        scoped_queryset = self._scoped_queryset()
-        
+        notifications = self._apply_mark_read_filters(self._scoped_queryset(), serializer.validated_data)
         if notification_ids:
-            notifications = scoped_queryset.filter(id__in=notification_ids, read=False)
-        else:
-            # Se não especificar IDs, marca todas como lidas
-            notifications = scoped_queryset.filter(read=False)
+            notifications = notifications.filter(id__in=notification_ids)
         
-        count = 0
-        for notification in notifications:
-            notification.mark_as_read()
-            count += 1
+        count = self._mark_queryset_read(notifications)
         
         return Response({
             'success': True,
@@ -142,13 +166,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        """Marca todas as notificações como lidas."""
-        unread = self._scoped_queryset().filter(read=False)
-        count = 0
-        
-        for notification in unread:
-            notification.mark_as_read()
-            count += 1
+        """Marca todas as notificações como lidas (aceita os mesmos filtros de mark_read)."""
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        notifications = self._apply_mark_read_filters(self._scoped_queryset(), serializer.validated_data)
+        count = self._mark_queryset_read(notifications)
         
         return Response({
             'success': True,
@@ -186,6 +209,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         deleted_count = self._scoped_queryset().filter(id__in=notification_ids).delete()[0]
+        invalidate_notification_stats()
         
         return Response({
             'success': True,
@@ -197,6 +221,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def delete_all(self, request):
         """Deleta todas as notificações."""
         deleted_count = self._scoped_queryset().all().delete()[0]
+        invalidate_notification_stats()
         
         return Response({
             'success': True,
@@ -216,92 +241,61 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         Retorna estatísticas de prazos encontrados e notificações criadas.
         """
-        from apps.cases.models import CaseMovement
-        
         user = request.user
-        today = timezone.now().date()
-        future_limit = today + timedelta(days=15)
-        
-        # Buscar movimentações com prazo dentro da janela de verificação
-        movements_with_deadlines = CaseMovement.objects.filter(
-            prazo__isnull=False,
-            data_limite_prazo__isnull=False,
-            data_limite_prazo__gte=today,
-            data_limite_prazo__lte=future_limit
-        ).select_related('case').order_by('data_limite_prazo')
+        movements_with_deadlines = movements_in_window()
         if user.is_authenticated and not is_master_user(user):
             movements_with_deadlines = apply_user_owned_or_shared(movements_with_deadlines, user, owner_field='case__owner')
         
-        created_count = 0
-        skipped_count = 0
-        notifications_data = []
-        
-        for movement in movements_with_deadlines:
-            # Calcular dias até o vencimento
-            days_until = (movement.data_limite_prazo - today).days
-            
-            # Determinar prioridade baseado no padrão 15/7/3
-            if days_until <= 3:
-                priority = 'urgent'
-                if days_until == 0:
-                    priority_text = 'HOJE'
-                elif days_until == 1:
-                    priority_text = 'AMANHÃ'
-                else:
-                    priority_text = f'em {days_until} dias (URGENTÍSSIMO)'
-            elif days_until <= 7:
-                priority = 'high'
-                priority_text = f'em {days_until} dias (URGENTE)'
-            else:
-                priority = 'medium'
-                priority_text = f'em {days_until} dias'
-            
-            # Verificar se já existe notificação para este prazo
-            notification_exists = Notification.objects.filter(
-                type='deadline',
-                metadata__movement_id=movement.id,
-                read=False
-            ).exists()
-            
-            if notification_exists:
-                skipped_count += 1
-                continue
-            
-            # Criar notificação
-            notification = Notification.objects.create(
-                owner=movement.case.owner,
-                type='deadline',
-                priority=priority,
-                title=f'⏰ Prazo vence {priority_text}',
-                message=f'Processo {movement.case.numero_processo}: {movement.titulo}',
-                link=f'/cases/{movement.case.id}',
-                metadata={
-                    'movement_id': movement.id,
-                    'case_id': movement.case.id,
-                    'case_number': movement.case.numero_processo,
-                    'deadline_date': movement.data_limite_prazo.isoformat(),
-                    'days_until': days_until,
-                    'movement_type': movement.tipo,
-                    'movement_title': movement.titulo,
-                }
-            )
-            
-            created_count += 1
-            notifications_data.append({
-                'id': notification.id,
-                'case_number': movement.case.numero_processo,
-                'deadline': movement.data_limite_prazo.isoformat(),
-                'days_until': days_until,
-                'priority': priority
-            })
+        result = scan_deadlines(movements_with_deadlines)
         
         return Response({
             'success': True,
-            'checked': movements_with_deadlines.count(),
-            'created': created_count,
-            'skipped': skipped_count,
-            'notifications': notifications_data,
-            'message': f'Verificação concluída: {created_count} notificação(ões) criada(s), {skipped_count} já existente(s)'
+            **result,
+            'message': f'Verificação concluída: {result["created"]} notificação(ões) criada(s), {result["skipped"]} já existente(s)'
         })
+    
+    SCHEDULER_RUNS_MAX_LIMIT = 200
 
+    @action(detail=False, methods=['get'])
+    def scheduler_runs(self, request):
+        """
+        Histórico de execuções do agendador residente.
+
+        Query params: job (opcional), limit (padrão 50, máx. 200).
+        Inclui resumo por job (última execução, total, duração média/máxima).
+        Apenas usuários MASTER.
+        """
+        if not is_master_user(request.user):
+            return Response(
+                {'detail': 'Acesso permitido apenas para usuários MASTER.'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except (TypeError, ValueError):
+            limit = 50
+        limit = max(1, min(limit, self.SCHEDULER_RUNS_MAX_LIMIT))
 
+        runs = ScheduledJobRun.objects.all()
+        job = request.query_params.get('job')
+        if job:
+            runs = runs.filter(job=job)
+
+        jobs = {
+            row['job']: {
+                'last_run': row['last_run'],
+                'runs': row['runs'],
+                'avg_duration_ms': round(row['avg_duration_ms'] or 0, 2),
+                'max_duration_ms': round(row['max_duration_ms'] or 0, 2),
+            }
+            for row in runs.order_by().values('job').annotate(
+                last_run=Max('started_at'),
+                runs=Count('id'),
+                avg_duration_ms=Avg('duration_ms'),
+                max_duration_ms=Max('duration_ms'),
+            )
+        }
+        return Response({
+            'jobs': jobs,
+            'results': ScheduledJobRunSerializer(runs[:limit], many=True).data,
+        })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Publication, SearchHistory
+from .models import Publication, PublicationSyncCoverage, SearchHistory
 
 
 @admin.register(Publication)
@@ -59,3 +59,10 @@ class SearchHistoryAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(PublicationSyncCoverage)
+class PublicationSyncCoverageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'tribunal', 'data_inicio', 'data_fim', 'synced_at']
+    list_filter = ['owner', 'tribunal']
+    readonly_fields = ['identity_key', 'synced_at']
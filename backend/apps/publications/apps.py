@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _restore_search_triggers(sender, using, **kwargs):
+    # SQLite: migrações que recriam publications_publication descartam os triggers da FTS
+    from django.db import connections
+
+    from .search_index import ensure_sqlite_triggers
+
+    ensure_sqlite_triggers(connections[using])
 
 
 class PublicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.publications'
+
+    def ready(self):
+        post_migrate.connect(_restore_search_triggers, sender=self)
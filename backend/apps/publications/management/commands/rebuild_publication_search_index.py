@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.publications.search_index import ensure_sqlite_triggers, missing_sqlite_triggers
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica os triggers que mantêm os índices FTS5 das publicações (SQLite), "
+        "recria os ausentes e reconstrói os índices a partir da tabela."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Não altera nada; sai com erro se faltar algum trigger.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stdout.write(f"{connection.vendor}: índices mantidos pelo próprio banco, nada a fazer.")
+            return
+
+        missing = missing_sqlite_triggers(connection)
+        if options["check"]:
+            if missing:
+                details = "; ".join(f"{index}: {', '.join(names)}" for index, names in missing.items())
+                raise CommandError(f"triggers ausentes ({details})")
+            self.stdout.write(self.style.SUCCESS("rebuild_publication_search_index: triggers ok"))
+            return
+
+        rebuilt = ensure_sqlite_triggers(connection, rebuild=True)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"rebuild_publication_search_index: rebuilt={','.join(rebuilt) or '-'} "
+                f"missing_triggers={sum(len(names) for names in missing.values())}"
+            )
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('publications', '0007_publicationdeletiontombstone_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationSyncCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tribunal', models.CharField(max_length=10)),
+                ('identity_key', models.CharField(help_text='Hash de OAB/nome/regras de exclusão usados na busca', max_length=64)),
+                ('data_inicio', models.DateField()),
+                ('data_fim', models.DateField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publication_sync_coverage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cobertura de Sincronização',
+                'verbose_name_plural': 'Coberturas de Sincronização',
+                'ordering': ['owner', 'tribunal', 'data_inicio'],
+                'indexes': [models.Index(fields=['owner', 'identity_key', 'tribunal', 'data_inicio'], name='publication_owner_i_4cdb3c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+"""
+Índice full-text (sem acentos) das publicações.
+
+- SQLite: tabela virtual FTS5 com conteúdo externo (tokenizer unicode61 com
+  remove_diacritics) mantida em sincronia por triggers.
+- PostgreSQL: extensão unaccent + wrapper IMMUTABLE e índice GIN sobre
+  to_tsvector('simple', ...).
+
+Outros bancos: nada é criado (a busca cai no fallback com icontains).
+O DDL fica em apps.publications.search_index (os triggers do SQLite são
+recriados depois de cada migrate).
+"""
+from django.db import migrations
+
+from apps.publications.search_index import FULLTEXT_INDEX, create_search_index, drop_search_index
+
+
+def create_fulltext_index(apps, schema_editor):
+    create_search_index(FULLTEXT_INDEX, schema_editor)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    drop_search_index(FULLTEXT_INDEX, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0008_publicationsynccoverage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:43
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_search_history_membership(apps, schema_editor):
+    """Históricos antigos: deriva uma única vez a associação pelo período/tribunais da busca."""
+    SearchHistory = apps.get_model('publications', 'SearchHistory')
+    Publication = apps.get_model('publications', 'Publication')
+    Membership = SearchHistory.publications.through
+
+    for search in SearchHistory.objects.all().iterator():
+        tribunais = search.tribunais if isinstance(search.tribunais, list) else []
+        if not tribunais:
+            continue
+        publication_ids = Publication.objects.filter(
+            owner_id=search.owner_id,
+            tribunal__in=tribunais,
+            data_disponibilizacao__gte=search.data_inicio,
+            data_disponibilizacao__lte=search.data_fim,
+        ).values_list('id', flat=True)
+        Membership.objects.bulk_create(
+            [Membership(searchhistory_id=search.id, publication_id=publication_id) for publication_id in publication_ids],
+            batch_size=BACKFILL_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0009_publication_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchhistory',
+            name='publications',
+            field=models.ManyToManyField(blank=True, help_text='Publicações retornadas por esta busca', related_name='search_histories', to='publications.publication'),
+        ),
+        migrations.RunPython(backfill_search_history_membership, migrations.RunPython.noop),
+    ]
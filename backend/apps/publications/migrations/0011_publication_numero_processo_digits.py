@@ -0,0 +1,68 @@
+"""
+Coluna só com os dígitos do número do processo + estrutura de busca parcial.
+
+- SQLite (>= 3.34): tabela virtual FTS5 com tokenizer trigram sobre
+  numero_processo_digits, mantida por triggers.
+- PostgreSQL: extensão pg_trgm e índice GIN gin_trgm_ops.
+
+Outros bancos: só o índice B-tree da coluna (busca com LIKE).
+
+No SQLite o AddField recria a tabela publications_publication, o que descarta
+os triggers da FTS de texto (0009): eles são recriados aqui (DDL em
+apps.publications.search_index).
+"""
+from django.db import migrations, models
+
+from apps.publications.search_index import (
+    DIGITS_INDEX,
+    create_search_index,
+    drop_search_index,
+    ensure_sqlite_triggers,
+)
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_numero_processo_digits(apps, schema_editor):
+    Publication = apps.get_model('publications', 'Publication')
+    pending = []
+    queryset = Publication.objects.exclude(numero_processo__isnull=True).only('id', 'numero_processo')
+    for publication in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        publication.numero_processo_digits = ''.join(filter(str.isdigit, publication.numero_processo or ''))
+        pending.append(publication)
+        if len(pending) >= BACKFILL_BATCH_SIZE:
+            Publication.objects.bulk_update(pending, ['numero_processo_digits'])
+            pending = []
+    if pending:
+        Publication.objects.bulk_update(pending, ['numero_processo_digits'])
+
+
+def restore_fulltext_triggers(apps, schema_editor):
+    ensure_sqlite_triggers(schema_editor.connection)
+
+
+def create_digits_index(apps, schema_editor):
+    create_search_index(DIGITS_INDEX, schema_editor)
+
+
+def drop_digits_index(apps, schema_editor):
+    drop_search_index(DIGITS_INDEX, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0010_searchhistory_publications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='numero_processo_digits',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Apenas os dígitos de numero_processo (busca parcial por número)', max_length=50),
+        ),
+        migrations.RunPython(restore_fulltext_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_numero_processo_digits, migrations.RunPython.noop),
+        migrations.RunPython(create_digits_index, drop_digits_index),
+    ]
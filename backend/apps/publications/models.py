@@ -3,6 +3,8 @@ from django.utils import timezone
 from django.db.models.deletion import ProtectedError
 from django.conf import settings
 
+from apps.cases.models import normalize_numero_processo
+
 
 class PublicationDeletionTombstone(models.Model):
     """Registro de deleção de publicação (tombstone).
@@ -64,6 +66,14 @@ class Publication(models.Model):
         help_text='Número CNJ do processo'
     )
     
+    numero_processo_digits = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='Apenas os dígitos de numero_processo (busca parcial por número)'
+    )
+    
     # Tribunal e tipo
     tribunal = models.CharField(
         max_length=10,
@@ -195,6 +205,13 @@ class Publication(models.Model):
         processo = self.numero_processo or 'Sem número'
         return f"{self.tribunal} - {processo} - {self.data_disponibilizacao}"
     
+    def save(self, *args, **kwargs):
+        self.numero_processo_digits = normalize_numero_processo(self.numero_processo)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'numero_processo' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'numero_processo_digits'}
+        super().save(*args, **kwargs)
+    
     def delete(self, *args, **kwargs):
         """
         Impede exclusão de publicação se houver casos vinculados via publicacao_origem.
@@ -258,6 +275,14 @@ class SearchHistory(models.Model):
         blank=True,
         help_text='Tempo de execução da busca em segundos'
     )
+
+    # Publicações retornadas por esta busca (gravado na ingestão)
+    publications = models.ManyToManyField(
+        Publication,
+        blank=True,
+        related_name='search_histories',
+        help_text='Publicações retornadas por esta busca'
+    )
     
     class Meta:
         ordering = ['-executed_at']
@@ -266,3 +291,42 @@ class SearchHistory(models.Model):
     
     def __str__(self):
         return f"Busca {self.executed_at.strftime('%d/%m/%Y %H:%M')} - {self.total_publicacoes} resultados"
+
+
+class PublicationSyncCoverage(models.Model):
+    """Janela de datas já sincronizada com sucesso no PJe (watermark de cobertura).
+
+    Uma linha por intervalo contíguo de datas, por usuário, tribunal e identidade
+    de busca (OAB/nome/regras de exclusão). O planner incremental
+    (apps/publications/sync.py) usa estes intervalos para buscar no PJe apenas
+    os dias ainda não cobertos e servir o restante a partir de `Publication`.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='publication_sync_coverage',
+    )
+
+    tribunal = models.CharField(max_length=10)
+
+    identity_key = models.CharField(
+        max_length=64,
+        help_text='Hash de OAB/nome/regras de exclusão usados na busca'
+    )
+
+    data_inicio = models.DateField()
+    data_fim = models.DateField()
+
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['owner', 'tribunal', 'data_inicio']
+        verbose_name = 'Cobertura de Sincronização'
+        verbose_name_plural = 'Coberturas de Sincronização'
+        indexes = [
+            models.Index(fields=['owner', 'identity_key', 'tribunal', 'data_inicio']),
+        ]
+
+    def __str__(self):
+        return f"{self.tribunal} {self.data_inicio}..{self.data_fim} owner={self.owner_id}"
@@ -0,0 +1,217 @@
+"""
+Busca full-text (sem acentos) nas publicações salvas.
+
+O índice vive no banco (migração 0009; DDL em `search_index`):
+- SQLite: FTS5 `publications_publication_fts` (tokenizer com remove_diacritics),
+  mantida por triggers — cobre save(), bulk_create() e update();
+- PostgreSQL: índice GIN sobre to_tsvector('simple', publications_unaccent(...)).
+
+A consulta devolve apenas ids + rank paginados; os textos completos não são
+carregados em memória para filtrar.
+
+Busca parcial por número de processo (migração 0011) usa a coluna
+`numero_processo_digits` (só dígitos):
+- SQLite >= 3.34: FTS5 `publications_publication_numero_fts` com tokenizer trigram;
+- PostgreSQL: índice GIN gin_trgm_ops (atende `LIKE '%...%'`).
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Publication
+from .search_index import DIGITS_INDEX, FULLTEXT_INDEX
+
+
+FTS_TABLE = FULLTEXT_INDEX.sqlite_table
+DIGITS_FTS_TABLE = DIGITS_INDEX.sqlite_table
+
+# O tokenizer trigram só casa termos com 3+ caracteres
+TRIGRAM_MIN_LENGTH = 3
+
+# Pesos bm25 por coluna da FTS5: numero_processo, orgao, texto_resumo, texto_completo
+SQLITE_BM25_WEIGHTS = (2.0, 1.5, 3.0, 1.0)
+
+# Deve ser idêntica à expressão do índice GIN (senão o índice não é usado)
+POSTGRES_DOCUMENT_SQL = (
+    "to_tsvector('simple', publications_unaccent("
+    "coalesce({table}.numero_processo, '') || ' ' || coalesce({table}.orgao, '') || ' ' || "
+    "coalesce({table}.texto_resumo, '') || ' ' || coalesce({table}.texto_completo, '')"
+    "))"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fold_text(text):
+    """Minúsculas e sem acentos ('Vitória' -> 'vitoria')."""
+    if not text:
+        return ''
+    nfd = unicodedata.normalize('NFD', str(text))
+    return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn').lower()
+
+
+def tokenize_query(query):
+    return _TOKEN_RE.findall(fold_text(query))
+
+
+def is_fulltext_available():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def _sqlite_match_expression(tokens):
+    # Todos os termos (AND); o último como prefixo para busca enquanto digita.
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] = f'{quoted[-1]}*'
+    return ' '.join(quoted)
+
+
+def _postgres_tsquery(tokens):
+    terms = list(tokens)
+    terms[-1] = f'{terms[-1]}:*'
+    return ' & '.join(terms)
+
+
+def _scoped_ids_sql(queryset):
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    return sql, list(params)
+
+
+def search_publication_ids(queryset, query, limit=20, offset=0):
+    """
+    Busca ranqueada dentro do `queryset` (ex.: publicações do usuário).
+
+    Returns:
+        (total, [(publication_id, rank), ...]) — rank maior = mais relevante.
+    """
+    tokens = tokenize_query(query)
+    if not tokens:
+        return 0, []
+
+    if not is_fulltext_available():
+        return _fallback_search_ids(queryset, tokens, limit, offset)
+
+    scoped_sql, scoped_params = _scoped_ids_sql(queryset)
+    table = Publication._meta.db_table
+
+    if connection.vendor == 'sqlite':
+        match = _sqlite_match_expression(tokens)
+        weights = ', '.join(str(weight) for weight in SQLITE_BM25_WEIGHTS)
+        where = f'{FTS_TABLE} MATCH %s AND rowid IN ({scoped_sql})'
+        count_sql = f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}'
+        count_params = [match, *scoped_params]
+        # bm25 é negativo (menor = melhor); invertido para manter "maior = melhor"
+        page_sql = (
+            f'SELECT rowid, -bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} '
+            f'WHERE {where} ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s'
+        )
+        page_params = [match, *scoped_params, int(limit), int(offset)]
+    else:
+        tsquery = _postgres_tsquery(tokens)
+        document = POSTGRES_DOCUMENT_SQL.format(table=table)
+        tsquery_sql = "to_tsquery('simple', publications_unaccent(%s))"
+        where = f'{document} @@ {tsquery_sql} AND {table}.id IN ({scoped_sql})'
+        count_sql = f'SELECT COUNT(*) FROM {table} WHERE {where}'
+        count_params = [tsquery, *scoped_params]
+        page_sql = (
+            f'SELECT {table}.id, ts_rank({document}, {tsquery_sql}) AS score FROM {table} '
+            f'WHERE {where} ORDER BY score DESC, {table}.id DESC LIMIT %s OFFSET %s'
+        )
+        page_params = [tsquery, tsquery, *scoped_params, int(limit), int(offset)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(count_sql, count_params)
+        total = cursor.fetchone()[0]
+        if not total:
+            return 0, []
+        cursor.execute(page_sql, page_params)
+        rows = [(row[0], float(row[1] or 0)) for row in cursor.fetchall()]
+    return total, rows
+
+
+def _filter_icontains(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(numero_processo__icontains=token)
+            | Q(orgao__icontains=token)
+            | Q(texto_resumo__icontains=token)
+            | Q(texto_completo__icontains=token)
+        )
+    return queryset
+
+
+def _fallback_search_ids(queryset, tokens, limit, offset):
+    """Bancos sem FTS: icontains por termo (sem dobra de acentos nem ranking)."""
+    queryset = _filter_icontains(queryset, tokens).order_by('-data_disponibilizacao', '-id')
+    total = queryset.count()
+    ids = list(queryset.values_list('id', flat=True)[offset:offset + limit])
+    return total, [(publication_id, 0.0) for publication_id in ids]
+
+
+def search_publications(queryset, query, limit=20, offset=0):
+    """
+    Igual a `search_publication_ids`, mas devolve as publicações (sem
+    `texto_completo`) na ordem do ranking, com o atributo `search_rank`.
+    """
+    total, rows = search_publication_ids(queryset, query, limit=limit, offset=offset)
+    if not rows:
+        return total, []
+    ranks = dict(rows)
+    publications = Publication.objects.filter(id__in=ranks).defer('texto_completo', 'search_metadata')
+    by_id = {publication.id: publication for publication in publications}
+    ordered = []
+    for publication_id, rank in rows:
+        publication = by_id.get(publication_id)
+        if publication is not None:
+            publication.search_rank = rank
+            ordered.append(publication)
+    return total, ordered
+
+
+def matching_publications_queryset(queryset, query):
+    """Restringe o queryset às publicações que casam com a busca (sem ranking/paginação)."""
+    tokens = tokenize_query(query)
+    if not tokens:
+        return queryset.none()
+
+    table = Publication._meta.db_table
+    if connection.vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [_sqlite_match_expression(tokens)],
+        ))
+    if connection.vendor == 'postgresql':
+        document = POSTGRES_DOCUMENT_SQL.format(table=table)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM {table} WHERE {document} @@ to_tsquery('simple', publications_unaccent(%s))",
+            [_postgres_tsquery(tokens)],
+        ))
+    return _filter_icontains(queryset, tokens)
+
+
+def _digits_fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [DIGITS_FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def filter_by_process_digits(queryset, digits):
+    """
+    Restringe o queryset às publicações cujo número (só dígitos) contém `digits`.
+
+    Ex.: "0000623-69.2026" ou "00006236920" encontram "0000623-69.2026.8.26.0320".
+    """
+    digits = ''.join(filter(str.isdigit, str(digits or '')))
+    if not digits:
+        return queryset.none()
+    if len(digits) >= TRIGRAM_MIN_LENGTH and _digits_fts_available():
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {DIGITS_FTS_TABLE} WHERE {DIGITS_FTS_TABLE} MATCH %s',
+            [f'"{digits}"'],
+        ))
+    # PostgreSQL: LIKE '%...%' atendido pelo índice trigram; demais: varredura da coluna indexada
+    return queryset.filter(numero_processo_digits__contains=digits)
@@ -0,0 +1,204 @@
+"""
+DDL dos índices de busca das publicações (fora das migrações).
+
+- `FULLTEXT_INDEX` (migração 0009): texto sem acentos.
+  SQLite: FTS5 `publications_publication_fts` (remove_diacritics) + triggers;
+  PostgreSQL: unaccent + índice GIN sobre to_tsvector('simple', ...).
+- `DIGITS_INDEX` (migração 0011): busca parcial por `numero_processo_digits`.
+  SQLite >= 3.34: FTS5 trigram `publications_publication_numero_fts` + triggers;
+  PostgreSQL: pg_trgm + índice GIN gin_trgm_ops.
+
+No SQLite, toda alteração de schema que recria `publications_publication`
+(AddField/AlterField/...) descarta os triggers que mantêm as tabelas FTS em
+sincronia. Por isso os triggers ficam aqui: `ensure_sqlite_triggers` os recria
+(e reconstrói o índice) após cada `migrate` (ver apps.py) e no comando
+`rebuild_publication_search_index`.
+"""
+import sqlite3
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    name: str
+    sqlite_table: str
+    # CREATE VIRTUAL TABLE (tabela FTS5 de conteúdo externo)
+    sqlite_create_table: str
+    # nome -> CREATE TRIGGER
+    sqlite_triggers: dict
+    postgres_forward: tuple = ()
+    postgres_reverse: tuple = ()
+    min_sqlite_version: tuple = (0,)
+
+    def sqlite_supported(self):
+        return sqlite3.sqlite_version_info >= self.min_sqlite_version
+
+
+def _fts_triggers(table, fts_table, columns, update_columns):
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    insert_new = f'INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values});'
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values});"
+    )
+    return {
+        f'{fts_table}_ai': f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'{fts_table}_ad': f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END',
+        f'{fts_table}_au': (
+            f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {", ".join(update_columns)} '
+            f'ON {table} BEGIN {delete_old} {insert_new} END'
+        ),
+    }
+
+
+PUBLICATION_TABLE = 'publications_publication'
+
+_FULLTEXT_COLUMNS = ('numero_processo', 'orgao', 'texto_resumo', 'texto_completo')
+
+FULLTEXT_INDEX = SearchIndex(
+    name='fulltext',
+    sqlite_table='publications_publication_fts',
+    sqlite_create_table=f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS publications_publication_fts USING fts5(
+        {', '.join(_FULLTEXT_COLUMNS)},
+        content='{PUBLICATION_TABLE}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    sqlite_triggers=_fts_triggers(
+        PUBLICATION_TABLE, 'publications_publication_fts', _FULLTEXT_COLUMNS, _FULLTEXT_COLUMNS,
+    ),
+    postgres_forward=(
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        """
+        CREATE OR REPLACE FUNCTION publications_unaccent(text) RETURNS text AS $$
+            SELECT public.unaccent('public.unaccent', $1)
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS publications_publication_fts_idx ON publications_publication
+        USING GIN (to_tsvector('simple', publications_unaccent(
+            coalesce(numero_processo, '') || ' ' || coalesce(orgao, '') || ' ' ||
+            coalesce(texto_resumo, '') || ' ' || coalesce(texto_completo, '')
+        )))
+        """,
+    ),
+    postgres_reverse=(
+        "DROP INDEX IF EXISTS publications_publication_fts_idx",
+        "DROP FUNCTION IF EXISTS publications_unaccent(text)",
+    ),
+)
+
+DIGITS_INDEX = SearchIndex(
+    name='digits',
+    sqlite_table='publications_publication_numero_fts',
+    sqlite_create_table=f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS publications_publication_numero_fts USING fts5(
+        numero_processo_digits,
+        content='{PUBLICATION_TABLE}',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    sqlite_triggers=_fts_triggers(
+        PUBLICATION_TABLE, 'publications_publication_numero_fts',
+        ('numero_processo_digits',), ('numero_processo_digits',),
+    ),
+    postgres_forward=(
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        CREATE INDEX IF NOT EXISTS publications_publication_numero_digits_trgm
+        ON publications_publication USING GIN (numero_processo_digits gin_trgm_ops)
+        """,
+    ),
+    postgres_reverse=(
+        "DROP INDEX IF EXISTS publications_publication_numero_digits_trgm",
+    ),
+    # Tokenizer trigram do FTS5
+    min_sqlite_version=(3, 34, 0),
+)
+
+SEARCH_INDEXES = (FULLTEXT_INDEX, DIGITS_INDEX)
+
+
+def _rebuild_sql(index):
+    return f"INSERT INTO {index.sqlite_table}({index.sqlite_table}) VALUES ('rebuild')"
+
+
+def create_search_index(index, schema_editor):
+    """Cria o índice (migrações). Outros bancos: nada (busca cai no fallback)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        if not index.sqlite_supported():
+            return
+        schema_editor.execute(index.sqlite_create_table)
+        for statement in index.sqlite_triggers.values():
+            schema_editor.execute(statement)
+        schema_editor.execute(_rebuild_sql(index))
+    elif vendor == 'postgresql':
+        for statement in index.postgres_forward:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(index, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in reversed(list(index.sqlite_triggers)):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {index.sqlite_table}')
+    elif vendor == 'postgresql':
+        for statement in index.postgres_reverse:
+            schema_editor.execute(statement)
+
+
+def _sqlite_objects(cursor, object_type):
+    cursor.execute('SELECT name FROM sqlite_master WHERE type = %s', [object_type])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def missing_sqlite_triggers(connection):
+    """
+    Triggers ausentes dos índices cuja tabela FTS existe: {índice: [trigger, ...]}.
+    Vazio fora do SQLite.
+    """
+    if connection.vendor != 'sqlite':
+        return {}
+    with connection.cursor() as cursor:
+        tables = _sqlite_objects(cursor, 'table')
+        triggers = _sqlite_objects(cursor, 'trigger')
+    missing = {}
+    for index in SEARCH_INDEXES:
+        if index.sqlite_table not in tables:
+            continue
+        absent = [name for name in index.sqlite_triggers if name not in triggers]
+        if absent:
+            missing[index.name] = absent
+    return missing
+
+
+def ensure_sqlite_triggers(connection, rebuild=False):
+    """
+    Recria os triggers ausentes e reconstrói os índices afetados (linhas gravadas
+    sem trigger ficaram fora do índice). `rebuild=True` reconstrói todos.
+
+    Returns:
+        nomes dos índices reconstruídos.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    missing = missing_sqlite_triggers(connection)
+    rebuilt = []
+    with connection.cursor() as cursor:
+        tables = _sqlite_objects(cursor, 'table')
+        for index in SEARCH_INDEXES:
+            if index.sqlite_table not in tables:
+                continue
+            if not (rebuild or index.name in missing):
+                continue
+            for statement in index.sqlite_triggers.values():
+                cursor.execute(statement)
+            cursor.execute(_rebuild_sql(index))
+            rebuilt.append(index.name)
+    return rebuilt
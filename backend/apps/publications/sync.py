@@ -0,0 +1,320 @@
+"""
+Sincronização incremental de publicações com o PJe Comunica.
+
+Cada busca bem-sucedida registra, por usuário e tribunal, a janela de datas
+coberta (`PublicationSyncCoverage`). Nas buscas seguintes, o planner calcula
+só os sub-intervalos ainda não cobertos, consulta o PJe apenas para eles e
+completa a resposta com as publicações já salvas em `Publication`.
+
+O dia corrente (e datas futuras) nunca conta como coberto: o DJE ainda pode
+disponibilizar novas publicações nele.
+"""
+import hashlib
+import json
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from services.pje_comunica import PJeComunicaService
+from .models import Publication, PublicationSyncCoverage
+
+
+SUMMED_RESULT_FIELDS = (
+    'total_publicacoes_descartadas',
+    'descartadas_por_oab',
+    'descartadas_por_palavra_chave',
+)
+
+
+def build_identity_key(oab, nome_advogado, excluded_oabs=None, excluded_keywords=None):
+    """Hash dos parâmetros que mudam o resultado da busca (identidade + exclusões)."""
+    raw = json.dumps(
+        [
+            str(oab or '').strip(),
+            ' '.join(str(nome_advogado or '').split()).upper(),
+            sorted(str(item).strip() for item in (excluded_oabs or []) if str(item).strip()),
+            sorted(str(item).strip().upper() for item in (excluded_keywords or []) if str(item).strip()),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _coverage_queryset(owner, identity_key, tribunais, data_inicio, data_fim):
+    return PublicationSyncCoverage.objects.filter(
+        owner=owner,
+        identity_key=identity_key,
+        tribunal__in=list(tribunais),
+        data_inicio__lte=data_fim,
+        data_fim__gte=data_inicio,
+    ).order_by('tribunal', 'data_inicio')
+
+
+def get_missing_ranges(owner, identity_key, tribunais, data_inicio, data_fim, today=None):
+    """Retorna {tribunal: [(inicio, fim), ...]} com os dias ainda não sincronizados."""
+    today = today or date.today()
+    last_closed_day = today - timedelta(days=1)
+
+    covered = {tribunal: [] for tribunal in tribunais}
+    for coverage in _coverage_queryset(owner, identity_key, tribunais, data_inicio, data_fim):
+        covered[coverage.tribunal].append((coverage.data_inicio, min(coverage.data_fim, last_closed_day)))
+
+    missing = {}
+    for tribunal in tribunais:
+        ranges = []
+        cursor = data_inicio
+        for start, end in covered[tribunal]:
+            if end < start or end < cursor:
+                continue
+            if start > cursor:
+                ranges.append((cursor, min(start - timedelta(days=1), data_fim)))
+            cursor = max(cursor, end + timedelta(days=1))
+            if cursor > data_fim:
+                break
+        if cursor <= data_fim:
+            ranges.append((cursor, data_fim))
+        missing[tribunal] = ranges
+    return missing
+
+
+def plan_incremental_fetch(owner, identity_key, tribunais, data_inicio, data_fim, today=None):
+    """Agrupa tribunais por sub-intervalo faltante: {(inicio, fim): [tribunais]}.
+
+    Tribunais com a mesma lacuna (caso comum: todos sincronizados até ontem)
+    compartilham uma única chamada a `fetch_publications`.
+    """
+    missing = get_missing_ranges(owner, identity_key, tribunais, data_inicio, data_fim, today=today)
+    plan = {}
+    for tribunal in tribunais:
+        for window in missing[tribunal]:
+            plan.setdefault(window, []).append(tribunal)
+    return dict(sorted(plan.items()))
+
+
+@transaction.atomic
+def record_coverage(owner, identity_key, tribunal, data_inicio, data_fim):
+    """Registra janela sincronizada, fundindo intervalos sobrepostos/adjacentes."""
+    overlapping = list(
+        PublicationSyncCoverage.objects.select_for_update().filter(
+            owner=owner,
+            identity_key=identity_key,
+            tribunal=tribunal,
+            data_inicio__lte=data_fim + timedelta(days=1),
+            data_fim__gte=data_inicio - timedelta(days=1),
+        )
+    )
+    start = min([data_inicio] + [row.data_inicio for row in overlapping])
+    end = max([data_fim] + [row.data_fim for row in overlapping])
+
+    if overlapping:
+        keep, *extra = overlapping
+        if extra:
+            PublicationSyncCoverage.objects.filter(id__in=[row.id for row in extra]).delete()
+        keep.data_inicio = start
+        keep.data_fim = end
+        keep.save(update_fields=['data_inicio', 'data_fim', 'synced_at'])
+        return keep
+
+    return PublicationSyncCoverage.objects.create(
+        owner=owner,
+        identity_key=identity_key,
+        tribunal=tribunal,
+        data_inicio=start,
+        data_fim=end,
+    )
+
+
+def invalidate_coverage(owner, tribunal=None, day=None):
+    """Descarta coberturas (ex.: após deletar publicações, para permitir reimportação)."""
+    if owner is None:
+        return 0
+    queryset = PublicationSyncCoverage.objects.filter(owner=owner)
+    if tribunal is not None:
+        queryset = queryset.filter(tribunal=tribunal)
+    if day is not None:
+        queryset = queryset.filter(data_inicio__lte=day, data_fim__gte=day)
+    return queryset.delete()[0]
+
+
+def invalidate_coverage_for_publications(owner, publications):
+    """Invalida as coberturas que contêm as datas das publicações informadas."""
+    if owner is None:
+        return 0
+    condition = Q()
+    for tribunal, day in {(pub.tribunal, pub.data_disponibilizacao) for pub in publications}:
+        condition |= Q(tribunal=tribunal, data_inicio__lte=day, data_fim__gte=day)
+    if not condition:
+        return 0
+    return PublicationSyncCoverage.objects.filter(condition, owner=owner).delete()[0]
+
+
+def serialize_local_publication(pub):
+    """Publicação do banco no mesmo formato de `PJeComunicaService.normalize_publication`."""
+    return {
+        'id_api': pub.id_api,
+        'numero_processo': pub.numero_processo,
+        'tribunal': pub.tribunal,
+        'data_disponibilizacao': pub.data_disponibilizacao.isoformat(),
+        'tipo_comunicacao': pub.tipo_comunicacao,
+        'orgao': pub.orgao,
+        'meio': pub.meio,
+        'texto_resumo': pub.texto_resumo,
+        'texto_completo': pub.texto_completo,
+        'link_oficial': pub.link_oficial,
+        'hash': pub.hash_pub,
+    }
+
+
+def _merge_counter_dicts(target, source):
+    for key, value in (source or {}).items():
+        if isinstance(value, bool):
+            target[key] = target.get(key, False) or value
+        elif isinstance(value, (int, float)):
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def _count_days(ranges):
+    return sum((end - start).days + 1 for start, end in ranges)
+
+
+def fetch_publications_incremental(
+    owner,
+    oab,
+    nome_advogado,
+    data_inicio,
+    data_fim,
+    tribunais,
+    excluded_oabs=None,
+    excluded_keywords=None,
+    use_cache=True,
+    incremental=True,
+    today=None,
+    ingest=None,
+):
+    """
+    Busca publicações consultando o PJe só para os dias ainda não sincronizados.
+
+    Args:
+        owner: Usuário dono da busca (None desativa o modo incremental)
+        data_inicio/data_fim: datas (date) da janela pedida
+        incremental: False força a consulta remota da janela inteira
+        ingest: callable(resultado) que salva as publicações; a cobertura só é
+            registrada depois dele, na mesma transação (se falhar, nada fica
+            marcado como sincronizado)
+
+    Returns:
+        Dict no formato de `PJeComunicaService.fetch_publications`, com a chave
+        extra `sincronizacao` descrevendo o que veio do PJe e o que veio do banco.
+    """
+    tribunais = list(dict.fromkeys(tribunais or []))
+    identity_key = build_identity_key(oab, nome_advogado, excluded_oabs, excluded_keywords)
+    incremental = bool(incremental and owner is not None)
+
+    if incremental:
+        plan = plan_incremental_fetch(owner, identity_key, tribunais, data_inicio, data_fim, today=today)
+    else:
+        plan = {(data_inicio, data_fim): tribunais} if tribunais else {}
+
+    merged = {
+        'success': True,
+        'data_inicio': data_inicio.isoformat(),
+        'data_fim': data_fim.isoformat(),
+        'total_publicacoes': 0,
+        'total_publicacoes_descartadas': 0,
+        'descartadas_por_oab': 0,
+        'descartadas_por_palavra_chave': 0,
+        'total_tribunais_consultados': len(tribunais),
+        'buscas_por_tribunal': 2,  # OAB + Nome
+        'publicacoes': [],
+        'erros': None,
+    }
+    errors = []
+    seen_ids = set()
+    remote_days = 0
+    last_closed_day = (today or date.today()) - timedelta(days=1)
+    pending_coverage = []
+
+    for (window_start, window_end), window_tribunais in plan.items():
+        result = PJeComunicaService.fetch_publications(
+            oab=oab,
+            nome_advogado=nome_advogado,
+            data_inicio=window_start.isoformat(),
+            data_fim=window_end.isoformat(),
+            tribunais=window_tribunais,
+            excluded_oabs=excluded_oabs,
+            excluded_keywords=excluded_keywords,
+            use_cache=use_cache,
+        )
+        remote_days += _count_days([(window_start, window_end)]) * len(window_tribunais)
+
+        if not result.get('success'):
+            errors.extend(
+                {'tribunal': tribunal, 'tipo_busca': None, 'error': result.get('error', 'Erro desconhecido')}
+                for tribunal in window_tribunais
+            )
+            continue
+
+        for field in SUMMED_RESULT_FIELDS:
+            merged[field] += result.get(field, 0) or 0
+        for field in ('cache', 'conexoes_http'):
+            if result.get(field):
+                merged[field] = _merge_counter_dicts(merged.get(field, {}), result[field])
+
+        for pub in result.get('publicacoes') or []:
+            id_api = (pub or {}).get('id_api')
+            if id_api is not None and id_api in seen_ids:
+                continue
+            seen_ids.add(id_api)
+            merged['publicacoes'].append(pub)
+
+        window_errors = result.get('erros') or []
+        errors.extend(window_errors)
+
+        # O dia corrente nunca é gravado como coberto (ver docstring do módulo)
+        covered_end = min(window_end, last_closed_day)
+        if owner is not None and covered_end >= window_start:
+            failed_tribunais = {erro.get('tribunal') for erro in window_errors}
+            pending_coverage.extend(
+                (tribunal, window_start, covered_end)
+                for tribunal in window_tribunais
+                if tribunal not in failed_tribunais
+            )
+
+    local_count = 0
+    if incremental:
+        local_pubs = Publication.objects.filter(
+            owner=owner,
+            tribunal__in=tribunais,
+            data_disponibilizacao__gte=data_inicio,
+            data_disponibilizacao__lte=data_fim,
+        ).exclude(id_api__in=seen_ids).order_by('-data_disponibilizacao', '-created_at')
+        for pub in local_pubs:
+            merged['publicacoes'].append(serialize_local_publication(pub))
+            local_count += 1
+
+    window_days = _count_days([(data_inicio, data_fim)]) * len(tribunais)
+    merged['total_publicacoes'] = len(merged['publicacoes'])
+    merged['erros'] = errors or None
+    merged['sincronizacao'] = {
+        'incremental': incremental,
+        'intervalos_remotos': [
+            {
+                'data_inicio': window_start.isoformat(),
+                'data_fim': window_end.isoformat(),
+                'tribunais': window_tribunais,
+            }
+            for (window_start, window_end), window_tribunais in plan.items()
+        ],
+        'dias_remotos': remote_days,
+        'dias_locais': max(0, window_days - remote_days),
+        'publicacoes_locais': local_count,
+    }
+
+    with transaction.atomic():
+        if ingest is not None:
+            ingest(merged)
+        for tribunal, window_start, window_end in pending_coverage:
+            record_coverage(owner, identity_key, tribunal, window_start, window_end)
+    return merged
@@ -1,5 +1,13 @@
+import tempfile
+import threading
+import time
 from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -8,11 +16,30 @@ from django.conf import settings
 from apps.accounts.models import UserProfile
 from apps.cases.models import Case, CaseMovement
 from apps.notifications.models import Notification
-from apps.publications.models import Publication, SearchHistory
-from apps.publications.views import _build_case_suggestion, _create_movement_from_publication, _extract_prazo_days
+from apps.publications.models import Publication, PublicationSyncCoverage, SearchHistory
+from apps.publications.search import filter_by_process_digits, search_publication_ids
+from apps.publications.search_index import DIGITS_INDEX, FULLTEXT_INDEX, missing_sqlite_triggers
+from apps.publications.sync import (
+	build_identity_key,
+	fetch_publications_incremental,
+	get_missing_ranges,
+	record_coverage,
+)
+from apps.publications.views import (
+	_build_case_suggestion,
+	_create_movement_from_publication,
+	_create_publication_notifications,
+	_extract_prazo_days,
+	_find_case_by_numero_processo,
+	_ingest_publications,
+)
+from services import pje_cache
+from services.http_pool import close_sessions
 from services.pje_comunica import PJeComunicaService
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch
 
 
@@ -579,6 +606,16 @@ class PublicationsSearchCaseSuggestionTests(TestCase):
 			owner=self.user,
 		)
 
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_search_publications_rejects_invalid_dates(self, mock_fetch):
+		url = reverse('publications:search')
+		for data_inicio, data_fim in (('20/02/2026', '2026-02-20'), ('2026-02-20', '2026-02-31'), ('2026-02-21', '2026-02-20')):
+			response = self.client.get(url, data={'data_inicio': data_inicio, 'data_fim': data_fim})
+			self.assertEqual(response.status_code, 400, (data_inicio, data_fim))
+			self.assertFalse(response.json()['success'])
+		mock_fetch.assert_not_called()
+		self.assertFalse(SearchHistory.objects.exists())
+
 	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
 	def test_search_publications_attaches_case_suggestion(self, mock_fetch):
 		mock_fetch.return_value = {
@@ -723,6 +760,7 @@ class PublicationsSearchHistoryDetailCaseSuggestionTests(TestCase):
 			search_params={'retroactive_days': 7},
 			duration_seconds=1.0,
 		)
+		self.search.publications.add(self.pub)
 
 	def test_search_history_detail_attaches_case_suggestion(self):
 		url = reverse('publications:search_history_detail', kwargs={'search_id': self.search.id})
@@ -738,3 +776,1026 @@ class PublicationsSearchHistoryDetailCaseSuggestionTests(TestCase):
 		self.assertIn('case_suggestion', pub)
 		self.assertIsNotNone(pub['case_suggestion'])
 		self.assertEqual(pub['case_suggestion']['id'], self.case.id)
+
+
+class PJeComunicaConcurrentFetchTests(TestCase):
+	def setUp(self):
+		pje_cache.clear_cache()
+
+	@staticmethod
+	def _item(item_id, texto):
+		return {
+			'id': item_id,
+			'texto': texto,
+			'data_disponibilizacao': '2026-02-20',
+			'tipoComunicacao': 'Intimação',
+			'nomeOrgao': '1ª Vara',
+			'meio': 'D',
+		}
+
+	def test_merge_is_deterministic_regardless_of_completion_order(self):
+		responses = {
+			('TJSP', '123456', None): [self._item(1, 'Advogada ANA SILVA OAB 123456'), self._item(2, 'Texto OAB 123456')],
+			('TJSP', None, 'Ana Silva'): [self._item(2, 'Texto OAB 123456'), self._item(3, 'Intima-se ANA SILVA')],
+			('TRF3', '123456', None): [self._item(4, 'Patrona NOME EXCLUIDO OAB 123456')],
+			('TRF3', None, 'Ana Silva'): [self._item(5, 'Sem mencao a advogada')],
+		}
+
+		def fake_fetch(tribunal, oab=None, nome_advogado=None, data_inicio=None, data_fim=None, deadline=None):
+			# TJSP responde por último para embaralhar a ordem de chegada
+			if tribunal == 'TJSP':
+				time.sleep(0.05)
+			return {
+				'tribunal': tribunal,
+				'success': True,
+				'items': responses[(tribunal, oab, nome_advogado)],
+			}
+
+		with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=fake_fetch):
+			result = PJeComunicaService.fetch_publications(
+				oab='123456',
+				nome_advogado='Ana Silva',
+				data_inicio='2026-02-20',
+				data_fim='2026-02-20',
+				tribunais=['TJSP', 'TRF3'],
+				excluded_oabs=[],
+				excluded_keywords=['Nome Excluido'],
+				max_concurrency=4,
+			)
+
+		self.assertEqual([pub['id_api'] for pub in result['publicacoes']], [1, 2, 3])
+		self.assertEqual(result['total_publicacoes_descartadas'], 1)
+		self.assertEqual(result['descartadas_por_palavra_chave'], 1)
+		self.assertEqual(result['descartadas_por_oab'], 0)
+		self.assertIsNone(result['erros'])
+
+	def test_searches_exceeding_total_deadline_are_reported_as_errors(self):
+		release = threading.Event()
+
+		def fake_fetch(tribunal, oab=None, nome_advogado=None, data_inicio=None, data_fim=None, deadline=None):
+			if tribunal == 'TRT2':
+				release.wait(2)
+			return {'tribunal': tribunal, 'success': True, 'items': []}
+
+		try:
+			with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=fake_fetch):
+				result = PJeComunicaService.fetch_publications(
+					oab='123456',
+					nome_advogado='Ana Silva',
+					data_inicio='2026-02-20',
+					data_fim='2026-02-20',
+					tribunais=['TJSP', 'TRT2'],
+					excluded_oabs=[],
+					excluded_keywords=[],
+					total_deadline_seconds=0.2,
+				)
+		finally:
+			release.set()
+
+		self.assertTrue(result['success'])
+		self.assertEqual(
+			[(erro['tribunal'], erro['tipo_busca']) for erro in result['erros']],
+			[('TRT2', 'OAB'), ('TRT2', 'Nome')],
+		)
+
+	def test_queued_searches_do_not_start_after_total_deadline(self):
+		release = threading.Event()
+		started = []
+
+		def fake_fetch(tribunal, oab=None, nome_advogado=None, data_inicio=None, data_fim=None, deadline=None):
+			started.append((tribunal, oab, nome_advogado))
+			release.wait(2)
+			return {'tribunal': tribunal, 'success': True, 'items': []}
+
+		with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=fake_fetch):
+			try:
+				result = PJeComunicaService.fetch_publications(
+					oab='123456',
+					nome_advogado='Ana Silva',
+					data_inicio='2026-02-20',
+					data_fim='2026-02-20',
+					tribunais=['TJSP', 'TRT2'],
+					excluded_oabs=[],
+					excluded_keywords=[],
+					max_concurrency=1,
+					total_deadline_seconds=0.2,
+				)
+			finally:
+				release.set()
+			# Dá tempo ao worker de pegar a próxima busca, se ela não tiver sido cancelada
+			time.sleep(0.2)
+
+		self.assertEqual(started, [('TJSP', '123456', None)])
+		self.assertEqual(len(result['erros']), 4)
+
+	@patch('services.pje_comunica.get_pje_http_session')
+	def test_expired_tribunal_deadline_skips_request(self, mock_session):
+		result = PJeComunicaService.fetch_publications_from_tribunal(
+			tribunal='TJSP',
+			oab='123456',
+			deadline=time.monotonic() - 1,
+		)
+
+		self.assertFalse(result['success'])
+		mock_session.assert_not_called()
+
+
+class PJeComunicaHttpPoolTests(TestCase):
+	def setUp(self):
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			def do_GET(self):
+				body = b'{"status": "success", "count": 0, "items": []}'
+				self.send_response(200)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.api_url = f'http://127.0.0.1:{self.server.server_address[1]}/api/v1/comunicacao'
+		pje_cache.clear_cache()
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		close_sessions()
+
+	def test_sequential_searches_reuse_a_single_connection(self):
+		close_sessions()
+		with override_settings(PJE_COMUNICA_API_URL=self.api_url):
+			result = PJeComunicaService.fetch_publications(
+				oab='123456',
+				nome_advogado='Ana Silva',
+				data_inicio='2026-02-20',
+				data_fim='2026-02-20',
+				tribunais=['TJSP', 'TRF3', 'TRT2', 'TRT15', 'TJMG'],
+				excluded_oabs=[],
+				excluded_keywords=[],
+				max_concurrency=1,
+			)
+
+		self.assertIsNone(result['erros'])
+		self.assertEqual(result['conexoes_http']['requisicoes'], 10)
+		self.assertEqual(result['conexoes_http']['conexoes_novas'], 1)
+		self.assertEqual(result['conexoes_http']['conexoes_reutilizadas'], 9)
+		self.assertTrue(result['conexoes_http']['aproximado'])
+
+
+class PJeComunicaRetryTests(TestCase):
+	def setUp(self):
+		responses = self.responses = []
+		requests_seen = self.requests_seen = []
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			def do_GET(self):
+				requests_seen.append(self.path)
+				status_code, headers, body = responses.pop(0) if responses else (200, {}, b'{"status": "success", "count": 0, "items": []}')
+				self.send_response(status_code)
+				for name, value in headers.items():
+					self.send_header(name, value)
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.api_url = f'http://127.0.0.1:{self.server.server_address[1]}/api/v1/comunicacao'
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		close_sessions()
+
+	def _fetch(self, deadline=None):
+		with override_settings(
+			PJE_COMUNICA_API_URL=self.api_url,
+			PJE_COMUNICA_MAX_RETRIES=2,
+			PJE_COMUNICA_RETRY_BACKOFF_SECONDS=['0.01'],
+		):
+			return PJeComunicaService.fetch_publications_from_tribunal(
+				tribunal='TJSP', oab='123456', deadline=deadline,
+			)
+
+	def test_invalid_json_and_error_payload_are_retried(self):
+		self.responses.extend([
+			(200, {}, b'<html>manutencao</html>'),
+			(200, {}, b'{"status": "error", "message": "instavel"}'),
+		])
+
+		result = self._fetch()
+
+		self.assertTrue(result['success'])
+		self.assertEqual(len(self.requests_seen), 3)
+
+	def test_client_error_is_not_retried(self):
+		self.responses.append((400, {}, b'{}'))
+
+		result = self._fetch()
+
+		self.assertFalse(result['success'])
+		self.assertEqual(len(self.requests_seen), 1)
+
+	def test_retry_after_beyond_deadline_gives_up_without_sleeping(self):
+		self.responses.append((429, {'Retry-After': '30'}, b'{}'))
+
+		started = time.monotonic()
+		result = self._fetch(deadline=time.monotonic() + 2)
+
+		self.assertFalse(result['success'])
+		self.assertIn('429', result['error'])
+		self.assertEqual(len(self.requests_seen), 1)
+		self.assertLess(time.monotonic() - started, 1)
+
+
+class PJeComunicaResponseCacheTests(TestCase):
+	def setUp(self):
+		pje_cache.clear_cache()
+
+	@staticmethod
+	def _fake_fetch(tribunal, oab=None, nome_advogado=None, data_inicio=None, data_fim=None, deadline=None):
+		return {'tribunal': tribunal, 'success': True, 'count': 0, 'items': []}
+
+	def _search(self, **kwargs):
+		params = {
+			'oab': '123456',
+			'nome_advogado': 'Ana Silva',
+			'data_inicio': '2026-02-20',
+			'data_fim': '2026-02-20',
+			'tribunais': ['TJSP', 'TRF3'],
+			'excluded_oabs': [],
+			'excluded_keywords': [],
+		}
+		params.update(kwargs)
+		return PJeComunicaService.fetch_publications(**params)
+
+	def test_repeated_search_is_served_from_cache(self):
+		with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=self._fake_fetch) as mock_fetch:
+			first = self._search()
+			second = self._search()
+
+		self.assertEqual(mock_fetch.call_count, 4)
+		self.assertEqual(first['cache'], {'ativo': True, 'hits': 0, 'misses': 4})
+		self.assertEqual(second['cache'], {'ativo': True, 'hits': 4, 'misses': 0})
+
+	def test_bypass_and_errors_are_not_cached(self):
+		def failing_trf3(tribunal, **kwargs):
+			if tribunal == 'TRF3':
+				return {'tribunal': tribunal, 'success': False, 'error': 'HTTP 503', 'items': []}
+			return self._fake_fetch(tribunal, **kwargs)
+
+		with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=failing_trf3) as mock_fetch:
+			self._search()
+			retry = self._search()
+			bypass = self._search(use_cache=False)
+
+		self.assertEqual(retry['cache']['hits'], 2)
+		self.assertEqual(bypass['cache'], {'ativo': False, 'hits': 0, 'misses': 4})
+		self.assertEqual(mock_fetch.call_count, 4 + 2 + 4)
+
+	def test_zero_duration_disables_cache(self):
+		with override_settings(LEGAL_SYSTEM_SETTINGS={
+			**getattr(settings, 'LEGAL_SYSTEM_SETTINGS', {}),
+			'PUBLICATION_CACHE_DURATION': 0,
+		}):
+			with patch.object(PJeComunicaService, 'fetch_publications_from_tribunal', side_effect=self._fake_fetch) as mock_fetch:
+				self._search()
+				result = self._search()
+
+		self.assertEqual(mock_fetch.call_count, 8)
+		self.assertFalse(result['cache']['ativo'])
+
+	@override_settings(PJE_COMUNICA_CACHE_CLOSED_WINDOW_TTL_SECONDS=86400)
+	def test_closed_windows_get_longer_ttl(self):
+		duration = pje_cache.get_cache_duration()
+		today = date.today()
+		self.assertEqual(pje_cache.get_ttl_for_window(today.isoformat()), duration)
+		self.assertEqual(pje_cache.get_ttl_for_window((today - timedelta(days=1)).isoformat()), 86400)
+
+	def test_file_backend_round_trip_and_expiry(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			backend = pje_cache.FileCacheBackend(tmp_dir)
+			backend.set('chave', {'success': True, 'items': [{'id': 1}]}, ttl=60)
+			self.assertEqual(backend.get('chave'), {'success': True, 'items': [{'id': 1}]})
+
+			backend.set('expirada', {'success': True, 'items': []}, ttl=-1)
+			self.assertIsNone(backend.get('expirada'))
+
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_search_view_bypass_flag_disables_cache(self, mock_fetch):
+		user = User.objects.create_user(username='pub_cache_user', password='123456', email='pub_cache@example.com')
+		profile = user.profile
+		profile.full_name_oab = 'Teste OAB'
+		profile.oab_number = '123456'
+		profile.save(update_fields=['full_name_oab', 'oab_number'])
+		self.client.force_login(user)
+		mock_fetch.return_value = {'success': True, 'total_publicacoes': 0, 'publicacoes': []}
+
+		url = reverse('publications:search')
+		self.client.get(url, data={'data_inicio': '2026-02-20', 'data_fim': '2026-02-20', 'incremental': '0'})
+		self.client.get(url, data={'data_inicio': '2026-02-20', 'data_fim': '2026-02-20', 'incremental': '0', 'bypass_cache': '1'})
+
+		self.assertTrue(mock_fetch.call_args_list[0].kwargs['use_cache'])
+		self.assertFalse(mock_fetch.call_args_list[1].kwargs['use_cache'])
+
+
+class PublicationIncrementalSyncTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_sync_user', password='123456', email='pub_sync@example.com')
+		profile = self.user.profile
+		profile.full_name_oab = 'Teste OAB'
+		profile.oab_number = '123456'
+		profile.monitored_tribunais = ['TJSP', 'TRF3']
+		profile.save(update_fields=['full_name_oab', 'oab_number', 'monitored_tribunais'])
+		self.client.force_login(self.user)
+		self.identity_key = build_identity_key('123456', 'Teste OAB', [], [])
+
+	def test_missing_ranges_skip_covered_days_but_never_today(self):
+		today = date(2026, 3, 31)
+		record_coverage(self.user, self.identity_key, 'TJSP', date(2026, 3, 1), date(2026, 3, 10))
+		record_coverage(self.user, self.identity_key, 'TJSP', date(2026, 3, 11), date(2026, 3, 31))
+
+		self.assertEqual(PublicationSyncCoverage.objects.filter(owner=self.user, tribunal='TJSP').count(), 1)
+		missing = get_missing_ranges(
+			self.user, self.identity_key, ['TJSP', 'TRF3'], date(2026, 3, 1), date(2026, 3, 31), today=today,
+		)
+		self.assertEqual(missing['TJSP'], [(date(2026, 3, 31), date(2026, 3, 31))])
+		self.assertEqual(missing['TRF3'], [(date(2026, 3, 1), date(2026, 3, 31))])
+
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_lookback_after_previous_sync_only_fetches_today(self, mock_fetch):
+		today = date.today()
+		for tribunal in ('TJSP', 'TRF3'):
+			record_coverage(self.user, self.identity_key, tribunal, today - timedelta(days=30), today - timedelta(days=1))
+		Publication.objects.create(
+			owner=self.user,
+			id_api=930000001,
+			numero_processo='1000000-00.2026.8.26.0001',
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=today - timedelta(days=5),
+			orgao='1ª Vara',
+			meio='D',
+			texto_resumo='Resumo local',
+			texto_completo='Texto local',
+		)
+		mock_fetch.return_value = {'success': True, 'total_publicacoes': 0, 'publicacoes': [], 'erros': None}
+
+		response = self.client.get(reverse('publications:fetch_today'), data={'lookback_days': 30})
+
+		self.assertEqual(response.status_code, 200, response.content)
+		mock_fetch.assert_called_once()
+		self.assertEqual(mock_fetch.call_args.kwargs['data_inicio'], today.isoformat())
+		self.assertEqual(mock_fetch.call_args.kwargs['data_fim'], today.isoformat())
+		payload = response.json()
+		self.assertEqual(payload['sincronizacao']['dias_remotos'], 2)
+		self.assertEqual([pub['id_api'] for pub in payload['publicacoes']], [930000001])
+
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_tribunal_with_error_is_not_marked_as_covered(self, mock_fetch):
+		mock_fetch.return_value = {
+			'success': True,
+			'total_publicacoes': 0,
+			'publicacoes': [],
+			'erros': [{'tribunal': 'TRF3', 'tipo_busca': 'OAB', 'error': 'timeout'}],
+		}
+
+		self.client.get(reverse('publications:search'), data={'data_inicio': '2026-02-01', 'data_fim': '2026-02-10'})
+
+		self.assertEqual(
+			list(PublicationSyncCoverage.objects.filter(owner=self.user).values_list('tribunal', flat=True)),
+			['TJSP'],
+		)
+
+
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_current_day_is_fetched_again_on_the_next_day(self, mock_fetch):
+		mock_fetch.return_value = {'success': True, 'total_publicacoes': 0, 'publicacoes': [], 'erros': None}
+		day = date(2026, 3, 17)
+		kwargs = {
+			'owner': self.user,
+			'oab': '123456',
+			'nome_advogado': 'Teste OAB',
+			'data_inicio': day,
+			'data_fim': day,
+			'tribunais': ['TJSP'],
+			'excluded_oabs': [],
+			'excluded_keywords': [],
+		}
+
+		fetch_publications_incremental(today=day, **kwargs)
+		self.assertFalse(PublicationSyncCoverage.objects.filter(owner=self.user).exists())
+
+		result = fetch_publications_incremental(today=day + timedelta(days=1), **kwargs)
+		self.assertEqual(mock_fetch.call_count, 2)
+		self.assertEqual(mock_fetch.call_args.kwargs['data_inicio'], day.isoformat())
+		self.assertEqual(result['sincronizacao']['dias_remotos'], 1)
+		coverage = PublicationSyncCoverage.objects.get(owner=self.user)
+		self.assertEqual((coverage.data_inicio, coverage.data_fim), (day, day))
+
+	@patch('apps.publications.views.PJeComunicaService.fetch_publications')
+	def test_coverage_is_not_recorded_when_ingest_fails(self, mock_fetch):
+		mock_fetch.return_value = {'success': True, 'total_publicacoes': 0, 'publicacoes': [], 'erros': None}
+
+		def failing_ingest(result):
+			raise RuntimeError('falha ao salvar')
+
+		with self.assertRaises(RuntimeError):
+			fetch_publications_incremental(
+				owner=self.user,
+				oab='123456',
+				nome_advogado='Teste OAB',
+				data_inicio=date(2026, 2, 1),
+				data_fim=date(2026, 2, 10),
+				tribunais=['TJSP'],
+				ingest=failing_ingest,
+			)
+		self.assertFalse(PublicationSyncCoverage.objects.filter(owner=self.user).exists())
+
+
+class PublicationBulkIngestTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_ingest_user', password='123456', email='pub_ingest@example.com')
+
+	@staticmethod
+	def _payload(id_api, **overrides):
+		payload = {
+			'id_api': id_api,
+			'numero_processo': '1000000-00.2026.8.26.0001',
+			'tribunal': 'TJSP',
+			'tipo_comunicacao': 'Intimação',
+			'data_disponibilizacao': '2026-02-20',
+			'orgao': '1ª Vara',
+			'meio': 'D',
+			'texto_resumo': 'Resumo',
+			'texto_completo': 'Texto completo',
+			'link_oficial': None,
+			'hash': 'abc',
+		}
+		payload.update(overrides)
+		return payload
+
+	def test_reports_exact_new_duplicate_and_invalid_counts(self):
+		Publication.objects.create(
+			owner=self.user,
+			id_api=940000001,
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=date(2026, 2, 20),
+			texto_resumo='Resumo',
+			texto_completo='Texto completo',
+		)
+
+		stats = _ingest_publications(
+			[
+				self._payload(940000001),
+				self._payload(940000002),
+				self._payload(940000002),
+				self._payload(940000003),
+				self._payload(None),
+				self._payload(940000004, data_disponibilizacao=None),
+			],
+			owner=self.user,
+		)
+
+		self.assertEqual(stats, {'novas': 2, 'duplicadas': 2, 'invalidas': 2})
+		self.assertEqual(Publication.objects.filter(owner=self.user).count(), 3)
+		saved = Publication.objects.get(owner=self.user, id_api=940000002)
+		self.assertEqual(saved.texto_completo, 'Texto completo')
+		self.assertNotIn('texto_completo', saved.search_metadata['original_data'])
+		self.assertEqual(saved.search_metadata['original_data']['hash'], 'abc')
+
+	def test_query_count_does_not_grow_with_batch_size(self):
+		with CaptureQueriesContext(connection) as small:
+			_ingest_publications([self._payload(950000000 + i) for i in range(3)], owner=self.user)
+		with CaptureQueriesContext(connection) as large:
+			_ingest_publications([self._payload(951000000 + i) for i in range(30)], owner=self.user)
+
+		self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+		self.assertEqual(Publication.objects.filter(owner=self.user).count(), 33)
+
+
+@override_settings(PUBLICATIONS_NOTIFICATION_MAX_PER_SEARCH=50)
+class PublicationNotificationBatchTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_notif_user', password='123456', email='pub_notif@example.com')
+		self.other_user = User.objects.create_user(username='pub_notif_other', password='123456', email='pub_notif_other@example.com')
+
+	@staticmethod
+	def _payload(id_api, tipo='Intimação'):
+		return {
+			'id_api': id_api,
+			'numero_processo': '1000000-00.2026.8.26.0001',
+			'tribunal': 'TJSP',
+			'tipo_comunicacao': tipo,
+			'data_disponibilizacao': '2026-02-20',
+			'orgao': '1ª Vara',
+			'link_oficial': None,
+		}
+
+	def test_skips_already_notified_and_sets_source_key(self):
+		_create_publication_notifications([self._payload(960000001)], owner=self.user)
+		_create_publication_notifications([self._payload(960000001)], owner=self.other_user)
+
+		created = _create_publication_notifications(
+			[
+				self._payload(960000001),
+				self._payload(960000002, tipo='Despacho'),
+				self._payload(960000002, tipo='Despacho'),
+			],
+			owner=self.user,
+		)
+
+		self.assertEqual(created, 1)
+		self.assertEqual(Notification.objects.filter(owner=self.user).count(), 2)
+		notification = Notification.objects.get(owner=self.user, source_id='960000002')
+		self.assertEqual(notification.source_kind, Notification.SOURCE_PUBLICATION)
+		self.assertEqual(notification.priority, 'medium')
+		self.assertEqual(notification.metadata['id_api'], 960000002)
+		self.assertEqual(notification.link, '/publications')
+
+	def test_query_count_does_not_grow_with_batch_size(self):
+		with CaptureQueriesContext(connection) as small:
+			_create_publication_notifications([self._payload(961000000 + i) for i in range(2)], owner=self.user)
+		with CaptureQueriesContext(connection) as large:
+			_create_publication_notifications([self._payload(962000000 + i) for i in range(20)], owner=self.user)
+
+		self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+		self.assertEqual(Notification.objects.filter(owner=self.user).count(), 22)
+
+	def test_delete_multiple_removes_unread_notifications_by_source_key(self):
+		self.client.force_login(self.user)
+		for id_api in (963000001, 963000002):
+			Publication.objects.create(
+				id_api=id_api,
+				owner=self.user,
+				tribunal='TJSP',
+				tipo_comunicacao='Intimação',
+				data_disponibilizacao=date(2026, 2, 20),
+				texto_resumo='Resumo',
+				texto_completo='Texto completo',
+			)
+		_create_publication_notifications([self._payload(963000001), self._payload(963000002)], owner=self.user)
+		Notification.objects.filter(source_id='963000002').update(read=True)
+
+		response = self.client.post(
+			reverse('publications:delete_multiple'),
+			{'publication_ids': [963000001, 963000002]},
+			content_type='application/json',
+		)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['notifications_deleted'], 1)
+		self.assertEqual(list(Notification.objects.values_list('source_id', flat=True)), ['963000002'])
+
+
+class PublicationBatchIntegrateTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_batch_user', password='123456', email='pub_batch@example.com')
+		self.client.force_login(self.user)
+		self.case = Case.objects.create(
+			owner=self.user,
+			numero_processo='1000000-00.2026.8.26.0001',
+			titulo='Caso do lote',
+			tribunal='TJSP',
+			status='ATIVO',
+		)
+		self.search = SearchHistory.objects.create(
+			owner=self.user,
+			data_inicio=date(2026, 2, 1),
+			data_fim=date(2026, 2, 28),
+			tribunais=['TJSP'],
+		)
+
+	def _create_publications(self, start_id, count, numero_processo):
+		# Publicações retornadas pela busca do lote
+		for offset in range(count):
+			self.search.publications.add(Publication.objects.create(
+				owner=self.user,
+				id_api=start_id + offset,
+				numero_processo=numero_processo,
+				tribunal='TJSP',
+				tipo_comunicacao='Intimação',
+				data_disponibilizacao=date(2026, 2, 10 + offset % 10),
+				texto_resumo='Intimação. Prazo de 15 dias.',
+				texto_completo='Intimação. Prazo de 15 dias.',
+			))
+
+	def _integrate(self, **body):
+		payload = {'search_id': self.search.id, 'create_movement': True}
+		payload.update(body)
+		return self.client.post(reverse('publications:batch_integrate'), payload, content_type='application/json')
+
+	def test_links_known_processes_and_creates_movements_once(self):
+		self._create_publications(970000001, 3, '10000000020268260001')
+		self._create_publications(970000101, 2, '9999999-99.2026.8.26.0001')
+		Publication.objects.filter(id_api=970000003).update(integration_status='IGNORED')
+
+		response = self._integrate()
+		self.assertEqual(response.status_code, 200)
+		payload = response.json()
+		self.assertEqual((payload['integrated'], payload['pending'], payload['ignored']), (2, 2, 1))
+		self.assertEqual(payload['movements_created'], 2)
+		self.assertEqual(
+			set(payload['timings_ms']),
+			{'load', 'case_index', 'match', 'update', 'movements', 'total'},
+		)
+
+		self.assertEqual(Publication.objects.filter(case=self.case, integration_status='INTEGRATED').count(), 2)
+		self.assertEqual(
+			Publication.objects.get(id_api=970000101).integration_notes,
+			'Processo nao cadastrado',
+		)
+		movement = CaseMovement.objects.get(case=self.case, publicacao_id=970000001)
+		self.assertEqual(movement.data_limite_prazo, movement.data + timedelta(days=15))
+		self.case.refresh_from_db()
+		self.assertEqual(self.case.data_ultima_movimentacao, date(2026, 2, 11))
+
+		second = self._integrate().json()
+		self.assertEqual(second['movements_created'], 0)
+		self.assertEqual(CaseMovement.objects.filter(case=self.case).count(), 2)
+
+	def test_query_count_does_not_grow_with_batch_size(self):
+		self._create_publications(971000001, 2, '1000000-00.2026.8.26.0001')
+		with CaptureQueriesContext(connection) as small:
+			self._integrate()
+
+		CaseMovement.objects.all().delete()
+		Publication.objects.all().delete()
+		self._create_publications(972000001, 25, '1000000-00.2026.8.26.0001')
+		with CaptureQueriesContext(connection) as large:
+			self._integrate()
+
+		self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+		self.assertEqual(CaseMovement.objects.filter(case=self.case).count(), 25)
+
+
+class PublicationCaseLookupTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_lookup_user', password='123456', email='pub_lookup@example.com')
+		self.case = Case.objects.create(
+			owner=self.user,
+			numero_processo='1000000-00.2026.8.26.0001',
+			titulo='Caso buscado',
+			tribunal='TJSP',
+			status='ATIVO',
+		)
+		for index in range(5):
+			Case.objects.create(
+				owner=self.user,
+				numero_processo=f'200000{index}-00.2026.8.26.0001',
+				tribunal='TJSP',
+				status='ATIVO',
+			)
+
+	def test_lookup_is_a_single_indexed_query(self):
+		with CaptureQueriesContext(connection) as captured:
+			found = _find_case_by_numero_processo('10000000020268260001', user=self.user)
+			missing = _find_case_by_numero_processo('3000000-00.2026.8.26.0001', user=self.user)
+
+		self.assertEqual(found, self.case)
+		self.assertIsNone(missing)
+		self.assertEqual(len(captured.captured_queries), 2)
+		self.assertIn('numero_processo_unformatted', captured.captured_queries[0]['sql'])
+
+
+class PublicationListingCaseSuggestionQueryCountTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_listing_user', password='123456', email='pub_listing@example.com')
+		profile = self.user.profile
+		profile.full_name_oab = 'Teste Listagem'
+		profile.oab_number = '999998'
+		profile.save(update_fields=['full_name_oab', 'oab_number'])
+		self.client.force_login(self.user)
+
+		self.cases = [
+			Case.objects.create(
+				owner=self.user,
+				numero_processo=f'300000{index}-00.2026.8.26.0001',
+				titulo=f'Caso {index}',
+				tribunal='TJSP',
+				status='ATIVO',
+			)
+			for index in range(5)
+		]
+		self.search = SearchHistory.objects.create(
+			owner=self.user,
+			data_inicio=date(2026, 3, 1),
+			data_fim=date(2026, 3, 31),
+			tribunais=['TJSP'],
+		)
+
+	def _create_publications(self, start_id, count):
+		for offset in range(count):
+			publication = Publication.objects.create(
+				owner=self.user,
+				id_api=start_id + offset,
+				numero_processo=self.cases[offset % len(self.cases)].numero_processo,
+				tribunal='TJSP',
+				tipo_comunicacao='Intimação',
+				data_disponibilizacao=date(2026, 3, 10),
+				texto_resumo='Resumo',
+				texto_completo='Texto completo',
+			)
+			self.search.publications.add(publication)
+
+	def _assert_constant_queries(self, url):
+		self._create_publications(980000001, 2)
+		with CaptureQueriesContext(connection) as small:
+			first = self.client.get(url)
+		self._create_publications(981000001, 20)
+		with CaptureQueriesContext(connection) as large:
+			second = self.client.get(url)
+
+		self.assertEqual(first.status_code, 200, first.content)
+		self.assertEqual(len(second.json()['publicacoes']), 22)
+		self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+		return second.json()['publicacoes']
+
+	def test_retrieve_last_search_resolves_suggestions_in_batch(self):
+		publicacoes = self._assert_constant_queries(reverse('publications:retrieve_last_search'))
+		expected = {case.numero_processo: case.id for case in self.cases}
+		for pub in publicacoes:
+			self.assertEqual(pub['case_suggestion']['id'], expected[pub['numero_processo']])
+
+	def test_search_history_detail_resolves_suggestions_in_batch(self):
+		publicacoes = self._assert_constant_queries(
+			reverse('publications:search_history_detail', kwargs={'search_id': self.search.id})
+		)
+		self.assertTrue(all(pub['case_suggestion'] for pub in publicacoes))
+
+
+class PublicationFullTextSearchTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_fts_user', password='123456', email='pub_fts@example.com')
+		self.other_user = User.objects.create_user(username='pub_fts_other', password='123456', email='pub_fts_other@example.com')
+		self.client.force_login(self.user)
+
+		self.strong = self._create(self.user, 990000001, 'Intimação de JOÃO da Silva. João deve se manifestar.')
+		self.weak = self._create(self.user, 990000002, 'Despacho genérico.', texto_completo='Menciona joao em anexo.')
+		self._create(self.user, 990000003, 'Publicação sem relação.')
+		self._create(self.other_user, 990000004, 'João da Silva (outro usuário).')
+
+	@staticmethod
+	def _create(owner, id_api, resumo, texto_completo=None):
+		return Publication.objects.create(
+			owner=owner,
+			id_api=id_api,
+			numero_processo='1000000-00.2026.8.26.0001',
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=date(2026, 3, 10),
+			orgao='Foro de Limeira',
+			texto_resumo=resumo,
+			texto_completo=texto_completo or resumo,
+		)
+
+	def _search(self, **params):
+		response = self.client.get(reverse('publications:local_search'), params)
+		self.assertEqual(response.status_code, 200, response.content)
+		return response.json()
+
+	def test_accent_insensitive_ranked_and_scoped(self):
+		payload = self._search(q='joao')
+
+		self.assertEqual(payload['count'], 2)
+		self.assertEqual([item['id_api'] for item in payload['results']], [990000001, 990000002])
+		self.assertGreater(payload['results'][0]['rank'], payload['results'][1]['rank'])
+		self.assertNotIn('texto_completo', payload['results'][0])
+
+	def test_prefix_match_and_pagination(self):
+		first = self._search(q='JOÃ', limit=1)
+		second = self._search(q='JOÃ', limit=1, offset=1)
+
+		self.assertEqual(first['count'], 2)
+		self.assertIsNotNone(first['next'])
+		self.assertIsNone(second['next'])
+		self.assertEqual(second['results'][0]['id_api'], 990000002)
+
+	def test_index_follows_updates_and_deletes(self):
+		Publication.objects.filter(id=self.weak.id).update(texto_resumo='Sem nomes', texto_completo='Sem nomes')
+		self.assertEqual(self._search(q='joao')['count'], 1)
+
+		self.strong.texto_resumo = 'Intimação de Maria'
+		self.strong.texto_completo = 'Intimação de Maria'
+		self.strong.save()
+		self.assertEqual(self._search(q='joao')['count'], 0)
+
+		Publication.objects.filter(id=self.strong.id).delete()
+		self.assertEqual(self._search(q='maria')['count'], 0)
+
+	def test_history_text_query_uses_index(self):
+		search = SearchHistory.objects.create(
+			owner=self.user,
+			data_inicio=date(2026, 3, 1),
+			data_fim=date(2026, 3, 31),
+			tribunais=['TJSP'],
+		)
+		search.publications.add(self.strong, self.weak)
+		# Mesmo período, mas não retornou as publicações com "João"
+		SearchHistory.objects.create(
+			owner=self.user,
+			data_inicio=date(2026, 3, 1),
+			data_fim=date(2026, 3, 31),
+			tribunais=['TJSP'],
+		)
+
+		response = self.client.get(reverse('publications:search_history'), {'q': 'joão silva'})
+
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertEqual([item['id'] for item in response.json()['results']], [search.id])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'triggers FTS5 só existem no SQLite')
+class PublicationSearchIndexTriggerTests(TestCase):
+	def test_triggers_exist_after_migrate(self):
+		with connection.cursor() as cursor:
+			cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+			triggers = {row[0] for row in cursor.fetchall()}
+		expected = set(FULLTEXT_INDEX.sqlite_triggers)
+		if DIGITS_INDEX.sqlite_supported():
+			expected |= set(DIGITS_INDEX.sqlite_triggers)
+		self.assertLessEqual(expected, triggers)
+		self.assertEqual(missing_sqlite_triggers(connection), {})
+
+	def test_rebuild_command_restores_dropped_triggers(self):
+		# Simula uma migração futura que recria publications_publication
+		with connection.cursor() as cursor:
+			for name in FULLTEXT_INDEX.sqlite_triggers:
+				cursor.execute(f'DROP TRIGGER {name}')
+		owner = User.objects.create_user(username='pub_trigger_user', password='123456')
+		publication = Publication.objects.create(
+			owner=owner,
+			id_api=996000001,
+			numero_processo='1000000-00.2026.8.26.0001',
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=date(2026, 3, 10),
+			texto_resumo='Intimação de Conceição',
+			texto_completo='Intimação de Conceição',
+		)
+		queryset = Publication.objects.filter(owner=owner)
+		self.assertEqual(search_publication_ids(queryset, 'conceicao'), (0, []))
+
+		with self.assertRaisesMessage(CommandError, 'publications_publication_fts_ai'):
+			call_command('rebuild_publication_search_index', '--check', stdout=StringIO())
+		out = StringIO()
+		call_command('rebuild_publication_search_index', stdout=out)
+		self.assertIn('missing_triggers=3', out.getvalue())
+
+		self.assertEqual(missing_sqlite_triggers(connection), {})
+		total, rows = search_publication_ids(queryset, 'conceicao')
+		self.assertEqual((total, [row[0] for row in rows]), (1, [publication.id]))
+
+
+class SearchHistoryMembershipTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_member_user', password='123456', email='pub_member@example.com')
+		profile = self.user.profile
+		profile.full_name_oab = 'Teste Membro'
+		profile.oab_number = '999997'
+		profile.save(update_fields=['full_name_oab', 'oab_number'])
+		self.client.force_login(self.user)
+		pje_cache.clear_cache()
+
+	@staticmethod
+	def _payload(id_api, numero_processo):
+		return {
+			'id_api': id_api,
+			'numero_processo': numero_processo,
+			'tribunal': 'TJSP',
+			'tipo_comunicacao': 'Intimação',
+			'data_disponibilizacao': '2026-03-10',
+			'orgao': '1ª Vara',
+			'meio': 'D',
+			'texto_resumo': 'Resumo',
+			'texto_completo': 'Texto completo',
+			'link_oficial': None,
+			'hash': 'abc',
+		}
+
+	def test_search_links_returned_publications_and_history_queries_by_join(self):
+		result = {
+			'success': True,
+			'total_publicacoes': 2,
+			'publicacoes': [
+				self._payload(995000001, '1000000-00.2026.8.26.0001'),
+				self._payload(995000002, '2000000-00.2026.8.26.0001'),
+			],
+			'erros': None,
+		}
+		with patch('apps.publications.views.PJeComunicaService.fetch_publications', return_value=result):
+			response = self.client.get(
+				reverse('publications:search'),
+				{'data_inicio': '2026-03-10', 'data_fim': '2026-03-10'},
+			)
+		self.assertEqual(response.status_code, 200, response.content)
+
+		search = SearchHistory.objects.get(owner=self.user)
+		self.assertEqual(
+			set(search.publications.values_list('id_api', flat=True)),
+			{995000001, 995000002},
+		)
+		# Publicação do mesmo período que a busca não retornou
+		Publication.objects.create(
+			owner=self.user,
+			id_api=995000003,
+			numero_processo='3000000-00.2026.8.26.0001',
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=date(2026, 3, 10),
+			texto_resumo='Resumo',
+			texto_completo='Texto completo',
+		)
+
+		detail = self.client.get(reverse('publications:search_history_detail', kwargs={'search_id': search.id})).json()
+		self.assertEqual({pub['id_api'] for pub in detail['publicacoes']}, {995000001, 995000002})
+
+		history = self.client.get(reverse('publications:search_history'), {'q': '20000000020268260001'}).json()
+		self.assertEqual([item['id'] for item in history['results']], [search.id])
+		history = self.client.get(reverse('publications:search_history'), {'q': '3000000'}).json()
+		self.assertEqual(history['results'], [])
+
+		# Última busca e integração em lote também usam a associação, não o período
+		last_search = self.client.get(reverse('publications:last_search')).json()
+		self.assertEqual(last_search['last_search']['total_publicacoes'], 2)
+		retrieved = self.client.get(reverse('publications:retrieve_last_search')).json()
+		self.assertEqual({pub['id_api'] for pub in retrieved['publicacoes']}, {995000001, 995000002})
+		batch = self.client.post(
+			reverse('publications:batch_integrate'),
+			{'search_id': search.id},
+			content_type='application/json',
+		).json()
+		self.assertEqual(batch['integrated'] + batch['pending'] + batch['ignored'], 2)
+		self.assertEqual(Publication.objects.get(id_api=995000003).integration_notes, '')
+		self.assertEqual(Publication.objects.get(id_api=995000001).integration_notes, 'Processo nao cadastrado')
+
+
+class PublicationProcessDigitsSearchTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='pub_digits_user', password='123456', email='pub_digits@example.com')
+		self.client.force_login(self.user)
+
+	def _publication(self, id_api, numero_processo, owner=None):
+		return Publication.objects.create(
+			owner=owner or self.user,
+			id_api=id_api,
+			numero_processo=numero_processo,
+			tribunal='TJSP',
+			tipo_comunicacao='Intimação',
+			data_disponibilizacao=date(2026, 3, 10),
+			texto_resumo='Resumo',
+			texto_completo='Texto completo',
+		)
+
+	def test_digits_key_is_kept_in_sync(self):
+		pub = self._publication(996000001, '0000623-69.2026.8.26.0320')
+		self.assertEqual(pub.numero_processo_digits, '00006236920268260320')
+
+		pub.numero_processo = '0000624-69.2026.8.26.0320'
+		pub.save(update_fields=['numero_processo'])
+		pub.refresh_from_db()
+		self.assertEqual(pub.numero_processo_digits, '00006246920268260320')
+
+		Publication.objects.filter(id=pub.id).update(numero_processo='1111111-11.2026.8.26.0001', numero_processo_digits='11111111120268260001')
+		self.assertEqual(
+			list(filter_by_process_digits(Publication.objects.all(), '1111111-11').values_list('id', flat=True)),
+			[pub.id],
+		)
+		self.assertFalse(filter_by_process_digits(Publication.objects.all(), '00006246920').exists())
+
+	def test_partial_number_matches_with_or_without_formatting(self):
+		target = self._publication(996000002, '0000623-69.2026.8.26.0320')
+		self._publication(996000003, '1000777-11.2025.8.26.0100')
+		other = User.objects.create_user(username='pub_digits_other', password='123456', email='pub_digits_other@example.com')
+		self._publication(996000004, '0000623-69.2026.8.26.0321', owner=other)
+
+		queryset = Publication.objects.filter(owner=self.user)
+		for query in ('00006236920268260320', '0000623-69.2026', '6920268', '8.26.0320'):
+			self.assertEqual(list(filter_by_process_digits(queryset, query).values_list('id', flat=True)), [target.id], query)
+		self.assertFalse(filter_by_process_digits(queryset, '').exists())
+
+		search = SearchHistory.objects.create(
+			owner=self.user,
+			data_inicio=date(2026, 3, 10),
+			data_fim=date(2026, 3, 10),
+			tribunais=['TJSP'],
+			total_publicacoes=1,
+		)
+		search.publications.add(target)
+
+		for query in ('0000623-69.2026', '62369202682'):
+			history = self.client.get(reverse('publications:search_history'), {'q': query}).json()
+			self.assertEqual([item['id'] for item in history['results']], [search.id], query)
+		history = self.client.get(reverse('publications:search_history'), {'q': '1000777-11'}).json()
+		self.assertEqual(history['results'], [])
@@ -11,11 +11,13 @@ urlpatterns = [
     path('search', views.search_publications, name='search'),
     path('last-search', views.get_last_search, name='last_search'),
     path('retrieve-last-search', views.retrieve_last_search_publications, name='retrieve_last_search'),
+    path('local-search', views.search_local_publications, name='local_search'),
     path('history', views.get_search_history, name='search_history'),
     path('history/delete', views.delete_search_history, name='delete_search_history'),
     path('history/<int:search_id>', views.get_search_history_detail, name='search_history_detail'),
     path('delete-multiple', views.delete_multiple_publications, name='delete_multiple'),
     path('delete-all', views.delete_all_publications, name='delete_all'),
+    path('batch-integrate', views.batch_integrate_publications, name='batch_integrate'),
     path('by-case/<int:case_id>', views.get_publications_by_case, name='publications_by_case'),
     path('<int:id_api>/integrate', views.integrate_publication, name='integrate_publication'),
     path('<int:id_api>/create-movement', views.create_movement_from_publication, name='create_movement_from_publication'),
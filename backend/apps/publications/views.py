@@ -6,8 +6,9 @@ import re
 import time
 import unicodedata
 import logging
-from datetime import datetime, timedelta
-from django.db import models, IntegrityError
+from urllib.parse import urlencode
+from datetime import date, datetime, timedelta
+from django.db import DatabaseError, IntegrityError, models, transaction
 from django.conf import settings
 from django.utils import timezone
 from rest_framework.decorators import api_view
@@ -16,10 +17,13 @@ from rest_framework import status
 from apps.accounts.permissions import is_master_user
 from apps.accounts.scope import apply_user_owned_or_shared, build_owner_scope_q
 
-from services.pje_comunica import PJeComunicaService
+from services.pje_comunica import PJeComunicaService, get_pje_http_session
 from apps.notifications.models import Notification
-from apps.cases.models import Case, CaseMovement
+from apps.notifications.stats import invalidate_notification_stats
+from apps.cases.models import Case, CaseMovement, normalize_numero_processo, process_number_query_digits
 from .models import Publication, PublicationDeletionTombstone, SearchHistory
+from .search import filter_by_process_digits, matching_publications_queryset, search_publications as fulltext_search_publications
+from .sync import fetch_publications_incremental, invalidate_coverage, invalidate_coverage_for_publications
 
 
 logger = logging.getLogger(__name__)
@@ -113,48 +117,69 @@ def normalize_string(text):
 
 def normalize_processo_numero(numero_processo):
     """Remove caracteres nao numericos do numero do processo."""
-    if not numero_processo:
-        return ''
-    return ''.join(char for char in str(numero_processo) if char.isdigit())
+    return normalize_numero_processo(numero_processo)
+
+
+def _case_queryset_for_user(user=None):
+    case_queryset = Case.objects.all()
+    if user is not None and getattr(user, 'is_authenticated', False):
+        if is_master_user(user):
+            case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=False))
+        else:
+            case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=True))
+    return case_queryset
 
 
 def _find_case_by_numero_processo(numero_processo, user=None):
     """
-    Busca um caso pelo número do processo com fallback robusto.
-
-    Ordem de tentativa:
-    1) Match exato em numero_processo_unformatted (mais eficiente)
-    2) Match exato em numero_processo (formatado)
-    3) Fallback em Python normalizando ambos os formatos
+    Busca um caso pelo número do processo.
 
-    O fallback cobre casos legados/manuais onde numero_processo_unformatted
-    possa estar vazio ou inconsistente.
+    Uma única consulta indexada em `numero_processo_unformatted`, que o
+    `Case.save` mantém sempre igual aos dígitos de `numero_processo`
+    (linhas legadas: migração 0029 / `repair_case_process_keys`).
     """
     numero_limpo = normalize_processo_numero(numero_processo)
     if not numero_limpo:
         return None
+    return _case_queryset_for_user(user).filter(numero_processo_unformatted=numero_limpo).first()
 
-    case_queryset = Case.objects.all()
-    if user is not None and user.is_authenticated:
-        if is_master_user(user):
-            case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=False))
-        else:
-            case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=True))
 
-    case = case_queryset.filter(numero_processo_unformatted=numero_limpo).first()
-    if case:
-        return case
+def _find_cases_by_numeros_processo(numeros_processo, user=None):
+    """Versão em lote: {numero_limpo: case} para N números em uma única consulta."""
+    numeros_limpos = {normalize_processo_numero(numero) for numero in numeros_processo or []}
+    numeros_limpos.discard('')
+    if not numeros_limpos:
+        return {}
 
-    case = case_queryset.filter(numero_processo=numero_processo).first()
-    if case:
-        return case
+    cases_by_numero = {}
+    candidates = _case_queryset_for_user(user).filter(
+        numero_processo_unformatted__in=numeros_limpos
+    ).only('id', 'numero_processo', 'numero_processo_unformatted', 'titulo')
+    for case in candidates:
+        # Mesma ordem do `.first()` de `_find_case_by_numero_processo`
+        cases_by_numero.setdefault(case.numero_processo_unformatted, case)
+    return cases_by_numero
 
-    for candidate in case_queryset.only('id', 'numero_processo', 'numero_processo_unformatted', 'titulo'):
-        candidate_numero = candidate.numero_processo_unformatted or candidate.numero_processo
-        if normalize_processo_numero(candidate_numero) == numero_limpo:
-            return candidate
 
-    return None
+def _serialize_case_suggestion(case):
+    return {
+        'id': case.id,
+        'numero_processo': case.numero_processo,
+        'titulo': case.titulo,
+    }
+
+
+def _resolve_case_suggestions(numeros_processo, user=None):
+    """
+    Resolvedor em lote de sugestões de caso usado pelos endpoints de listagem.
+
+    Recebe N números de processo (qualquer formato) e retorna
+    {numero_limpo: {id, numero_processo, titulo}} com uma única consulta.
+    """
+    return {
+        numero_limpo: _serialize_case_suggestion(case)
+        for numero_limpo, case in _find_cases_by_numeros_processo(numeros_processo, user=user).items()
+    }
 
 
 def _to_bool(value, default=False):
@@ -196,12 +221,122 @@ def _extract_prazo_days(texto_publicacao):
     return None
 
 
+def _save_fetched_publications(result, owner):
+    """
+    Callback `ingest` de `fetch_publications_incremental`: descarta excluídas
+    (tombstones) e salva em lote. Grava em `result` as publicações filtradas,
+    total_novas_salvas e total_duplicadas.
+    """
+    result['total_novas_salvas'] = 0
+    if not (result.get('success') and result.get('total_publicacoes', 0) > 0):
+        return
+    publicacoes = _filter_tombstoned_publications(result.get('publicacoes', []), owner=owner)
+    result['publicacoes'] = publicacoes
+    result['total_publicacoes'] = len(publicacoes)
+
+    # Salvar em lote (deduplicação por (owner, id_api))
+    ingest_stats = _ingest_publications(publicacoes, owner=owner)
+    result['total_novas_salvas'] = ingest_stats['novas']
+    result['total_duplicadas'] = ingest_stats['duplicadas']
+
+
+def sync_today_publications(user, lookback_days=0, use_cache=True, incremental=True, enrich=True, record_history=True):
+    """
+    Busca e salva as publicações de hoje (com retrocesso opcional) para `user`.
+
+    Núcleo de GET /api/publications/today, reaproveitado pela sincronização
+    automática do agendador (`run_scheduler`). Quem chama valida a identidade
+    (nome/OAB) do perfil antes.
+
+    Args:
+        enrich: False pula o enriquecimento da resposta (status de integração,
+            sugestão de processo) quando ninguém vai exibi-la
+        record_history: False não grava `SearchHistory` (sincronização
+            automática: não substitui a "última busca" do usuário nem polui o
+            histórico)
+
+    Returns:
+        Dict no formato da resposta do endpoint (com total_novas_salvas e duration_seconds).
+    """
+    owner = user if user.is_authenticated else None
+    oab_number, advogada_nome, tribunais_configurados = _get_user_publication_identity(user)
+    excluded_oabs, excluded_keywords = _get_user_publication_exclusion_rules(user)
+
+    # Iniciar cronômetro
+    start_time = time.time()
+    
+    # Janela de data (hoje com retrocesso opcional)
+    hoje = datetime.now().date()
+    data_inicio = hoje - timedelta(days=lookback_days)
+    data_fim = hoje
+    
+    # Busca publicações usando o service
+    # Sincronização incremental: só dias ainda não cobertos vão ao PJe
+    result = fetch_publications_incremental(
+        owner=owner,
+        oab=oab_number,
+        nome_advogado=advogada_nome,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        tribunais=tribunais_configurados,
+        excluded_oabs=excluded_oabs,
+        excluded_keywords=excluded_keywords,
+        use_cache=use_cache,
+        incremental=incremental,
+        # Publicações salvas antes de a janela ser marcada como sincronizada
+        ingest=lambda fetched: _save_fetched_publications(fetched, owner),
+    )
+    
+    # Enriquecer, notificar e criar histórico
+    total_novas = result.get('total_novas_salvas', 0)
+    publicacoes = []
+    if result.get('success') and result.get('total_publicacoes', 0) > 0:
+        publicacoes = result['publicacoes']
+        
+        # Enriquecer publicações com dados do banco (integration_status, case_id, etc)
+        if enrich:
+            result['publicacoes'] = _attach_case_suggestions(
+                _enrich_publications_with_db_data(publicacoes, owner=owner),
+                user=user,
+            )
+        
+        # Criar notificações para novas publicações
+        _create_publication_notifications(publicacoes, owner=owner)
+    
+    # Calcular duração
+    duration = time.time() - start_time
+    
+    # Criar histórico de busca
+    if record_history:
+        search_history = SearchHistory.objects.create(
+            owner=owner,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            tribunais=tribunais_configurados,
+            total_publicacoes=result.get('total_publicacoes', 0),
+            total_novas=total_novas,
+            duration_seconds=round(duration, 2),
+            search_params={
+                'lookback_days': lookback_days,
+                'oab': oab_number,
+                'nome_advogado': advogada_nome,
+            }
+        )
+        _link_search_history_publications(search_history, publicacoes, owner=owner)
+    
+    # Adicionar info de novas publicações na resposta
+    result['total_novas_salvas'] = total_novas
+    result['duration_seconds'] = round(duration, 2)
+    
+    return result
+
+
 @api_view(['GET'])
 def fetch_today_publications(request):
     """
     Busca publicações do dia atual, com opção de incluir dias anteriores.
     
-    GET /api/publications/today?lookback_days=1
+    GET /api/publications/today?lookback_days=1&bypass_cache=0&incremental=1
     
     Response:
     {
@@ -209,6 +344,7 @@ def fetch_today_publications(request):
         "data": "2026-02-16",
         "total_publicacoes": 5,
         "total_tribunais_consultados": 4,
+        "cache": {"ativo": true, "hits": 6, "misses": 2},
         "publicacoes": [
             {
                 "id_api": 516309493,
@@ -230,9 +366,7 @@ def fetch_today_publications(request):
         return denied
     try:
         user = request.user
-        owner = user if user.is_authenticated else None
-        oab_number, advogada_nome, tribunais_configurados = _get_user_publication_identity(user)
-        excluded_oabs, excluded_keywords = _get_user_publication_exclusion_rules(user)
+        oab_number, advogada_nome, _ = _get_user_publication_identity(user)
 
         if not (str(oab_number).strip() and str(advogada_nome).strip()):
             return Response(
@@ -249,68 +383,18 @@ def fetch_today_publications(request):
         except (TypeError, ValueError):
             lookback_days = 0
         lookback_days = max(0, min(lookback_days, 30))
-
-        # Iniciar cronômetro
-        start_time = time.time()
-        
-        # Janela de data (hoje com retrocesso opcional)
-        hoje = datetime.now().date()
-        data_inicio = hoje - timedelta(days=lookback_days)
-        data_fim = hoje
-        
-        # Busca publicações usando o service
-        result = PJeComunicaService.fetch_publications(
-            oab=oab_number,
-            nome_advogado=advogada_nome,
-            data_inicio=data_inicio.isoformat(),
-            data_fim=data_fim.isoformat(),
-            tribunais=tribunais_configurados,
-            excluded_oabs=excluded_oabs,
-            excluded_keywords=excluded_keywords,
-        )
-        
-        # Salvar publicações no banco e criar histórico
-        total_novas = 0
-        if result.get('success') and result.get('total_publicacoes', 0) > 0:
-            publicacoes = _filter_tombstoned_publications(result.get('publicacoes', []), owner=owner)
-            result['publicacoes'] = publicacoes
-            result['total_publicacoes'] = len(publicacoes)
-            
-            # Salvar cada publicação (deduplicação automática via id_api unique)
-            total_novas = _save_publications_to_db(publicacoes, owner=owner)
-            
-            # Enriquecer publicações com dados do banco (integration_status, case_id, etc)
-            result['publicacoes'] = _attach_case_suggestions(
-                _enrich_publications_with_db_data(publicacoes, owner=owner),
-                user=user,
-            )
-            
-            # Criar notificações para novas publicações
-            _create_publication_notifications(publicacoes, owner=owner)
-        
-        # Calcular duração
-        duration = time.time() - start_time
-        
-        # Criar histórico de busca
-        SearchHistory.objects.create(
-            owner=owner,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            tribunais=tribunais_configurados,
-            total_publicacoes=result.get('total_publicacoes', 0),
-            total_novas=total_novas,
-            duration_seconds=round(duration, 2),
-            search_params={
-                'lookback_days': lookback_days,
-                'oab': oab_number,
-                'nome_advogado': advogada_nome,
-            }
+        # bypass_cache=1 força nova consulta ao PJe (ignora cache local de respostas)
+        use_cache = not _to_bool(request.query_params.get('bypass_cache'), default=False)
+        # incremental=0 consulta a janela inteira, ignorando a cobertura já sincronizada
+        incremental = _to_bool(request.query_params.get('incremental'), default=True)
+
+        result = sync_today_publications(
+            user,
+            lookback_days=lookback_days,
+            use_cache=use_cache,
+            incremental=incremental,
         )
         
-        # Adicionar info de novas publicações na resposta
-        result['total_novas_salvas'] = total_novas
-        result['duration_seconds'] = round(duration, 2)
-        
         return Response(result, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -337,6 +421,9 @@ def search_publications(request):
         - data_inicio (required): Data inicial (YYYY-MM-DD)
         - data_fim (required): Data final (YYYY-MM-DD)
         - tribunais (optional, multi): Lista de tribunais (ex: TJSP, TRF3)
+        - bypass_cache (optional): 1 para ignorar o cache local de respostas do PJe
+        - incremental (optional, padrão 1): 0 para consultar a janela inteira no PJe,
+          ignorando os dias já sincronizados
         
     Response: Similar to fetch_today_publications
     """
@@ -367,6 +454,25 @@ def search_publications(request):
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            data_inicio = date.fromisoformat(data_inicio)
+            data_fim = date.fromisoformat(data_fim)
+        except ValueError:
+            return Response(
+                {
+                    'success': False,
+                    'error': 'Datas inválidas: use o formato AAAA-MM-DD em data_inicio e data_fim'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if data_inicio > data_fim:
+            return Response(
+                {
+                    'success': False,
+                    'error': 'data_inicio não pode ser posterior a data_fim'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # Tribunais selecionados (opcional)
         tribunais = request.query_params.getlist('tribunais')
@@ -374,12 +480,16 @@ def search_publications(request):
             tribunais = tribunais_configurados
         
         # Filtro histórico de notificações (retroactive_days) removido.
+        use_cache = not _to_bool(request.query_params.get('bypass_cache'), default=False)
+        incremental = _to_bool(request.query_params.get('incremental'), default=True)
         
         # Iniciar cronômetro
         start_time = time.time()
         
         # Busca publicações usando o service com método genérico
-        result = PJeComunicaService.fetch_publications(
+        # Sincronização incremental: só dias ainda não cobertos vão ao PJe
+        result = fetch_publications_incremental(
+            owner=owner,
             oab=oab_number,
             nome_advogado=advogada_nome,
             data_inicio=data_inicio,
@@ -387,17 +497,17 @@ def search_publications(request):
             tribunais=tribunais,
             excluded_oabs=excluded_oabs,
             excluded_keywords=excluded_keywords,
+            use_cache=use_cache,
+            incremental=incremental,
+            # Publicações salvas antes de a janela ser marcada como sincronizada
+            ingest=lambda fetched: _save_fetched_publications(fetched, owner),
         )
         
-        # Salvar publicações no banco e criar histórico
-        total_novas = 0
+        # Enriquecer, notificar e criar histórico
+        total_novas = result.get('total_novas_salvas', 0)
+        publicacoes = []
         if result.get('success') and result.get('total_publicacoes', 0) > 0:
-            publicacoes = _filter_tombstoned_publications(result.get('publicacoes', []), owner=owner)
-            result['publicacoes'] = publicacoes
-            result['total_publicacoes'] = len(publicacoes)
-            
-            # Salvar cada publicação (deduplicação automática via id_api unique)
-            total_novas = _save_publications_to_db(publicacoes, owner=owner)
+            publicacoes = result['publicacoes']
             
             # Enriquecer publicações com dados do banco (integration_status, case_id, etc)
             result['publicacoes'] = _attach_case_suggestions(
@@ -412,10 +522,10 @@ def search_publications(request):
         duration = time.time() - start_time
         
         # Criar histórico de busca
-        SearchHistory.objects.create(
+        search_history = SearchHistory.objects.create(
             owner=owner,
-            data_inicio=datetime.fromisoformat(data_inicio).date(),
-            data_fim=datetime.fromisoformat(data_fim).date(),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
             tribunais=tribunais,
             total_publicacoes=result.get('total_publicacoes', 0),
             total_novas=total_novas,
@@ -425,6 +535,7 @@ def search_publications(request):
                 'nome_advogado': advogada_nome,
             }
         )
+        _link_search_history_publications(search_history, publicacoes, owner=owner)
         
         # Adicionar info de novas publicações na resposta
         result['total_novas_salvas'] = total_novas
@@ -447,7 +558,6 @@ def debug_search(request):
     denied = _deny_master_publications(request)
     if denied is not None:
         return denied
-    import requests
     if not getattr(settings, 'DEBUG', False):
         return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -468,8 +578,9 @@ def debug_search(request):
     params_nome = {'siglaTribunal': tribunal, 'nomeAdvogado': nome, 'dataDisponibilizacaoInicio': data_inicio, 'dataDisponibilizacaoFim': data_fim}
     api_url = getattr(settings, 'PJE_COMUNICA_API_URL', 'https://comunicaapi.pje.jus.br/api/v1/comunicacao')
     try:
-        response_oab = requests.get(api_url, params=params_oab, timeout=15)
-        response_nome = requests.get(api_url, params=params_nome, timeout=15)
+        session = get_pje_http_session()
+        response_oab = session.get(api_url, params=params_oab, timeout=15)
+        response_nome = session.get(api_url, params=params_nome, timeout=15)
         return Response({
             'oab': {
                 'url': response_oab.url,
@@ -486,20 +597,57 @@ def debug_search(request):
         return Response({'error': str(e)}, status=500)
 
 
+def _publication_notification_priority(tipo_comunicacao):
+    """Prioridade da notificação baseada no tipo de comunicação."""
+    tipo_comunicacao = (tipo_comunicacao or '').lower()
+    if 'intimação' in tipo_comunicacao or 'citação' in tipo_comunicacao:
+        return 'high'
+    if 'despacho' in tipo_comunicacao:
+        return 'medium'
+    return 'low'
+
+
+def _build_publication_notification(pub, owner=None):
+    numero_processo = pub.get('numero_processo', 'Sem número')
+    tribunal = pub.get('tribunal', '')
+    link_oficial = pub.get('link_oficial')  # Link para site oficial
+
+    return Notification(
+        owner=owner,
+        type='publication',
+        priority=_publication_notification_priority(pub.get('tipo_comunicacao', '')),
+        title=f'Nova Publicação - {tribunal}',
+        message=f'Processo: {numero_processo}\nTipo: {pub.get("tipo_comunicacao", "N/A")}\nÓrgão: {pub.get("orgao", "N/A")}',
+        link=link_oficial if link_oficial else '/publications',  # Link oficial ou fallback
+        source_kind=Notification.SOURCE_PUBLICATION,
+        source_id=str(pub.get('id_api')),
+        metadata={
+            'id_api': pub.get('id_api'),
+            'numero_processo': numero_processo,
+            'tribunal': tribunal,
+            'data_disponibilizacao': pub.get('data_disponibilizacao'),
+            'tipo_comunicacao': pub.get('tipo_comunicacao'),
+            'link_oficial': link_oficial,  # Guardar link no metadata também
+        }
+    )
+
+
 def _create_publication_notifications(publicacoes, owner=None):
     """
     Helper para criar notificações de novas publicações.
     Cria apenas se não existir notificação para aquela publicação específica
-    (deduplicado por id_api).
-    
+    (deduplicado por id_api, via colunas indexadas source_kind/source_id).
+
+    Resolve as já notificadas em uma única consulta e insere as novas com
+    um único `bulk_create`.
+
     Args:
-        publicacoes: Lista de publicações
-        retroactive_days: (REMOVIDO) – filtro histórico removido para evitar
-                         confusão; notificações são criadas para as publicações
-                         retornadas pela busca (limitadas por max_per_search).
+        publicacoes: Lista de publicações (limitada por max_per_search)
+        owner: Dono das notificações (None = sem filtro de dono na deduplicação)
+
+    Returns:
+        Quantidade de notificações criadas.
     """
-    from datetime import datetime
-    
     max_per_search = getattr(settings, 'PUBLICATIONS_NOTIFICATION_MAX_PER_SEARCH', 5)
     try:
         max_per_search = int(max_per_search)
@@ -507,102 +655,183 @@ def _create_publication_notifications(publicacoes, owner=None):
         max_per_search = 5
     max_per_search = max(0, min(max_per_search, 50))
 
-    notifications_created = 0
+    candidates = {}
     for pub in publicacoes[:max_per_search]:
-        # Verificar se já existe notificação para esta publicação
-        notification_exists = Notification.objects.filter(
-            type='publication',
-            metadata__id_api=pub.get('id_api')
-        )
-        if owner is not None:
-            notification_exists = notification_exists.filter(owner=owner)
-        notification_exists = notification_exists.exists()
-        
-        if notification_exists:
-            continue
-        
-        # Determinar prioridade baseada no tipo de comunicação
-        tipo_comunicacao = pub.get('tipo_comunicacao', '').lower()
-        if 'intimação' in tipo_comunicacao or 'citação' in tipo_comunicacao:
-            priority = 'high'
-        elif 'despacho' in tipo_comunicacao:
-            priority = 'medium'
-        else:
-            priority = 'low'
-        
-        # Criar notificação
-        numero_processo = pub.get('numero_processo', 'Sem número')
-        tribunal = pub.get('tribunal', '')
-        link_oficial = pub.get('link_oficial')  # Link para site oficial
-        
-        Notification.objects.create(
-            owner=owner,
-            type='publication',
-            priority=priority,
-            title=f'Nova Publicação - {tribunal}',
-            message=f'Processo: {numero_processo}\nTipo: {pub.get("tipo_comunicacao", "N/A")}\nÓrgão: {pub.get("orgao", "N/A")}',
-            link=link_oficial if link_oficial else '/publications',  # Link oficial ou fallback
-            metadata={
-                'id_api': pub.get('id_api'),
-                'numero_processo': numero_processo,
-                'tribunal': tribunal,
-                'data_disponibilizacao': pub.get('data_disponibilizacao'),
-                'tipo_comunicacao': pub.get('tipo_comunicacao'),
-                'link_oficial': link_oficial,  # Guardar link no metadata também
+        candidates.setdefault(str(pub.get('id_api')), pub)
+    if not candidates:
+        return 0
+
+    already_notified = Notification.objects.filter(
+        source_kind=Notification.SOURCE_PUBLICATION,
+        source_id__in=list(candidates),
+    )
+    if owner is not None:
+        already_notified = already_notified.filter(owner=owner)
+    already_notified = set(already_notified.values_list('source_id', flat=True))
+
+    notifications = [
+        _build_publication_notification(pub, owner=owner)
+        for source_id, pub in candidates.items()
+        if source_id not in already_notified
+    ]
+    if notifications:
+        Notification.objects.bulk_create(notifications)
+        invalidate_notification_stats([owner.id if owner is not None else None])
+    return len(notifications)
+
+
+BULK_INGEST_CHUNK_SIZE = 500
+
+# Campos já persistidos em colunas próprias; não precisam ser duplicados em search_metadata.
+_SEARCH_METADATA_EXCLUDED_FIELDS = {'texto_completo', 'texto_resumo'}
+
+
+def _parse_publication_id_api(pub):
+    raw_id = (pub or {}).get('id_api')
+    try:
+        return int(raw_id) if raw_id is not None and str(raw_id).strip() != '' else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_publication_instance(pub, id_api, owner=None):
+    data_disp = pub.get('data_disponibilizacao')
+    if not data_disp:
+        raise ValueError('data_disponibilizacao ausente')
+    data_disp_date = datetime.fromisoformat(data_disp).date()
+    return Publication(
+        id_api=id_api,
+        owner=owner,
+        numero_processo=pub.get('numero_processo'),
+        # bulk_create não chama save(): mantém a chave de dígitos aqui
+        numero_processo_digits=normalize_processo_numero(pub.get('numero_processo')),
+        tribunal=pub.get('tribunal', ''),
+        tipo_comunicacao=pub.get('tipo_comunicacao', ''),
+        data_disponibilizacao=data_disp_date,
+        orgao=pub.get('orgao', ''),
+        meio=pub.get('meio', ''),
+        texto_resumo=pub.get('texto_resumo', ''),
+        texto_completo=pub.get('texto_completo', ''),
+        link_oficial=pub.get('link_oficial'),
+        hash_pub=pub.get('hash'),
+        integration_status='PENDING',
+        search_metadata={
+            'original_data': {
+                key: value for key, value in pub.items() if key not in _SEARCH_METADATA_EXCLUDED_FIELDS
             }
-        )
-        notifications_created += 1
+        },
+    )
 
 
-def _save_publications_to_db(publicacoes, owner=None):
+def _existing_publication_ids(id_apis, owner=None):
+    """(owner, id_api) já salvos, em consultas de até BULK_INGEST_CHUNK_SIZE ids."""
+    base_qs = Publication.objects.filter(owner=owner) if owner is not None else Publication.objects.filter(owner__isnull=True)
+    id_apis = list(id_apis)
+    existing = set()
+    for offset in range(0, len(id_apis), BULK_INGEST_CHUNK_SIZE):
+        chunk = id_apis[offset:offset + BULK_INGEST_CHUNK_SIZE]
+        existing.update(base_qs.filter(id_api__in=chunk).values_list('id_api', flat=True))
+    return existing
+
+
+def _ingest_publications(publicacoes, owner=None):
     """
-    Salva publicações no banco de dados local.
-    Retorna quantidade de publicações novas salvas (ignora duplicadas).
+    Salva publicações em lote (bulk) no banco de dados local.
+
+    1. Uma consulta (por bloco) resolve quais (owner, id_api) já existem;
+    2. As novas são inseridas com `bulk_create(ignore_conflicts=True)` em blocos.
+
+    Funciona em SQLite e PostgreSQL; a constraint (owner, id_api) continua sendo
+    a garantia final contra duplicatas em buscas concorrentes.
+
+    Returns:
+        {'novas': int, 'duplicadas': int, 'invalidas': int}
     """
-    total_novas = 0
-    
-    for pub in publicacoes:
-        raw_id = (pub or {}).get('id_api')
-        try:
-            id_api = int(raw_id) if raw_id is not None and str(raw_id).strip() != '' else None
-        except (TypeError, ValueError):
-            id_api = None
+    pending = {}
+    duplicates = 0
+    invalid = 0
 
+    for pub in publicacoes or []:
+        id_api = _parse_publication_id_api(pub)
         if not id_api:
+            invalid += 1
+            continue
+        if id_api in pending:
+            duplicates += 1
             continue
+        pending[id_api] = pub
+
+    if not pending:
+        return {'novas': 0, 'duplicadas': duplicates, 'invalidas': invalid}
 
-        # Evitar IntegrityError dentro de transações atômicas (ex.: testes).
-        # get_or_create é mais seguro e mantém a deduplicação por id_api.
+    existing = _existing_publication_ids(pending.keys(), owner=owner)
+    duplicates += len(existing)
+
+    to_create = []
+    for id_api, pub in pending.items():
+        if id_api in existing:
+            continue
         try:
-            data_disp = pub.get('data_disponibilizacao')
-            data_disp_date = datetime.fromisoformat(data_disp).date() if data_disp else None
-
-            _obj, created = Publication.objects.get_or_create(
-                id_api=id_api,
-                owner=owner,
-                defaults={
-                    'numero_processo': pub.get('numero_processo'),
-                    'tribunal': pub.get('tribunal', ''),
-                    'tipo_comunicacao': pub.get('tipo_comunicacao', ''),
-                    'data_disponibilizacao': data_disp_date,
-                    'orgao': pub.get('orgao', ''),
-                    'meio': pub.get('meio', ''),
-                    'texto_resumo': pub.get('texto_resumo', ''),
-                    'texto_completo': pub.get('texto_completo', ''),
-                    'link_oficial': pub.get('link_oficial'),
-                    'hash_pub': pub.get('hash'),
-                    'integration_status': 'PENDING',
-                    'search_metadata': {
-                        'original_data': pub
-                    },
-                },
-            )
-            if created:
-                total_novas += 1
-        except Exception as error:
+            to_create.append(_build_publication_instance(pub, id_api, owner=owner))
+        except (TypeError, ValueError) as error:
+            invalid += 1
             logger.warning('Erro ao salvar publicação id_api=%s: %s', id_api, str(error))
-    
-    return total_novas
+
+    if not to_create:
+        return {'novas': 0, 'duplicadas': duplicates, 'invalidas': invalid}
+
+    for offset in range(0, len(to_create), BULK_INGEST_CHUNK_SIZE):
+        chunk = to_create[offset:offset + BULK_INGEST_CHUNK_SIZE]
+        try:
+            with transaction.atomic():
+                Publication.objects.bulk_create(chunk, ignore_conflicts=True)
+        except DatabaseError as error:
+            # Um registro inválido não deve derrubar o bloco inteiro: tenta linha a linha.
+            logger.warning('Falha no bulk de publicações (%s); salvando individualmente', str(error))
+            for instance in chunk:
+                try:
+                    with transaction.atomic():
+                        instance.save(force_insert=True)
+                except DatabaseError as row_error:
+                    logger.warning('Erro ao salvar publicação id_api=%s: %s', instance.id_api, str(row_error))
+
+    # ignore_conflicts não informa quais linhas entraram: confere o que existe agora.
+    candidate_ids = [pub.id_api for pub in to_create]
+    created = len(_existing_publication_ids(candidate_ids, owner=owner))
+    return {
+        'novas': created,
+        'duplicadas': duplicates + (len(to_create) - created),
+        'invalidas': invalid,
+    }
+
+
+def _link_search_history_publications(search_history, publicacoes, owner=None):
+    """
+    Grava a associação busca -> publicações retornadas (tabela M2M indexada).
+
+    Uma consulta resolve os ids locais e um bulk insert grava os vínculos.
+    """
+    id_apis = {_parse_publication_id_api(pub) for pub in publicacoes or []}
+    id_apis.discard(None)
+    if not id_apis:
+        return 0
+
+    publication_ids = Publication.objects.filter(owner=owner, id_api__in=id_apis).values_list('id', flat=True)
+    Membership = SearchHistory.publications.through
+    Membership.objects.bulk_create(
+        [Membership(searchhistory_id=search_history.id, publication_id=publication_id) for publication_id in publication_ids],
+        batch_size=BULK_INGEST_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(id_apis)
+
+
+def _save_publications_to_db(publicacoes, owner=None):
+    """
+    Salva publicações no banco de dados local.
+    Retorna quantidade de publicações novas salvas (ignora duplicadas).
+    """
+    return _ingest_publications(publicacoes, owner=owner)['novas']
 
 
 def _enrich_publications_with_db_data(publicacoes, owner=None):
@@ -658,44 +887,15 @@ def _attach_case_suggestions(publicacoes, user=None):
     Motivação: resultados vindos direto do PJe eram enriquecidos apenas com status/case_id,
     então o frontend não conseguia exibir "Vincular ao caso" nos cards.
 
-    Estratégia:
-    - Tenta um match em lote por `numero_processo_unformatted` para eficiência.
-    - Para casos legados onde `numero_processo_unformatted` esteja vazio/inconsistente,
-      cai no fallback robusto já existente em `_find_case_by_numero_processo`.
+    Estratégia: `_resolve_case_suggestions` (uma consulta indexada para o lote).
     """
     if not publicacoes:
         return []
 
-    # Coletar números limpos (só dígitos)
-    numeros_limpos = []
-    for pub in publicacoes:
-        numero = (pub or {}).get('numero_processo')
-        numero_limpo = normalize_processo_numero(numero)
-        if numero_limpo:
-            numeros_limpos.append(numero_limpo)
-
-    numeros_set = set(numeros_limpos)
-    case_by_numero_limpo = {}
-
-    if numeros_set:
-        case_queryset = Case.objects.all()
-        if user is not None and getattr(user, 'is_authenticated', False):
-            if is_master_user(user):
-                case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=False))
-            else:
-                case_queryset = case_queryset.filter(build_owner_scope_q(user, include_ownerless=True))
-
-        # Primeiro: tentativa rápida por numero_processo_unformatted
-        candidates = case_queryset.exclude(numero_processo_unformatted__isnull=True).exclude(
-            numero_processo_unformatted=''
-        ).filter(numero_processo_unformatted__in=numeros_set).only(
-            'id', 'numero_processo', 'numero_processo_unformatted', 'titulo'
-        )
-
-        for case in candidates:
-            key = case.numero_processo_unformatted
-            if key and key in numeros_set and key not in case_by_numero_limpo:
-                case_by_numero_limpo[key] = case
+    suggestions = _resolve_case_suggestions(
+        [(pub or {}).get('numero_processo') for pub in publicacoes],
+        user=user,
+    )
 
     enriched = []
     for pub in publicacoes:
@@ -705,25 +905,9 @@ def _attach_case_suggestions(publicacoes, user=None):
         is_integrated = bool(next_pub.get('case_id')) or next_pub.get('integration_status') == 'INTEGRATED'
         if is_integrated:
             next_pub['case_suggestion'] = None
-            enriched.append(next_pub)
-            continue
-
-        numero = next_pub.get('numero_processo')
-        numero_limpo = normalize_processo_numero(numero)
-
-        case = case_by_numero_limpo.get(numero_limpo) if numero_limpo else None
-        if case is None and numero:
-            # Fallback robusto para cobrir casos manuais/legados
-            case = _find_case_by_numero_processo(numero, user=user)
-
-        if case:
-            next_pub['case_suggestion'] = {
-                'id': case.id,
-                'numero_processo': case.numero_processo,
-                'titulo': case.titulo,
-            }
         else:
-            next_pub['case_suggestion'] = None
+            numero_limpo = normalize_processo_numero(next_pub.get('numero_processo'))
+            next_pub['case_suggestion'] = suggestions.get(numero_limpo) if numero_limpo else None
 
         enriched.append(next_pub)
 
@@ -776,12 +960,8 @@ def get_last_search(request):
                 'last_search': None
             })
         
-        # VALIDAÇÃO: Contar quantas publicações ainda existem no banco para esse período
-        current_pubs_count = _apply_owner_filter(Publication.objects.filter(
-            tribunal__in=last_search.tribunais,
-            data_disponibilizacao__gte=last_search.data_inicio,
-            data_disponibilizacao__lte=last_search.data_fim
-        ), user).count()
+        # VALIDAÇÃO: Contar quantas publicações da busca ainda existem no banco
+        current_pubs_count = _apply_owner_filter(last_search.publications.all(), user).count()
         
         # Se não há mais publicações no banco, retornar None (lastSearch inválido)
         if current_pubs_count == 0:
@@ -862,14 +1042,13 @@ def retrieve_last_search_publications(request):
                 'error': 'Nenhuma busca anterior encontrada'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Filtrar publicações do banco de dados
-        publicacoes_db = _apply_owner_filter(Publication.objects.filter(
-            tribunal__in=last_search.tribunais,
-            data_disponibilizacao__gte=last_search.data_inicio,
-            data_disponibilizacao__lte=last_search.data_fim
-        ), user).order_by('-data_disponibilizacao', '-created_at')
+        # Publicações retornadas pela busca (associação gravada na ingestão)
+        publicacoes_db = _apply_owner_filter(
+            last_search.publications.all(), user
+        ).order_by('-data_disponibilizacao', '-created_at')
 
-        id_apis = list(publicacoes_db.values_list('id_api', flat=True))
+        publicacoes_db = list(publicacoes_db)
+        id_apis = [pub.id_api for pub in publicacoes_db]
         id_apis_with_movements = set(
             CaseMovement.objects.filter(
                 publicacao_id__in=id_apis,
@@ -877,10 +1056,12 @@ def retrieve_last_search_publications(request):
             ).values_list('publicacao_id', flat=True)
         )
         
+        suggestions = _resolve_case_suggestions([pub.numero_processo for pub in publicacoes_db], user=user)
+
         # Serializar publicações no formato idêntico à API
         publicacoes_json = []
         for pub in publicacoes_db:
-            case_suggestion = _build_case_suggestion(pub.numero_processo, user=user)
+            case_suggestion = suggestions.get(normalize_processo_numero(pub.numero_processo))
             publicacoes_json.append({
                 'id_api': pub.id_api,
                 'id': pub.id,
@@ -925,19 +1106,14 @@ def _build_case_suggestion(numero_processo, user=None):
     """
     Busca caso existente pelo número do processo para sugerir vinculação.
     """
-    if not numero_processo:
-        return None
-    case = _find_case_by_numero_processo(numero_processo, user=user)
-    if not case:
+    numero_limpo = normalize_processo_numero(numero_processo)
+    if not numero_limpo:
         return None
-    return {
-        'id': case.id,
-        'numero_processo': case.numero_processo,
-        'titulo': case.titulo,
-    }
+    return _resolve_case_suggestions([numero_limpo], user=user).get(numero_limpo)
 
 
-def _create_movement_from_publication(publication, case):
+def _build_movement_from_publication(publication, case):
+    """Monta (sem salvar) a movimentação DJE correspondente à publicação."""
     tipo_map = {
         'intimação': 'INTIMACAO',
         'intimacao': 'INTIMACAO',
@@ -958,7 +1134,7 @@ def _create_movement_from_publication(publication, case):
     if len(texto_base) > 120:
         titulo += '...'
 
-    CaseMovement.objects.create(
+    movement = CaseMovement(
         case=case,
         data=publication.data_disponibilizacao,
         tipo=tipo_mov,
@@ -968,6 +1144,14 @@ def _create_movement_from_publication(publication, case):
         origem='DJE',
         publicacao_id=publication.id_api,  # Armazena id_api para consultar via API
     )
+    # Mesmo cálculo de CaseMovement.save (bulk_create não chama save)
+    if movement.prazo and movement.data:
+        movement.data_limite_prazo = movement.data + timedelta(days=movement.prazo)
+    return movement
+
+
+def _create_movement_from_publication(publication, case):
+    _build_movement_from_publication(publication, case).save()
 
 
 def _integrate_publication_to_case(publication, case, notes=''):
@@ -1151,8 +1335,8 @@ def integrate_publication(request, id_api):
         # Mark corresponding notification as read (user interacted with publication)
         try:
             notification = Notification.objects.filter(
-                type='publication',
-                metadata__id_api=id_api,
+                source_kind=Notification.SOURCE_PUBLICATION,
+                source_id=str(id_api),
                 read=False
             )
             if user.is_authenticated:
@@ -1302,6 +1486,160 @@ def create_movement_from_publication(request, id_api):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+BATCH_INTEGRATE_UPDATE_BATCH_SIZE = 500
+
+
+def _bulk_create_movements(pairs):
+    """
+    Cria em lote as movimentações DJE ainda inexistentes para (publicação, caso).
+
+    Retorna a quantidade criada. Atualiza `data_ultima_movimentacao` dos casos
+    afetados com um UPDATE por caso (equivalente ao `CaseMovement.save`).
+    """
+    if not pairs:
+        return 0
+
+    case_ids = {case.id for _pub, case in pairs}
+    existing = set(
+        CaseMovement.objects.filter(
+            case_id__in=case_ids,
+            publicacao_id__in={pub.id_api for pub, _case in pairs},
+        ).values_list('case_id', 'publicacao_id')
+    )
+
+    movements = []
+    for pub, case in pairs:
+        key = (case.id, pub.id_api)
+        if key in existing:
+            continue
+        existing.add(key)
+        movements.append(_build_movement_from_publication(pub, case))
+    if not movements:
+        return 0
+
+    CaseMovement.objects.bulk_create(movements, batch_size=BATCH_INTEGRATE_UPDATE_BATCH_SIZE)
+
+    latest_by_case = (
+        CaseMovement.objects.filter(case_id__in={movement.case_id for movement in movements})
+        .values('case_id')
+        .annotate(ultima=models.Max('data'))
+    )
+    for row in latest_by_case:
+        Case.objects.filter(id=row['case_id']).update(data_ultima_movimentacao=row['ultima'])
+    return len(movements)
+
+
+def _batch_integrate(queryset, user, auto_link=True, create_movement=False):
+    """
+    Motor de integração em massa (baseado em conjuntos).
+
+    1) carrega as publicações do lote;
+    2) resolve os casos de todos os números do lote em uma consulta;
+    3) resolve os números de processo em memória;
+    4) grava status com `update()`/`bulk_update()` agrupados;
+    5) cria as movimentações com `bulk_create`.
+
+    Returns:
+        Dict com contadores e `timings_ms` por fase.
+    """
+    timings = {}
+    started = phase_started = time.perf_counter()
+
+    def _mark(phase):
+        nonlocal phase_started
+        now = time.perf_counter()
+        timings[phase] = round((now - phase_started) * 1000, 2)
+        phase_started = now
+
+    # Textos completos só são necessários para montar movimentações
+    queryset = queryset.defer('search_metadata')
+    if not create_movement:
+        queryset = queryset.defer('texto_completo')
+    publications = list(queryset)
+    _mark('load')
+
+    cases_by_numero = {}
+    if auto_link:
+        cases_by_numero = _find_cases_by_numeros_processo(
+            [pub.numero_processo for pub in publications if pub.integration_status != 'IGNORED'],
+            user=user,
+        )
+    _mark('case_index')
+
+    integrated = 0
+    ignored = 0
+    deferred_ids = []
+    unmatched_ids = []
+    matched = []
+    for pub in publications:
+        if pub.integration_status == 'IGNORED':
+            ignored += 1
+            continue
+
+        if not auto_link:
+            if pub.integration_status != 'INTEGRATED':
+                deferred_ids.append(pub.id)
+            else:
+                integrated += 1
+            continue
+
+        if pub.integration_status == 'INTEGRATED' and pub.case_id:
+            integrated += 1
+            continue
+
+        case = cases_by_numero.get(normalize_processo_numero(pub.numero_processo))
+        if case:
+            matched.append((pub, case))
+        else:
+            unmatched_ids.append(pub.id)
+    _mark('match')
+
+    now = timezone.now()
+    with transaction.atomic():
+        if deferred_ids:
+            Publication.objects.filter(id__in=deferred_ids).update(
+                integration_status='PENDING',
+                integration_attempted_at=now,
+                integration_notes='Integracao adiada',
+                updated_at=now,
+            )
+        if unmatched_ids:
+            Publication.objects.filter(id__in=unmatched_ids).update(
+                integration_status='PENDING',
+                integration_attempted_at=now,
+                integration_notes='Processo nao cadastrado',
+                updated_at=now,
+            )
+        if matched:
+            for pub, case in matched:
+                pub.case = case
+                pub.integration_status = 'INTEGRATED'
+                pub.integration_attempted_at = now
+                pub.integration_notes = 'Integrada automaticamente'
+                pub.updated_at = now
+            Publication.objects.bulk_update(
+                [pub for pub, _case in matched],
+                ['case', 'integration_status', 'integration_attempted_at', 'integration_notes', 'updated_at'],
+                batch_size=BATCH_INTEGRATE_UPDATE_BATCH_SIZE,
+            )
+    _mark('update')
+
+    movements_created = 0
+    if create_movement:
+        with transaction.atomic():
+            movements_created = _bulk_create_movements(matched)
+    _mark('movements')
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 2)
+    return {
+        'integrated': integrated + len(matched),
+        'pending': len(deferred_ids) + len(unmatched_ids),
+        'ignored': ignored,
+        'movements_created': movements_created,
+        'timings_ms': timings,
+    }
+
+
 @api_view(['POST'])
 def batch_integrate_publications(request):
     denied = _deny_master_publications(request)
@@ -1322,6 +1660,9 @@ def batch_integrate_publications(request):
         - auto_link: Se True, tenta auto-vincular por número de processo
         - create_movement: Se True, cria CaseMovement após integração
         - auto_integration: Setting do cliente (informado apenas para logging/auditoria)
+
+    Resposta inclui `movements_created` e `timings_ms` por fase
+    (load, case_index, match, update, movements, total).
     """
     try:
         user = request.user
@@ -1341,78 +1682,17 @@ def batch_integrate_publications(request):
                 'error': 'Nenhuma busca encontrada'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        queryset = _apply_owner_filter(Publication.objects.filter(
-            tribunal__in=search.tribunais,
-            data_disponibilizacao__gte=search.data_inicio,
-            data_disponibilizacao__lte=search.data_fim
-        ), user).order_by('-data_disponibilizacao')
+        queryset = _apply_owner_filter(search.publications.all(), user).order_by('-data_disponibilizacao')
 
-        integrated = 0
-        pending = 0
-        ignored = 0
-
-        for pub in queryset:
-            if pub.integration_status == 'IGNORED':
-                ignored += 1
-                continue
-
-            if not auto_link:
-                if pub.integration_status != 'INTEGRATED':
-                    pub.integration_status = 'PENDING'
-                    pub.integration_attempted_at = timezone.now()
-                    pub.integration_notes = 'Integracao adiada'
-                    pub.save(update_fields=[
-                        'integration_status',
-                        'integration_attempted_at',
-                        'integration_notes',
-                        'updated_at'
-                    ])
-                    pending += 1
-                else:
-                    integrated += 1
-                continue
-
-            if pub.integration_status == 'INTEGRATED' and pub.case_id:
-                integrated += 1
-                continue
-
-            case = None
-            if pub.numero_processo:
-                case = _find_case_by_numero_processo(pub.numero_processo, user=user)
-
-            if case:
-                pub.case = case
-                pub.integration_status = 'INTEGRATED'
-                pub.integration_attempted_at = timezone.now()
-                pub.integration_notes = 'Integrada automaticamente'
-                pub.save(update_fields=[
-                    'case',
-                    'integration_status',
-                    'integration_attempted_at',
-                    'integration_notes',
-                    'updated_at'
-                ])
-
-                if create_movement:
-                    _ensure_movement_from_publication(pub, case)
-                integrated += 1
-            else:
-                pub.integration_status = 'PENDING'
-                pub.integration_attempted_at = timezone.now()
-                pub.integration_notes = 'Processo nao cadastrado'
-                pub.save(update_fields=[
-                    'integration_status',
-                    'integration_attempted_at',
-                    'integration_notes',
-                    'updated_at'
-                ])
-                pending += 1
+        result = _batch_integrate(queryset, user, auto_link=auto_link, create_movement=create_movement)
 
         return Response({
             'success': True,
-            'integrated': integrated,
-            'pending': pending,
-            'ignored': ignored,
+            'integrated': result['integrated'],
+            'pending': result['pending'],
+            'ignored': result['ignored'],
+            'movements_created': result['movements_created'],
+            'timings_ms': result['timings_ms'],
             'search_id': search.id
         })
 
@@ -1438,7 +1718,7 @@ def get_search_history(request):
         - offset (optional): Offset para paginação (padrão: 0)
         - ordering (optional): Campo para ordenação (padrão: -executed_at)
                               Opções: executed_at, -executed_at, total_publicacoes, -total_publicacoes
-        - q (optional): Busca por número de processo nas publicações
+        - q (optional): Número de processo ou texto (partes/órgão/conteúdo, sem acentos)
     
     Response:
     {
@@ -1483,86 +1763,30 @@ def get_search_history(request):
         
         # Se houver busca por número de processo
         if query:
-            # Remover caracteres especiais do query para buscar também números sem formatação
-            # Ex: "00006236920268260320" encontra "0000623-69.2026.8.26.0320"
-            import re
-            query_digits = re.sub(r'[^\d]', '', query)  # Apenas dígitos
-            
-            # Detectar se é busca por número (só dígitos) ou por texto (nome de parte)
-            is_number_search = len(query_digits) >= 6 and query_digits == query
+            # Número com ou sem formatação: "00006236920268260320" ou "0000623-69.2026"
+            # encontram "0000623-69.2026.8.26.0320"
+            # Detectar se é busca por número ou por texto (nome de parte)
+            query_digits = process_number_query_digits(query, min_digits=6)
             
-            if is_number_search:
-                # Busca por número de processo
-                # Tenta tanto com query original quanto só com dígitos
-                publications = _apply_owner_filter(Publication.objects.filter(
-                    numero_processo__icontains=query
-                ), user)
-                
-                # Se não encontrou, tentar buscar removendo formatação
-                if not publications.exists() and query_digits and len(query_digits) >= 7:
-                    # Buscar publicações cujo número (sem formatação) contém os dígitos
-                    all_publications = _apply_owner_filter(Publication.objects.exclude(numero_processo__isnull=True), user)
-                    matching_pubs = []
-                    
-                    for pub in all_publications:
-                        pub_digits = re.sub(r'[^\d]', '', pub.numero_processo or '')
-                        if query_digits in pub_digits:
-                            matching_pubs.append(pub)
-                    
-                    publications = matching_pubs
+            if query_digits:
+                # Busca por número de processo: índice de dígitos (trigram)
+                publications = filter_by_process_digits(
+                    _apply_owner_filter(Publication.objects.all(), user),
+                    query_digits,
+                )
             else:
-                # Busca por nome de parte (texto)
-                # Normalizar query para busca sem acentos
-                query_normalized = normalize_string(query)
-                
-                # Buscar em todas as publicações e filtrar com normalização
-                all_publications = _apply_owner_filter(Publication.objects.all(), user)
-                matching_pubs = []
-                
-                for pub in all_publications:
-                    # Normalizar campos de texto
-                    texto_resumo_norm = normalize_string(pub.texto_resumo or '')
-                    texto_completo_norm = normalize_string(pub.texto_completo or '')
-                    orgao_norm = normalize_string(pub.orgao or '')
-                    
-                    # Verificar se query normalizada está em algum campo normalizado
-                    if (query_normalized in texto_resumo_norm or 
-                        query_normalized in texto_completo_norm or 
-                        query_normalized in orgao_norm):
-                        matching_pubs.append(pub)
-                
-                publications = matching_pubs
-            
-            # Verificar se encontrou publicações (pode ser QuerySet ou lista)
-            has_publications = (publications.exists() if hasattr(publications, 'exists') 
-                              else len(publications) > 0)
-            
-            if has_publications:
-                # Encontrar SearchHistory que correspondem às publicações encontradas
-                # (mesmo tribunal e período que contém a data da publicação)
-                search_ids = set()
-                
-                for pub in publications:
-                    # Buscar históricos que incluem essa publicação
-                    # Filtrar no Python porque JSONField contains não funciona bem no SQLite
-                    matching_searches = _apply_owner_filter(SearchHistory.objects.filter(
-                        data_inicio__lte=pub.data_disponibilizacao,
-                        data_fim__gte=pub.data_disponibilizacao
-                    ), user)
-                    
-                    # Filtrar por tribunal no Python
-                    for search in matching_searches:
-                        if pub.tribunal in search.tribunais:
-                            search_ids.add(search.id)
-                
-                # Filtrar histórico pelos IDs encontrados
-                if search_ids:
-                    all_searches = all_searches.filter(id__in=search_ids)
-                else:
-                    all_searches = SearchHistory.objects.none()
-            else:
-                # Se não encontrou nenhuma publicação, retornar vazio
-                all_searches = SearchHistory.objects.none()
+                # Busca por nome de parte (texto): índice full-text sem acentos
+                publications = matching_publications_queryset(
+                    _apply_owner_filter(Publication.objects.all(), user),
+                    query,
+                )
+
+            # Buscas que retornaram alguma das publicações encontradas (join na tabela M2M)
+            all_searches = all_searches.filter(
+                id__in=SearchHistory.publications.through.objects.filter(
+                    publication__in=publications.order_by().values('id')
+                ).values('searchhistory_id')
+            )
         
         # Aplicar ordenação
         all_searches = all_searches.order_by(ordering)
@@ -1610,6 +1834,81 @@ def get_search_history(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+def search_local_publications(request):
+    denied = _deny_master_publications(request)
+    if denied is not None:
+        return denied
+    """
+    Busca full-text (sem acentos, ranqueada) nas publicações salvas.
+
+    GET /api/publications/local-search?q=joao silva&limit=20&offset=0
+
+    Response:
+    {
+        "success": true,
+        "count": 42,
+        "next": "?q=joao%20silva&limit=20&offset=20",
+        "previous": null,
+        "results": [{"id_api": 516309493, ..., "rank": 7.31}]
+    }
+    """
+    try:
+        user = request.user
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+            offset = max(0, int(request.query_params.get('offset', 0)))
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'error': 'limit/offset inválidos'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        total, publications = fulltext_search_publications(
+            _apply_owner_filter(Publication.objects.all(), user),
+            query,
+            limit=limit,
+            offset=offset,
+        )
+
+        results = [
+            {
+                'id': pub.id,
+                'id_api': pub.id_api,
+                'numero_processo': pub.numero_processo,
+                'tribunal': pub.tribunal,
+                'tipo_comunicacao': pub.tipo_comunicacao,
+                'data_disponibilizacao': pub.data_disponibilizacao.isoformat(),
+                'orgao': pub.orgao,
+                'texto_resumo': pub.texto_resumo,
+                'link_oficial': pub.link_oficial,
+                'integration_status': pub.integration_status,
+                'case_id': pub.case_id,
+                'rank': round(pub.search_rank, 6),
+            }
+            for pub in publications
+        ]
+
+        base = f"?{urlencode({'q': query})}&limit={limit}"
+        next_url = f"{base}&offset={offset + limit}" if offset + limit < total else None
+        previous_url = f"{base}&offset={max(0, offset - limit)}" if offset > 0 else None
+
+        return Response({
+            'success': True,
+            'count': total,
+            'next': next_url,
+            'previous': previous_url,
+            'results': results,
+        })
+
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 def get_search_history_detail(request, search_id):
     denied = _deny_master_publications(request)
@@ -1651,12 +1950,10 @@ def get_search_history_detail(request, search_id):
                 'error': f'Busca com ID {search_id} não encontrada'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Buscar publicações relacionadas a esta pesquisa
-        publicacoes_db = _apply_owner_filter(Publication.objects.filter(
-            tribunal__in=search.tribunais,
-            data_disponibilizacao__gte=search.data_inicio,
-            data_disponibilizacao__lte=search.data_fim
-        ), user).order_by('-data_disponibilizacao', '-created_at')
+        # Publicações retornadas por esta pesquisa (associação gravada na ingestão)
+        publicacoes_db = _apply_owner_filter(
+            search.publications.all(), user
+        ).order_by('-data_disponibilizacao', '-created_at')
         
         # Serializar publicações
         publicacoes_json = []
@@ -1869,13 +2166,15 @@ def delete_publication(request, id_api):
         
         # HARD DELETE: Deletar notificações não lidas primeiro
         notifications_deleted = Notification.objects.filter(
-            type='publication',
-            metadata__id_api=id_api,
+            source_kind=Notification.SOURCE_PUBLICATION,
+            source_id=str(id_api),
             read=False
         )
         if user.is_authenticated and not is_master_user(user):
             notifications_deleted = notifications_deleted.filter(owner=user)
         notifications_deleted = notifications_deleted.delete()[0]
+        if notifications_deleted:
+            invalidate_notification_stats()
         
         # Agora deletar a publicação (CASCADE delete applied)
         PublicationDeletionTombstone.objects.get_or_create(
@@ -1886,6 +2185,8 @@ def delete_publication(request, id_api):
             },
         )
         publication.delete()
+        # Permite que uma nova busca do período volte a consultar o PJe
+        invalidate_coverage_for_publications(publication.owner_id, [publication])
         
         return Response({
             'success': True,
@@ -1941,6 +2242,7 @@ def delete_multiple_publications(request):
 
         protected_ids = []
         deletable_ids = []
+        deletable_by_owner = {}
 
         for publication in queryset:
             has_linked_case = False
@@ -1958,18 +2260,19 @@ def delete_multiple_publications(request):
                 protected_ids.append(publication.id_api)
             else:
                 deletable_ids.append(publication.id_api)
+                deletable_by_owner.setdefault(publication.owner_id, []).append(publication)
 
         # HARD DELETE: Deletar notificações não lidas primeiro
-        notifications_deleted = 0
-        for pub_id in deletable_ids:
-            notification_qs = Notification.objects.filter(
-                type='publication',
-                metadata__id_api=pub_id,
-                read=False
-            )
-            if user.is_authenticated and not is_master_user(user):
-                notification_qs = notification_qs.filter(owner=user)
-            notifications_deleted += notification_qs.delete()[0]
+        notification_qs = Notification.objects.filter(
+            source_kind=Notification.SOURCE_PUBLICATION,
+            source_id__in=[str(pub_id) for pub_id in deletable_ids],
+            read=False
+        )
+        if user.is_authenticated and not is_master_user(user):
+            notification_qs = notification_qs.filter(owner=user)
+        notifications_deleted = notification_qs.delete()[0] if deletable_ids else 0
+        if notifications_deleted:
+            invalidate_notification_stats()
 
         # Registrar tombstones das deletadas (para política de reimportação)
         tombstone_owner = user if getattr(user, 'is_authenticated', False) else None
@@ -1984,6 +2287,8 @@ def delete_multiple_publications(request):
         deleted_count = _apply_owner_filter(Publication.objects.filter(
             id_api__in=deletable_ids
         ), user).delete()[0]
+        for owner, owner_pubs in deletable_by_owner.items():
+            invalidate_coverage_for_publications(owner, owner_pubs)
         
         return Response({
             'success': True,
@@ -2039,22 +2344,25 @@ def delete_all_publications(request):
 
         # HARD DELETE: Deletar notificações não lidas de publicações não protegidas
         deletable_pubs = scoped_pubs.exclude(id_api__in=protected_id_apis)
-        notifications_deleted = 0
-        for pub in deletable_pubs:
-            notification_qs = Notification.objects.filter(
-                type='publication',
-                metadata__id_api=pub.id_api,
-                read=False,
-            )
-            if user.is_authenticated and not is_master_user(user):
-                notification_qs = notification_qs.filter(owner=user)
-            notifications_deleted += notification_qs.delete()[0]
+        deletable_source_ids = [str(id_api) for id_api in deletable_pubs.values_list('id_api', flat=True)]
+        notification_qs = Notification.objects.filter(
+            source_kind=Notification.SOURCE_PUBLICATION,
+            source_id__in=deletable_source_ids,
+            read=False,
+        )
+        if user.is_authenticated and not is_master_user(user):
+            notification_qs = notification_qs.filter(owner=user)
+        notifications_deleted = notification_qs.delete()[0] if deletable_source_ids else 0
+        if notifications_deleted:
+            invalidate_notification_stats()
         
         # Agora deletar as publicações
         deleted_count = scoped_pubs.exclude(id_api__in=protected_id_apis).delete()[0]
         
         # HARD DELETE: Limpar histórico (sem publicações visíveis, histórico não faz sentido)
         history_deleted = _apply_owner_filter(SearchHistory.objects.all(), user).delete()[0]
+        if getattr(user, 'is_authenticated', False):
+            invalidate_coverage(user)
         
         return Response({
             'success': True,
@@ -13,6 +13,23 @@ EDITABLE_SETTINGS_KEYS = {
     'STALE_PROCESS_MONITOR_ENABLED',
     'STALE_PROCESS_MONITOR_TIME',
     'STALE_PROCESS_DAYS_THRESHOLD',
+    # Agendador residente (manage.py run_scheduler)
+    'DEADLINE_AUTO_CHECK_ENABLED',
+    'DEADLINE_CHECK_INTERVAL_MINUTES',
+    'PUBLICATION_AUTO_SYNC_ENABLED',
+    'PUBLICATION_AUTO_SYNC_INTERVAL_MINUTES',
+}
+
+BOOLEAN_SETTINGS_KEYS = {
+    'STALE_PROCESS_MONITOR_ENABLED',
+    'DEADLINE_AUTO_CHECK_ENABLED',
+    'PUBLICATION_AUTO_SYNC_ENABLED',
+}
+
+POSITIVE_INT_SETTINGS_KEYS = {
+    'STALE_PROCESS_DAYS_THRESHOLD',
+    'DEADLINE_CHECK_INTERVAL_MINUTES',
+    'PUBLICATION_AUTO_SYNC_INTERVAL_MINUTES',
 }
 
 
@@ -31,6 +48,26 @@ def _parse_time_hhmm(value: str) -> str | None:
     return f'{hour:02d}:{minute:02d}'
 
 
+def _sanitize_setting(key, value):
+    """Retorna (valor_sanitizado, erro) para uma chave editável."""
+    if key in BOOLEAN_SETTINGS_KEYS:
+        return bool(value), None
+    if key == 'STALE_PROCESS_MONITOR_TIME':
+        parsed = _parse_time_hhmm(value)
+        if not parsed:
+            return None, 'Formato inválido. Use HH:MM (ex.: 09:00).'
+        return parsed, None
+    if key in POSITIVE_INT_SETTINGS_KEYS:
+        try:
+            number = int(value)
+            if number <= 0:
+                raise ValueError
+            return number, None
+        except Exception:
+            return None, 'Valor inválido. Use inteiro > 0.'
+    return value, None
+
+
 def _load_settings_overrides():
     """Carrega overrides persistidos no DB.
 
@@ -110,22 +147,11 @@ def get_system_settings(request):
             if key not in EDITABLE_SETTINGS_KEYS:
                 continue
 
-            if key == 'STALE_PROCESS_MONITOR_ENABLED':
-                sanitized[key] = bool(value)
-            elif key == 'STALE_PROCESS_MONITOR_TIME':
-                parsed = _parse_time_hhmm(value)
-                if not parsed:
-                    errors[key] = 'Formato inválido. Use HH:MM (ex.: 09:00).'
-                else:
-                    sanitized[key] = parsed
-            elif key == 'STALE_PROCESS_DAYS_THRESHOLD':
-                try:
-                    days = int(value)
-                    if days <= 0:
-                        raise ValueError
-                    sanitized[key] = days
-                except Exception:
-                    errors[key] = 'Valor inválido. Use inteiro > 0.'
+            clean, error = _sanitize_setting(key, value)
+            if error:
+                errors[key] = error
+            else:
+                sanitized[key] = clean
 
         if errors:
             return Response({'success': False, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -181,22 +207,11 @@ def get_specific_setting(request, setting_key):
         sanitized = {}
         errors = {}
 
-        if setting_key == 'STALE_PROCESS_MONITOR_ENABLED':
-            sanitized[setting_key] = bool(value)
-        elif setting_key == 'STALE_PROCESS_MONITOR_TIME':
-            parsed = _parse_time_hhmm(value)
-            if not parsed:
-                errors[setting_key] = 'Formato inválido. Use HH:MM (ex.: 09:00).'
-            else:
-                sanitized[setting_key] = parsed
-        elif setting_key == 'STALE_PROCESS_DAYS_THRESHOLD':
-            try:
-                days = int(value)
-                if days <= 0:
-                    raise ValueError
-                sanitized[setting_key] = days
-            except Exception:
-                errors[setting_key] = 'Valor inválido. Use inteiro > 0.'
+        clean, error = _sanitize_setting(setting_key, value)
+        if error:
+            errors[setting_key] = error
+        else:
+            sanitized[setting_key] = clean
 
         if errors:
             return Response({'success': False, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
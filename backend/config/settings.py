@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 import socket
 
@@ -143,6 +144,34 @@ DATABASES = {
 }
 
 
+# Cache
+# Padrão: memória por processo (o mesmo de antes de CACHES ser configurável).
+# As estatísticas de notificações/contatos usam chaves versionadas, invalidadas
+# a cada gravação; com cache por processo a invalidação feita em um worker do
+# gunicorn ou comando (run_scheduler, check_deadlines, ...) não chega aos
+# outros, e os contadores ficam desatualizados até o TTL curto (30s). Em
+# produção com vários processos prefira um backend compartilhado:
+#   file:   arquivos em CACHE_DIR (compartilhado no mesmo host)
+#   redis:  REDIS_URL (requer o pacote `redis`; incremento de versão atômico)
+#   db:     tabela do banco (rode `python manage.py createcachetable`)
+#   memory: por processo (padrão)
+_CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', config('CACHE_DIR', default=str(BASE_DIR / '.cache' / 'django'))),
+    'redis': ('django.core.cache.backends.redis.RedisCache', config('REDIS_URL', default='redis://127.0.0.1:6379/1')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+    'memory': ('django.core.cache.backends.locmem.LocMemCache', ''),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='memory').strip().lower()
+if CACHE_BACKEND not in _CACHE_BACKENDS:
+    raise ImproperlyConfigured(f"CACHE_BACKEND inválido: {CACHE_BACKEND!r} (use {', '.join(_CACHE_BACKENDS)})")
+CACHES = {
+    'default': {
+        'BACKEND': _CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': _CACHE_BACKENDS[CACHE_BACKEND][1],
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -190,6 +219,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'storage'
 
+# Miniaturas das fotos de contato (apps.contacts.photos): geradas em thread de
+# background após o commit; False gera na própria requisição.
+CONTACT_PHOTO_VARIANTS_ASYNC = config('CONTACT_PHOTO_VARIANTS_ASYNC', default=True, cast=bool)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -251,6 +284,26 @@ PJE_COMUNICA_DEFAULT_TRIBUNAIS = config(
     default='TJSP,TRF3,TRT2,TRT15,TJMG',
     cast=Csv(),
 )
+# Pool de conexões keep-alive compartilhado (services/http_pool.py); deve ser
+# >= PJE_COMUNICA_MAX_CONCURRENCY para que buscas paralelas reaproveitem conexões.
+PJE_COMUNICA_HTTP_POOL_SIZE = config('PJE_COMUNICA_HTTP_POOL_SIZE', default=10, cast=int)
+# Cache local de respostas do PJe (services/pje_cache.py). TTL base vem de
+# LEGAL_SYSTEM_SETTINGS['PUBLICATION_CACHE_DURATION']; janelas já encerradas
+# (data_fim < hoje) são imutáveis e usam o TTL mais longo abaixo.
+# Backends: memory (padrão), file (compartilhado entre workers) ou django.
+PJE_COMUNICA_CACHE_BACKEND = config('PJE_COMUNICA_CACHE_BACKEND', default='memory')
+PJE_COMUNICA_CACHE_DIR = config('PJE_COMUNICA_CACHE_DIR', default=str(BASE_DIR / '.cache' / 'pje_comunica'))
+PJE_COMUNICA_CACHE_ALIAS = config('PJE_COMUNICA_CACHE_ALIAS', default='default')
+PJE_COMUNICA_CACHE_CLOSED_WINDOW_TTL_SECONDS = config(
+    'PJE_COMUNICA_CACHE_CLOSED_WINDOW_TTL_SECONDS',
+    default=7 * 24 * 60 * 60,
+    cast=int,
+)
+# Buscas (tribunal × OAB/Nome) rodam em paralelo. Prazos incluem retries/backoff;
+# o prazo global deve ficar abaixo do timeout do gunicorn (120s).
+PJE_COMUNICA_MAX_CONCURRENCY = config('PJE_COMUNICA_MAX_CONCURRENCY', default=6, cast=int)
+PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS = config('PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS', default=40, cast=float)
+PJE_COMUNICA_TOTAL_DEADLINE_SECONDS = config('PJE_COMUNICA_TOTAL_DEADLINE_SECONDS', default=90, cast=float)
 
 # Regras globais (fallback) para rejeitar publicações de advogados similares.
 # Preferível configurar por usuário (UserProfile), mas esses valores servem como padrão.
@@ -302,15 +355,22 @@ LEGAL_SYSTEM_SETTINGS = {
     # Se False: publicações deletadas (lixeira) ficam bloqueadas e não são reimportadas em novas buscas.
     # Se True (padrão): ao deletar e buscar novamente o mesmo período, a publicação pode reaparecer.
     'PUBLICATIONS_ALLOW_REIMPORT_AFTER_DELETE': True,
+    # Sincronização automática das publicações do dia (agendador run_scheduler)
+    'PUBLICATION_AUTO_SYNC_ENABLED': False,
+    'PUBLICATION_AUTO_SYNC_INTERVAL_MINUTES': 120,
     
     # ===== MOVIMENTAÇÕES =====
     'AUTO_LOAD_MOVEMENTS_ON_CASE': True,
-    'AUTO_CHECK_DEADLINES': True,
+    'AUTO_CHECK_DEADLINES': True,  # frontend: verifica prazos ao carregar as telas
+    # Verificação periódica de prazos em background (agendador run_scheduler)
+    'DEADLINE_AUTO_CHECK_ENABLED': False,
+    'DEADLINE_CHECK_INTERVAL_MINUTES': 60,
     'DEADLINE_NOTIFICATION_DAYS': 7,
     'DEADLINE_NOTIFICATION_BEFORE_DAYS': 3,
 
     # ===== MONITORAMENTO (90+ dias sem movimentação) =====
-    # Observação: o agendamento (rodar na hora certa) é feito via Task Scheduler/cron.
+    # Observação: o agendamento (rodar na hora certa) é feito pelo processo residente
+    # `manage.py run_scheduler` (ou, legado, Task Scheduler/cron chamando run_scheduled_stale_process_monitor).
     'STALE_PROCESS_MONITOR_ENABLED': False,
     'STALE_PROCESS_MONITOR_TIME': '09:00',
     'STALE_PROCESS_DAYS_THRESHOLD': 90,
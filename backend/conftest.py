@@ -7,6 +7,8 @@ from django.conf import settings
 
 # Set Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Cache por processo nos testes, mesmo com CACHE_BACKEND=file/redis no .env
+os.environ.setdefault('CACHE_BACKEND', 'memory')
 
 # Setup Django
 def pytest_configure(config):
@@ -0,0 +1,165 @@
+"""
+Sessões HTTP compartilhadas (pool de conexões keep-alive) para o PJe Comunica.
+
+Usado pelo backend (services/pje_comunica.py) e pela ferramenta
+tools/pub_fetcher/main.py — por isso NÃO depende de Django: toda configuração
+chega por parâmetro.
+
+Cada combinação de configuração (tamanho do pool, retries, backoff) tem uma
+única `requests.Session` por processo. Assim, várias buscas para o mesmo host
+reaproveitam a mesma conexão TCP+TLS em vez de abrir uma nova a cada chamada.
+
+O retry do adapter não conhece prazos nem o conteúdo da resposta. Quem precisa
+disso (services/pje_comunica.py) pede a sessão com `max_retries=0` e faz os
+retries na aplicação, usando `RETRY_STATUS_CODES` e `retry_after_seconds`.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF_SECONDS = (0.75, 2.0)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_sessions: Dict[tuple, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_retry(max_retries: int, backoff: Sequence[float]) -> Retry:
+    """Retry no nível do adapter: falhas de conexão/leitura e 429/5xx em GET.
+
+    `backoff` segue o formato de PJE_COMUNICA_RETRY_BACKOFF_SECONDS: o primeiro
+    valor vira o fator exponencial e o último, o teto de espera entre tentativas.
+    """
+    backoff = tuple(float(value) for value in (backoff or ()))
+    return Retry(
+        total=max(0, int(max_retries)),
+        connect=None,
+        read=None,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'GET'}),
+        backoff_factor=backoff[0] if backoff else 0,
+        backoff_max=backoff[-1] if backoff else 0,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+
+
+def build_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff: Sequence[float] = DEFAULT_RETRY_BACKOFF_SECONDS,
+) -> requests.Session:
+    """Cria uma sessão nova com adapter em pool (use `get_session` para a compartilhada)."""
+    pool_size = max(1, int(pool_size))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_build_retry(max_retries, backoff),
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(
+    pool_size: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    backoff: Optional[Sequence[float]] = None,
+) -> requests.Session:
+    """Retorna a sessão compartilhada do processo para esta configuração."""
+    pool_size = DEFAULT_POOL_SIZE if pool_size is None else max(1, int(pool_size))
+    max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max(0, int(max_retries))
+    backoff = DEFAULT_RETRY_BACKOFF_SECONDS if backoff is None else tuple(float(value) for value in backoff)
+
+    key = (pool_size, max_retries, tuple(backoff))
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = build_session(pool_size=pool_size, max_retries=max_retries, backoff=backoff)
+            _sessions[key] = session
+        return session
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Contadores de reaproveitamento de conexões somados de todas as sessões.
+
+    Os contadores são do processo inteiro: a diferença entre dois snapshots
+    (`diff_pool_stats`) inclui requisições concorrentes de outras buscas.
+
+    - requisicoes: requisições HTTP enviadas (inclui retries)
+    - conexoes_novas: conexões abertas (cada uma paga um handshake TCP+TLS)
+    - conexoes_reutilizadas: requisições que reaproveitaram conexão keep-alive
+    """
+    total_requests = 0
+    total_connections = 0
+    for session in list(_sessions.values()):
+        seen_adapters = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen_adapters:
+                continue
+            seen_adapters.add(id(adapter))
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                total_requests += getattr(pool, 'num_requests', 0)
+                total_connections += getattr(pool, 'num_connections', 0)
+
+    return {
+        'requisicoes': total_requests,
+        'conexoes_novas': total_connections,
+        'conexoes_reutilizadas': max(0, total_requests - total_connections),
+    }
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Espera pedida pelo servidor no header Retry-After (segundos ou data HTTP)."""
+    value = (response.headers.get('Retry-After') or '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def diff_pool_stats(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """Diferença entre dois snapshots de `get_pool_stats` (ex.: custo de uma busca)."""
+    return {key: max(0, after.get(key, 0) - before.get(key, 0)) for key in after}
+
+
+def close_sessions() -> None:
+    """Fecha todas as sessões compartilhadas (útil em testes/encerramento)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,253 @@
+"""
+Cache local de respostas do PJe Comunica.
+
+Chave: tribunal + OAB/nome + janela de datas. O TTL vem de
+LEGAL_SYSTEM_SETTINGS['PUBLICATION_CACHE_DURATION'] (0 = sem cache). Janelas
+já encerradas (data_fim < hoje) não mudam mais no DJE e ficam em cache por
+PJE_COMUNICA_CACHE_CLOSED_WINDOW_TTL_SECONDS.
+
+Backends (PJE_COMUNICA_CACHE_BACKEND):
+- 'memory': dict em memória do processo (padrão)
+- 'file': arquivos JSON em PJE_COMUNICA_CACHE_DIR (compartilhado entre workers)
+- 'django': cache do Django (alias em PJE_COMUNICA_CACHE_ALIAS)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+
+
+DEFAULT_CACHE_BACKEND = 'memory'
+DEFAULT_CLOSED_WINDOW_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MEMORY_MAX_ENTRIES = 512
+CACHE_KEY_PREFIX = 'pje_comunica:v1'
+
+
+class LocalMemoryCacheBackend:
+    """Cache em memória do processo, com expiração por entrada."""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES):
+        self._max_entries = max(1, int(max_entries))
+        self._entries: Dict[str, tuple[float, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Dict, ttl: int) -> None:
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self._max_entries:
+                self._evict()
+            self._entries[key] = (time.time() + ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        now = time.time()
+        expired = [key for key, (expires_at, _value) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self._max_entries:
+            # Remove a entrada que expira primeiro
+            oldest = min(self._entries, key=lambda key: self._entries[key][0])
+            del self._entries[oldest]
+
+
+class FileCacheBackend:
+    """Cache em arquivos JSON (um por chave), útil com vários workers gunicorn."""
+
+    def __init__(self, directory):
+        self._directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if entry.get('expires_at', 0) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return entry.get('value')
+
+    def set(self, key: str, value: Dict, ttl: int) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        entry = {'expires_at': time.time() + ttl, 'value': value}
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                json.dump(entry, handle, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        if not self._directory.is_dir():
+            return
+        for path in self._directory.glob('*.json'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class DjangoCacheBackend:
+    """Delegação para o framework de cache do Django (ex.: Redis/Memcached em produção)."""
+
+    def __init__(self, alias: str = 'default'):
+        self._alias = alias
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches
+
+        return caches[self._alias]
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._cache.get(f'{CACHE_KEY_PREFIX}:{key}')
+
+    def set(self, key: str, value: Dict, ttl: int) -> None:
+        self._cache.set(f'{CACHE_KEY_PREFIX}:{key}', value, ttl)
+
+    def clear(self) -> None:
+        # Não limpa o cache inteiro do Django; entradas expiram pelo TTL.
+        pass
+
+
+_backends: Dict[tuple, object] = {}
+_backends_lock = threading.Lock()
+
+
+def _backend_config() -> tuple:
+    name = str(getattr(settings, 'PJE_COMUNICA_CACHE_BACKEND', DEFAULT_CACHE_BACKEND) or DEFAULT_CACHE_BACKEND).lower()
+    if name == 'file':
+        default_dir = Path(settings.BASE_DIR) / '.cache' / 'pje_comunica'
+        return (name, str(getattr(settings, 'PJE_COMUNICA_CACHE_DIR', '') or default_dir))
+    if name == 'django':
+        return (name, getattr(settings, 'PJE_COMUNICA_CACHE_ALIAS', 'default') or 'default')
+    return ('memory', DEFAULT_MEMORY_MAX_ENTRIES)
+
+
+def get_cache_backend():
+    """Backend configurado em settings (instância reaproveitada por processo)."""
+    config = _backend_config()
+    backend = _backends.get(config)
+    if backend is not None:
+        return backend
+    with _backends_lock:
+        backend = _backends.get(config)
+        if backend is None:
+            name, option = config
+            if name == 'file':
+                backend = FileCacheBackend(option)
+            elif name == 'django':
+                backend = DjangoCacheBackend(option)
+            else:
+                backend = LocalMemoryCacheBackend(option)
+            _backends[config] = backend
+        return backend
+
+
+def clear_cache() -> None:
+    get_cache_backend().clear()
+
+
+def get_cache_duration() -> int:
+    system_settings = getattr(settings, 'LEGAL_SYSTEM_SETTINGS', {})
+    try:
+        return max(0, int(system_settings.get('PUBLICATION_CACHE_DURATION', 0) or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_cache_enabled() -> bool:
+    return get_cache_duration() > 0
+
+
+def get_ttl_for_window(data_fim: Optional[str]) -> int:
+    """TTL da entrada: janelas encerradas (antes de hoje) são imutáveis e duram mais."""
+    duration = get_cache_duration()
+    if duration <= 0:
+        return 0
+    try:
+        fim = date.fromisoformat(str(data_fim)) if data_fim else None
+    except ValueError:
+        fim = None
+    if fim is not None and fim < date.today():
+        closed_ttl = getattr(
+            settings,
+            'PJE_COMUNICA_CACHE_CLOSED_WINDOW_TTL_SECONDS',
+            DEFAULT_CLOSED_WINDOW_TTL_SECONDS,
+        )
+        try:
+            return max(duration, int(closed_ttl))
+        except (TypeError, ValueError):
+            return duration
+    return duration
+
+
+def build_cache_key(
+    tribunal: str,
+    oab: Optional[str],
+    nome_advogado: Optional[str],
+    data_inicio: Optional[str],
+    data_fim: Optional[str],
+) -> str:
+    raw = json.dumps(
+        [
+            (tribunal or '').strip().upper(),
+            (oab or '').strip(),
+            ' '.join((nome_advogado or '').split()).upper(),
+            data_inicio or '',
+            data_fim or '',
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_result(key: str) -> Optional[Dict]:
+    try:
+        return get_cache_backend().get(key)
+    except Exception:
+        return None
+
+
+def store_result(key: str, result: Dict, data_fim: Optional[str]) -> None:
+    """Guarda apenas respostas de sucesso (erros não devem ficar presos no cache)."""
+    if not result or not result.get('success'):
+        return
+    ttl = get_ttl_for_window(data_fim)
+    if ttl <= 0:
+        return
+    try:
+        get_cache_backend().set(key, result, ttl)
+    except Exception:
+        pass
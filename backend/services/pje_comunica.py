@@ -3,14 +3,25 @@ Service para integração com API PJe Comunica.
 Busca publicações jurídicas em múltiplos tribunais.
 """
 import re
+import threading
 import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, date
 from typing import List, Dict, Optional
 
 import requests
 from django.conf import settings
 
+from services import pje_cache
+from services.http_pool import (
+    RETRY_STATUS_CODES,
+    diff_pool_stats,
+    get_pool_stats,
+    get_session,
+    retry_after_seconds,
+)
+
 
 # Defaults mantidos no módulo como fallback, mas configuráveis via settings/env.
 # (Em produção, prefira configurar via .env e/ou perfil do usuário.)
@@ -18,6 +29,15 @@ DEFAULT_PJE_COMUNICA_API_URL = "https://comunicaapi.pje.jus.br/api/v1/comunicaca
 DEFAULT_PJE_COMUNICA_TIMEOUT_SECONDS = 15
 DEFAULT_PJE_COMUNICA_MAX_RETRIES = 2
 DEFAULT_PJE_COMUNICA_RETRY_BACKOFF_SECONDS = (0.75, 2.0)
+DEFAULT_PJE_COMUNICA_HTTP_POOL_SIZE = 10
+DEFAULT_PJE_COMUNICA_MAX_CONCURRENCY = 6
+DEFAULT_PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS = 40
+DEFAULT_PJE_COMUNICA_TOTAL_DEADLINE_SECONDS = 90
+
+# Ordem das buscas por tribunal (define também a ordem determinística do merge).
+SEARCH_TYPE_OAB = 'OAB'
+SEARCH_TYPE_NOME = 'Nome'
+SEARCH_TYPES = (SEARCH_TYPE_OAB, SEARCH_TYPE_NOME)
 
 DEFAULT_TRIBUNAIS = [
     'TJSP',
@@ -67,6 +87,50 @@ def _get_setting(name: str, default):
         return default
 
 
+def _positive_float(value, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return float(default)
+    return value if value > 0 else float(default)
+
+
+def get_pje_http_session() -> requests.Session:
+    """Sessão HTTP compartilhada (keep-alive) configurada via settings.
+
+    Sem retry no adapter: os retries ficam em `fetch_publications_from_tribunal`,
+    que respeita o prazo do tribunal e também repete respostas com payload inválido.
+    """
+    return get_session(
+        pool_size=_get_setting('PJE_COMUNICA_HTTP_POOL_SIZE', DEFAULT_PJE_COMUNICA_HTTP_POOL_SIZE),
+        max_retries=0,
+        backoff=(),
+    )
+
+
+class _TribunalDeadlines:
+    """Prazo por tribunal, iniciado quando a primeira busca daquele tribunal começa.
+
+    Com limite de concorrência, buscas podem ficar na fila; o prazo só passa a
+    contar quando o tribunal efetivamente começa a ser consultado, e nunca
+    ultrapassa o prazo global.
+    """
+
+    def __init__(self, per_tribunal_seconds: float, overall_deadline: float):
+        self._per_tribunal_seconds = per_tribunal_seconds
+        self._overall_deadline = overall_deadline
+        self._deadlines: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def for_tribunal(self, tribunal: str) -> float:
+        with self._lock:
+            deadline = self._deadlines.get(tribunal)
+            if deadline is None:
+                deadline = min(time.monotonic() + self._per_tribunal_seconds, self._overall_deadline)
+                self._deadlines[tribunal] = deadline
+            return deadline
+
+
 class PJeComunicaService:
     """Service para buscar publicações da API PJe Comunica."""
     
@@ -76,7 +140,8 @@ class PJeComunicaService:
         oab: Optional[str] = None,
         nome_advogado: Optional[str] = None,
         data_inicio: Optional[str] = None,
-        data_fim: Optional[str] = None
+        data_fim: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> Dict:
         """
         Busca publicações de um tribunal específico.
@@ -87,9 +152,14 @@ class PJeComunicaService:
             nome_advogado: Nome completo do advogado
             data_inicio: Data inicial (YYYY-MM-DD)
             data_fim: Data final (YYYY-MM-DD)
+            deadline: Instante limite (time.monotonic()) para tentativas e retries
             
         Returns:
             Dict com status e items ou erro
+
+        Repete (até PJE_COMUNICA_MAX_RETRIES vezes) falhas de conexão, 429/5xx,
+        JSON inválido e payloads com status != success. Nenhuma espera
+        (backoff ou Retry-After) ultrapassa o prazo: se não couber, desiste.
         """
         params = {
             "siglaTribunal": tribunal,
@@ -105,48 +175,68 @@ class PJeComunicaService:
             params["dataDisponibilizacaoFim"] = data_fim
         
         try:
-            last_error = None
             api_url = _get_setting('PJE_COMUNICA_API_URL', DEFAULT_PJE_COMUNICA_API_URL)
-            api_timeout = _get_setting('PJE_COMUNICA_TIMEOUT_SECONDS', DEFAULT_PJE_COMUNICA_TIMEOUT_SECONDS)
-            api_max_retries = _get_setting('PJE_COMUNICA_MAX_RETRIES', DEFAULT_PJE_COMUNICA_MAX_RETRIES)
+            api_timeout = float(_get_setting('PJE_COMUNICA_TIMEOUT_SECONDS', DEFAULT_PJE_COMUNICA_TIMEOUT_SECONDS))
+            api_max_retries = max(0, int(_get_setting('PJE_COMUNICA_MAX_RETRIES', DEFAULT_PJE_COMUNICA_MAX_RETRIES)))
             api_backoff = _get_setting('PJE_COMUNICA_RETRY_BACKOFF_SECONDS', DEFAULT_PJE_COMUNICA_RETRY_BACKOFF_SECONDS)
-            if isinstance(api_backoff, list):
-                api_backoff = tuple(float(x) for x in api_backoff)
+            api_backoff = tuple(float(x) for x in (api_backoff or ()))
 
-            for attempt in range(max(0, int(api_max_retries)) + 1):
+            last_error = None
+            for attempt in range(api_max_retries + 1):
+                request_timeout = api_timeout
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        last_error = last_error or 'Tempo limite do tribunal excedido'
+                        break
+                    request_timeout = min(api_timeout, remaining)
+
+                wait_seconds = None
                 try:
-                    response = requests.get(api_url, params=params, timeout=api_timeout)
+                    response = get_pje_http_session().get(api_url, params=params, timeout=request_timeout)
+                    if response.status_code in RETRY_STATUS_CODES:
+                        wait_seconds = retry_after_seconds(response)
                     response.raise_for_status()
                     data = response.json()
-
-                    if data.get('status') != 'success':
+                    if data.get('status') == 'success':
+                        return {
+                            'tribunal': tribunal,
+                            'success': True,
+                            'count': data.get('count', 0),
+                            'items': data.get('items', [])
+                        }
+                    last_error = data.get('message', 'Erro desconhecido')
+                except requests.exceptions.HTTPError as e:
+                    # 4xx (fora 429) não melhora repetindo
+                    if e.response is None or e.response.status_code not in RETRY_STATUS_CODES:
                         return {
                             'tribunal': tribunal,
                             'success': False,
-                            'error': data.get('message', 'Erro desconhecido'),
+                            'error': str(e),
                             'items': []
                         }
-
-                    return {
-                        'tribunal': tribunal,
-                        'success': True,
-                        'count': data.get('count', 0),
-                        'items': data.get('items', [])
-                    }
+                    last_error = str(e)
                 except requests.exceptions.RequestException as e:
-                    last_error = e
-                    if attempt >= api_max_retries:
-                        break
+                    # Falha de conexão/timeout ou JSON inválido (requests.JSONDecodeError)
+                    last_error = str(e) or 'Erro de conexão (sem detalhes)'
 
-                    # Backoff simples para reduzir falhas intermitentes da API
-                    if api_backoff:
-                        backoff = api_backoff[min(attempt, len(api_backoff) - 1)]
-                        time.sleep(backoff)
+                if attempt >= api_max_retries:
+                    break
+
+                # Retry-After (429/503) tem precedência sobre o backoff configurado;
+                # sem prazo, a espera nunca passa do timeout de uma requisição.
+                if wait_seconds is None:
+                    wait_seconds = api_backoff[min(attempt, len(api_backoff) - 1)] if api_backoff else 0
+                wait_seconds = min(wait_seconds, api_timeout)
+                if deadline is not None and time.monotonic() + wait_seconds >= deadline:
+                    break
+                if wait_seconds > 0:
+                    time.sleep(wait_seconds)
 
             return {
                 'tribunal': tribunal,
                 'success': False,
-                'error': str(last_error) if last_error else 'Erro de conexão (sem detalhes)',
+                'error': last_error or 'Erro de conexão (sem detalhes)',
                 'items': []
             }
         except Exception as e:
@@ -359,6 +449,121 @@ class PJeComunicaService:
         # NÃO encontrou menção à advogada - EXCLUIR
         return False
     
+    @classmethod
+    def _run_tribunal_searches(
+        cls,
+        tribunais: List[str],
+        oab: str,
+        nome_advogado: str,
+        data_inicio: str,
+        data_fim: str,
+        max_concurrency: Optional[int] = None,
+        tribunal_deadline_seconds: Optional[float] = None,
+        total_deadline_seconds: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> Dict[tuple, Dict]:
+        """
+        Dispara em paralelo todas as buscas (tribunal × tipo de busca).
+
+        Retorna um dict {(tribunal, tipo_busca): resultado} com o mesmo formato de
+        `fetch_publications_from_tribunal`. Buscas que não terminam dentro do prazo
+        global são reportadas como erro (success=False), sem bloquear a resposta.
+        Respostas em cache (services/pje_cache.py) voltam com `from_cache=True` e
+        não chegam a ocupar o pool de threads.
+        """
+        if max_concurrency is None:
+            max_concurrency = _get_setting('PJE_COMUNICA_MAX_CONCURRENCY', DEFAULT_PJE_COMUNICA_MAX_CONCURRENCY)
+        if tribunal_deadline_seconds is None:
+            tribunal_deadline_seconds = _get_setting(
+                'PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS',
+                DEFAULT_PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS,
+            )
+        if total_deadline_seconds is None:
+            total_deadline_seconds = _get_setting(
+                'PJE_COMUNICA_TOTAL_DEADLINE_SECONDS',
+                DEFAULT_PJE_COMUNICA_TOTAL_DEADLINE_SECONDS,
+            )
+
+        try:
+            max_concurrency = int(max_concurrency)
+        except (TypeError, ValueError):
+            max_concurrency = DEFAULT_PJE_COMUNICA_MAX_CONCURRENCY
+        tribunal_deadline_seconds = _positive_float(
+            tribunal_deadline_seconds, DEFAULT_PJE_COMUNICA_TRIBUNAL_DEADLINE_SECONDS
+        )
+        total_deadline_seconds = _positive_float(
+            total_deadline_seconds, DEFAULT_PJE_COMUNICA_TOTAL_DEADLINE_SECONDS
+        )
+
+        results = {}
+        cache_keys = {}
+        jobs = []
+        use_cache = use_cache and pje_cache.is_cache_enabled()
+        for tribunal in dict.fromkeys(tribunais):
+            for tipo_busca in SEARCH_TYPES:
+                job = (tribunal, tipo_busca)
+                if use_cache:
+                    cache_keys[job] = pje_cache.build_cache_key(
+                        tribunal,
+                        oab if tipo_busca == SEARCH_TYPE_OAB else None,
+                        nome_advogado if tipo_busca == SEARCH_TYPE_NOME else None,
+                        data_inicio,
+                        data_fim,
+                    )
+                    cached = pje_cache.get_cached_result(cache_keys[job])
+                    if cached is not None:
+                        results[job] = {**cached, 'from_cache': True}
+                        continue
+                jobs.append(job)
+        if not jobs:
+            return results
+
+        overall_deadline = time.monotonic() + total_deadline_seconds
+        tribunal_deadlines = _TribunalDeadlines(tribunal_deadline_seconds, overall_deadline)
+
+        def run(tribunal: str, tipo_busca: str) -> Dict:
+            return cls.fetch_publications_from_tribunal(
+                tribunal=tribunal,
+                oab=oab if tipo_busca == SEARCH_TYPE_OAB else None,
+                nome_advogado=nome_advogado if tipo_busca == SEARCH_TYPE_NOME else None,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                deadline=tribunal_deadlines.for_tribunal(tribunal),
+            )
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_concurrency, len(jobs))),
+            thread_name_prefix='pje-comunica',
+        )
+        try:
+            futures = {job: executor.submit(run, *job) for job in jobs}
+            wait(futures.values(), timeout=max(0.0, overall_deadline - time.monotonic()))
+        finally:
+            # Não espera buscas atrasadas: o prazo global já foi respeitado acima.
+            # cancel_futures descarta as buscas ainda na fila, que não devem
+            # começar depois do prazo.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for (tribunal, tipo_busca), future in futures.items():
+            if future.done() and not future.cancelled():
+                try:
+                    result = future.result()
+                    if use_cache:
+                        pje_cache.store_result(cache_keys[(tribunal, tipo_busca)], result, data_fim)
+                    results[(tribunal, tipo_busca)] = {**result, 'from_cache': False}
+                    continue
+                except Exception as e:
+                    error = f'Erro inesperado: {str(e)}'
+            else:
+                error = 'Tempo limite global da busca excedido'
+            results[(tribunal, tipo_busca)] = {
+                'tribunal': tribunal,
+                'success': False,
+                'error': error,
+                'items': [],
+            }
+        return results
+
     @classmethod
     def fetch_publications(
         cls,
@@ -369,6 +574,10 @@ class PJeComunicaService:
         tribunais: Optional[List[str]] = None,
         excluded_oabs: Optional[list[str]] = None,
         excluded_keywords: Optional[list[str]] = None,
+        max_concurrency: Optional[int] = None,
+        tribunal_deadline_seconds: Optional[float] = None,
+        total_deadline_seconds: Optional[float] = None,
+        use_cache: bool = True,
     ) -> Dict:
         """
         Busca publicações com filtros personalizados.
@@ -376,6 +585,10 @@ class PJeComunicaService:
         Faz DUAS buscas por tribunal:
         1. Busca por número OAB
         2. Busca por nome do advogado
+
+        As buscas de todos os tribunais são disparadas em paralelo; o merge é feito
+        depois, sempre na ordem (tribunal, OAB → Nome), então deduplicação por `id`
+        e contadores de exclusão não dependem da ordem de chegada das respostas.
         
         Args:
             oab: Número da OAB (ex: "123456")
@@ -383,6 +596,10 @@ class PJeComunicaService:
             data_inicio: Data inicial (YYYY-MM-DD)
             data_fim: Data final (YYYY-MM-DD)
             tribunais: Lista de tribunais (default: TRIBUNAIS constante)
+            max_concurrency: Máximo de buscas simultâneas (default: settings)
+            tribunal_deadline_seconds: Prazo por tribunal, incluindo retries (default: settings)
+            total_deadline_seconds: Prazo global da busca (default: settings)
+            use_cache: False ignora o cache local de respostas (força consulta ao PJe)
             
         Returns:
             Dict com publicações normalizadas e estatísticas
@@ -404,97 +621,69 @@ class PJeComunicaService:
         excluded_by_keyword = 0
 
         resolved_excluded_oabs, resolved_excluded_keywords = _resolve_exclusion_rules(excluded_oabs, excluded_keywords)
+
+        pool_stats_before = get_pool_stats()
+        search_results = cls._run_tribunal_searches(
+            tribunais=tribunais,
+            oab=oab_clean,
+            nome_advogado=nome_clean,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            max_concurrency=max_concurrency,
+            tribunal_deadline_seconds=tribunal_deadline_seconds,
+            total_deadline_seconds=total_deadline_seconds,
+            use_cache=use_cache,
+        )
+        cache_hits = sum(1 for result in search_results.values() if result.get('from_cache'))
         
-        # Busca em cada tribunal
+        # Merge determinístico: mesma ordem da antiga execução sequencial
         for tribunal in tribunais:
-            # BUSCA 1: Por número OAB
-            result_oab = cls.fetch_publications_from_tribunal(
-                tribunal=tribunal,
-                oab=oab_clean,
-                nome_advogado=None,  # Apenas OAB
-                data_inicio=data_inicio,
-                data_fim=data_fim
-            )
-            
-            if result_oab['success']:
-                for item in result_oab['items']:
-                    item_id = item.get('id')  # API retorna 'id' não 'idComunicacao'
-                    if item_id and item_id not in seen_ids:
-                        seen_ids.add(item_id)
-                        normalized = cls.normalize_publication(item, tribunal)
-                        
-                        # Busca por OAB é precisa: a API já garante vínculo com este OAB.
-                        # Só aplica filtro NEGATIVO (excluir outras advogadas com OAB/nome similar).
-                        # NÃO aplica filtro positivo aqui, pois algumas publicações (ex: TRT15
-                        # distribuições) não mencionam OAB/nome no texto.
-                        if cls.should_exclude_publication(
-                            normalized,
-                            excluded_oabs=resolved_excluded_oabs,
-                            excluded_keywords=resolved_excluded_keywords,
-                        ):
-                            excluded_total += 1
-                            # Heurística: contabiliza por presença no texto normalizado.
-                            full_text = _normalize_for_match(' '.join([
-                                normalized.get('texto_completo', ''),
-                                normalized.get('texto_resumo', ''),
-                                normalized.get('orgao', ''),
-                            ]))
-                            if any(oab in full_text for oab in resolved_excluded_oabs if oab):
-                                excluded_by_oab += 1
-                            if any(_normalize_for_match(k) in full_text for k in resolved_excluded_keywords if k):
-                                excluded_by_keyword += 1
-                        else:
-                            results.append(normalized)
-            else:
-                errors.append({
-                    'tribunal': tribunal,
-                    'tipo_busca': 'OAB',
-                    'error': result_oab.get('error', 'Erro desconhecido')
-                })
-            
-            # BUSCA 2: Por nome do advogado
-            result_nome = cls.fetch_publications_from_tribunal(
-                tribunal=tribunal,
-                oab=None,  # Apenas Nome
-                nome_advogado=nome_clean,
-                data_inicio=data_inicio,
-                data_fim=data_fim
-            )
-            
-            if result_nome['success']:
-                for item in result_nome['items']:
+            for tipo_busca in SEARCH_TYPES:
+                result = search_results[(tribunal, tipo_busca)]
+                if not result['success']:
+                    errors.append({
+                        'tribunal': tribunal,
+                        'tipo_busca': tipo_busca,
+                        'error': result.get('error', 'Erro desconhecido')
+                    })
+                    continue
+
+                for item in result['items']:
                     item_id = item.get('id')  # API retorna 'id' não 'idComunicacao'
-                    # Só adiciona se não foi adicionado pela busca por OAB
-                    if item_id and item_id not in seen_ids:
-                        seen_ids.add(item_id)
-                        normalized = cls.normalize_publication(item, tribunal)
-                        
-                        # Aplicar FILTRO POSITIVO: deve mencionar a advogada
-                        if cls.should_include_publication(normalized, oab_clean, nome_clean):
-                            # Aplicar FILTRO NEGATIVO: não pode ser outra advogada
-                            if cls.should_exclude_publication(
-                                normalized,
-                                excluded_oabs=resolved_excluded_oabs,
-                                excluded_keywords=resolved_excluded_keywords,
-                            ):
-                                excluded_total += 1
-                                full_text = _normalize_for_match(' '.join([
-                                    normalized.get('texto_completo', ''),
-                                    normalized.get('texto_resumo', ''),
-                                    normalized.get('orgao', ''),
-                                ]))
-                                if any(oab in full_text for oab in resolved_excluded_oabs if oab):
-                                    excluded_by_oab += 1
-                                if any(_normalize_for_match(k) in full_text for k in resolved_excluded_keywords if k):
-                                    excluded_by_keyword += 1
-                            else:
-                                results.append(normalized)
-            else:
-                errors.append({
-                    'tribunal': tribunal,
-                    'tipo_busca': 'Nome',
-                    'error': result_nome.get('error', 'Erro desconhecido')
-                })
+                    # Busca por nome só adiciona o que não veio pela busca por OAB
+                    if not item_id or item_id in seen_ids:
+                        continue
+                    seen_ids.add(item_id)
+                    normalized = cls.normalize_publication(item, tribunal)
+
+                    # Busca por OAB é precisa: a API já garante vínculo com este OAB.
+                    # NÃO aplica filtro positivo nela, pois algumas publicações (ex: TRT15
+                    # distribuições) não mencionam OAB/nome no texto.
+                    # Busca por nome: FILTRO POSITIVO, deve mencionar a advogada.
+                    if tipo_busca == SEARCH_TYPE_NOME and not cls.should_include_publication(
+                        normalized, oab_clean, nome_clean
+                    ):
+                        continue
+
+                    # FILTRO NEGATIVO: excluir outras advogadas com OAB/nome similar.
+                    if cls.should_exclude_publication(
+                        normalized,
+                        excluded_oabs=resolved_excluded_oabs,
+                        excluded_keywords=resolved_excluded_keywords,
+                    ):
+                        excluded_total += 1
+                        # Heurística: contabiliza por presença no texto normalizado.
+                        full_text = _normalize_for_match(' '.join([
+                            normalized.get('texto_completo', ''),
+                            normalized.get('texto_resumo', ''),
+                            normalized.get('orgao', ''),
+                        ]))
+                        if any(oab in full_text for oab in resolved_excluded_oabs if oab):
+                            excluded_by_oab += 1
+                        if any(_normalize_for_match(k) in full_text for k in resolved_excluded_keywords if k):
+                            excluded_by_keyword += 1
+                    else:
+                        results.append(normalized)
         
         return {
             'success': True,
@@ -505,7 +694,14 @@ class PJeComunicaService:
             'descartadas_por_oab': excluded_by_oab,
             'descartadas_por_palavra_chave': excluded_by_keyword,
             'total_tribunais_consultados': len(tribunais),
-            'buscas_por_tribunal': 2,  # OAB + Nome
+            'buscas_por_tribunal': len(SEARCH_TYPES),  # OAB + Nome
+            # Contadores do pool são do processo: buscas concorrentes entram na conta.
+            'conexoes_http': {**diff_pool_stats(pool_stats_before, get_pool_stats()), 'aproximado': True},
+            'cache': {
+                'ativo': bool(use_cache and pje_cache.is_cache_enabled()),
+                'hits': cache_hits,
+                'misses': len(search_results) - cache_hits,
+            },
             'publicacoes': results,
             'erros': errors if errors else None
         }
@@ -515,7 +711,8 @@ class PJeComunicaService:
         cls,
         oab: str,
         nome_advogado: str,
-        tribunais: Optional[List[str]] = None
+        tribunais: Optional[List[str]] = None,
+        use_cache: bool = True,
     ) -> Dict:
         """
         Busca publicações de hoje em múltiplos tribunais.
@@ -526,6 +723,7 @@ class PJeComunicaService:
             oab: Número da OAB (ex: "123456")
             nome_advogado: Nome completo (ex: "Nome Sobrenome")
             tribunais: Lista de tribunais (default: TRIBUNAIS constante)
+            use_cache: False ignora o cache local de respostas
             
         Returns:
             Dict com publicações normalizadas e estatísticas
@@ -536,5 +734,6 @@ class PJeComunicaService:
             nome_advogado=nome_advogado,
             data_inicio=hoje,
             data_fim=hoje,
-            tribunais=tribunais
+            tribunais=tribunais,
+            use_cache=use_cache,
         )
@@ -0,0 +1,38 @@
+"""
+Versões de cache para invalidação por gravação.
+
+Quem cacheia um resultado inclui a versão na chave; quem grava incrementa a
+versão, o que descarta todas as entradas antigas de uma vez (elas expiram pelo
+TTL) sem precisar apagá-las. A versão fica no cache `default`, que deve ser
+compartilhado entre processos (ver CACHES em settings).
+"""
+from django.core.cache import cache
+
+
+def get_cache_version(key):
+    """Versão atual (0 se nunca incrementada)."""
+    return cache.get(key, 0)
+
+
+def get_cache_versions(keys):
+    """Versões de várias chaves em uma ida ao cache: {chave: versão}."""
+    found = cache.get_many(list(keys))
+    return {key: found.get(key, 0) for key in keys}
+
+
+def bump_cache_version(key, ttl=None):
+    """
+    Incrementa a versão de forma atômica (add() + incr(), em vez de get() + set(),
+    que perde incrementos concorrentes).
+
+    Args:
+        ttl: validade da versão em segundos; None = sem expirar. incr() regrava
+            com o TTL padrão nos backends file/db, por isso o touch() no fim.
+    """
+    cache.add(key, 0, ttl)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Removida entre o add() e o incr() (ex.: cache.clear())
+        cache.add(key, 1, ttl)
+    cache.touch(key, ttl)
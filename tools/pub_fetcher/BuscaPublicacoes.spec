@@ -3,10 +3,10 @@
 
 a = Analysis(
     ['gui.py'],
-    pathex=[],
+    pathex=['../../backend'],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['services.http_pool'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
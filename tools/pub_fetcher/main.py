@@ -15,6 +15,22 @@ from pathlib import Path
 import click
 import requests
 
+# Reaproveita o pool HTTP do backend (keep-alive, gzip, retry no adapter).
+_BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+if _BACKEND_DIR.is_dir() and str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+try:
+    from services.http_pool import get_pool_stats, get_session
+except ImportError:  # distribuição avulsa sem o backend
+    _fallback_session = requests.Session()
+
+    def get_session(**_kwargs):
+        return _fallback_session
+
+    def get_pool_stats():
+        return {}
+
 
 # Constants
 API_URL = "https://comunicaapi.pje.jus.br/api/v1/comunicacao"
@@ -49,7 +65,7 @@ def fetch_publications(tribunal, oab=None, data_inicio=None, data_fim=None, nome
         if data_fim:
             click.echo(f"   Data fim: {data_fim}", err=True)
         
-        response = requests.get(API_URL, params=params, timeout=10)
+        response = get_session().get(API_URL, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -183,6 +199,14 @@ def main(tribunal, oab, nome, today, data_inicio, data_fim, output):
     # Exibir resumo
     display_summary(publications)
 
+    stats = get_pool_stats()
+    if stats:
+        click.echo(
+            f"🔌 Conexões HTTP: {stats['conexoes_novas']} novas, "
+            f"{stats['conexoes_reutilizadas']} reutilizadas",
+            err=True,
+        )
+
 
 if __name__ == '__main__':
     main()